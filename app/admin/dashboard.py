@@ -1,7 +1,6 @@
 import streamlit as st
-from app.database.db import execute_query
+from app.database.db import execute_query, query_dataframe
 from app.auth.auth import require_role
-import pandas as pd
 import plotly.express as px
 
 @require_role('admin')
@@ -67,7 +66,7 @@ def get_user_growth_data():
     GROUP BY DATE(created_at)
     ORDER BY date
     """
-    return pd.DataFrame(execute_query(query))
+    return query_dataframe(query)
 
 def get_event_distribution():
     query = """
@@ -77,7 +76,7 @@ def get_event_distribution():
     JOIN categories c ON ec.category_id = c.id
     GROUP BY c.name
     """
-    return pd.DataFrame(execute_query(query))
+    return query_dataframe(query)
 
 def get_recent_activities():
     query = """
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from app.database.db import execute_query
+from app.database.db import query_dataframe
 from app.auth.auth import require_role
 import os
 from dotenv import load_dotenv
@@ -150,8 +150,7 @@ def get_event_performance(user_id, start_date, end_date):
     WHERE e.content_provider_id = %s
     GROUP BY e.id
     """
-    result = execute_query(query, (start_date, end_date, start_date, end_date, user_id))
-    return pd.DataFrame(result)
+    return query_dataframe(query, (start_date, end_date, start_date, end_date, user_id))
 
 def get_revenue_data(user_id, start_date, end_date):
     query = """
@@ -161,8 +160,7 @@ def get_revenue_data(user_id, start_date, end_date):
     WHERE e.content_provider_id = %s AND ea.access_granted_at BETWEEN %s AND %s
     GROUP BY DATE(ea.access_granted_at)
     """
-    result = execute_query(query, (user_id, start_date, end_date))
-    return pd.DataFrame(result)
+    return query_dataframe(query, (user_id, start_date, end_date))
 
 def get_user_engagement(user_id, start_date, end_date):
     query = """
@@ -176,8 +174,7 @@ def get_user_engagement(user_id, start_date, end_date):
     WHERE e.content_provider_id = %s
     GROUP BY e.id
     """
-    result = execute_query(query, (start_date, end_date, end_date, user_id))
-    return pd.DataFrame(result)
+    return query_dataframe(query, (start_date, end_date, end_date, user_id))
 
 def get_user_growth(start_date, end_date):
     query = """
@@ -188,8 +185,7 @@ def get_user_growth(start_date, end_date):
     WHERE created_at BETWEEN %s AND %s
     GROUP BY DATE(created_at)
     """
-    result = execute_query(query, (start_date, end_date))
-    return pd.DataFrame(result)
+    return query_dataframe(query, (start_date, end_date))
 
 def get_provider_performance(start_date, end_date):
     query = """
@@ -204,8 +200,7 @@ def get_provider_performance(start_date, end_date):
     WHERE u.is_content_provider = TRUE
     GROUP BY u.id
     """
-    result = execute_query(query, (start_date, end_date, start_date, end_date))
-    return pd.DataFrame(result)
+    return query_dataframe(query, (start_date, end_date, start_date, end_date))
 
 def get_platform_revenue(start_date, end_date):
     query = """
@@ -215,5 +210,4 @@ def get_platform_revenue(start_date, end_date):
     WHERE ea.access_granted_at BETWEEN %s AND %s
     GROUP BY DATE(ea.access_granted_at)
     """
-    result = execute_query(query, (start_date, end_date))
-    return pd.DataFrame(result)
+    return query_dataframe(query, (start_date, end_date))
@@ -1,7 +1,6 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from app.database.db import execute_query
+from app.database.db import execute_query, query_dataframe
 from app.auth.auth import require_role
 
 @require_role('content_manager')
@@ -43,15 +42,16 @@ def get_provider_events(user_id):
     """
     return execute_query(query, (user_id,))
 
-def get_event_views(event_id, start_date, end_date):
-    query = """
+EVENT_VIEWS_QUERY = """
     SELECT DATE(timestamp) as date, COUNT(*) as views
     FROM event_views
     WHERE event_id = %s AND timestamp BETWEEN %s AND %s
     GROUP BY DATE(timestamp)
     ORDER BY date
     """
-    return execute_query(query, (event_id, start_date, end_date))
+
+def get_event_views(event_id, start_date, end_date):
+    return query_dataframe(EVENT_VIEWS_QUERY, (event_id, start_date, end_date))
 
 def get_event_engagement(event_id, start_date, end_date):
     query = """
@@ -67,7 +67,7 @@ def get_event_engagement(event_id, start_date, end_date):
     GROUP BY DATE(c.created_at)
     ORDER BY date
     """
-    return execute_query(query, (start_date, end_date, start_date, end_date, event_id))
+    return query_dataframe(query, (start_date, end_date, start_date, end_date, event_id))
 
 def get_event_revenue(event_id, start_date, end_date):
     query = """
@@ -78,12 +78,12 @@ def get_event_revenue(event_id, start_date, end_date):
     GROUP BY DATE(ea.access_granted_at)
     ORDER BY date
     """
-    return execute_query(query, (event_id, start_date, end_date))
+    return query_dataframe(query, (event_id, start_date, end_date))
 
 def display_views_analytics(views_data):
     st.subheader("Views Analytics")
-    if views_data:
-        df = pd.DataFrame(views_data)
+    if not views_data.empty:
+        df = views_data
         fig = px.line(df, x='date', y='views', title='Daily Views')
         st.plotly_chart(fig)
         st.write(f"Total Views: {df['views'].sum()}")
@@ -92,8 +92,8 @@ def display_views_analytics(views_data):
 
 def display_engagement_analytics(engagement_data):
     st.subheader("Engagement Analytics")
-    if engagement_data:
-        df = pd.DataFrame(engagement_data)
+    if not engagement_data.empty:
+        df = engagement_data
         fig = px.line(df, x='date', y=['comments', 'ratings'], title='Daily Engagement')
         st.plotly_chart(fig)
         
@@ -106,8 +106,8 @@ def display_engagement_analytics(engagement_data):
 
 def display_revenue_analytics(revenue_data):
     st.subheader("Revenue Analytics")
-    if revenue_data:
-        df = pd.DataFrame(revenue_data)
+    if not revenue_data.empty:
+        df = revenue_data
         fig = px.line(df, x='date', y='revenue', title='Daily Revenue')
         st.plotly_chart(fig)
         st.write(f"Total Revenue: ${df['revenue'].sum():.2f}")
@@ -0,0 +1,103 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from app.database.db import execute_many
+from app.utils.metrics import EVENT_VIEWS_BUFFERED, EVENT_VIEWS_WRITTEN, EVENT_VIEWS_DROPPED, EVENT_VIEW_FLUSH_ROWS
+
+logger = logging.getLogger(__name__)
+
+# Most views held in memory before new ones are dropped
+EVENT_VIEW_BUFFER_SIZE = int(os.getenv('EVENT_VIEW_BUFFER_SIZE', 10000))
+# Flush once this many views are waiting, or every EVENT_VIEW_FLUSH_INTERVAL seconds
+EVENT_VIEW_FLUSH_SIZE = int(os.getenv('EVENT_VIEW_FLUSH_SIZE', 500))
+EVENT_VIEW_FLUSH_INTERVAL = float(os.getenv('EVENT_VIEW_FLUSH_INTERVAL', 5))
+
+INSERT_VIEWS = "INSERT INTO event_views (event_id, user_id, timestamp) VALUES (%s, %s, %s)"
+
+class ViewBuffer:
+    # Collects event views in a bounded queue and writes them from a background thread as
+    # multi-row INSERTs. Views are dropped (and counted) rather than blocking the page when
+    # the queue is full or the database rejects a batch.
+    def __init__(self, max_size=EVENT_VIEW_BUFFER_SIZE, flush_size=EVENT_VIEW_FLUSH_SIZE,
+                 flush_interval=EVENT_VIEW_FLUSH_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_size)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def record(self, event_id, user_id, timestamp=None):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((event_id, user_id, timestamp or datetime.now()))
+        except queue.Full:
+            EVENT_VIEWS_DROPPED.labels(reason='buffer_full').inc()
+            return False
+        EVENT_VIEWS_BUFFERED.inc()
+        if self._queue.qsize() >= self.flush_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        # Writes everything queued so far; returns the number of views written
+        written = 0
+        with self._flush_lock:
+            while True:
+                rows = self._drain(self.flush_size)
+                if not rows:
+                    return written
+                if execute_many(INSERT_VIEWS, rows) is None:
+                    EVENT_VIEWS_DROPPED.labels(reason='write_failed').inc(len(rows))
+                    logger.error(f"Dropped {len(rows)} event views after a failed write")
+                    continue
+                EVENT_VIEWS_WRITTEN.inc(len(rows))
+                EVENT_VIEW_FLUSH_ROWS.observe(len(rows))
+                written += len(rows)
+
+    def shutdown(self):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _drain(self, limit):
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-view-buffer', daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Event view flush failed: {e}")
+
+view_buffer = ViewBuffer()
+
+def record_event_view(event_id, user_id):
+    return view_buffer.record(event_id, user_id)
@@ -1,46 +1,492 @@
 import mysql.connector
-from mysql.connector import Error
+import sqlite3
 import os
 from dotenv import load_dotenv
 import logging
+import queue
+import threading
+import time
+import itertools
+import re
+from contextlib import contextmanager
+from app.utils.metrics import DB_POOL_WAIT_TIME, DB_POOL_CHECKOUTS, DB_POOL_EXHAUSTED
+from app.database.instrumentation import record_query
+from app.database import sqlite_backend
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-def get_db_connection():
+# "mysql" (default) or "sqlite" for the embedded stand-in used by tests and benchmarks
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')
+# SQLite database for DB_BACKEND=sqlite; the default is a process-wide shared in-memory database
+DB_SQLITE_PATH = os.getenv('DB_SQLITE_PATH', 'file:mediahost?mode=memory&cache=shared')
+
+# Errors raised by any supported driver
+DriverError = (mysql.connector.Error, sqlite3.Error)
+
+# Connection pool settings
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 10))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 3600))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+
+# Default number of rows sent per multi-row statement by execute_many
+DB_BATCH_SIZE = int(os.getenv('DB_BATCH_SIZE', 500))
+
+# Read replicas: comma-separated host[:port] list. SELECTs are spread across them
+# ("round_robin" or "least_loaded"); writes and transactions always go to DB_HOST.
+DB_REPLICA_HOSTS = [host.strip() for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+DB_REPLICA_ROUTING = os.getenv('DB_REPLICA_ROUTING', 'round_robin')
+# After a write, the same session reads from the primary for this long to cover replica lag
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', 5))
+
+class DatabaseError(Exception):
+    pass
+
+_PLACEHOLDER = re.compile(r"%%|%s")
+
+def expand_params(query, params):
+    # mysql-connector binds one scalar per %s, so list, tuple and set parameters (the
+    # "IN %s" idiom) are expanded here into one placeholder per value, "IN (%s, %s, ...)",
+    # before any backend sees the statement. An empty one becomes "(NULL)", which no value
+    # is IN - nor NOT IN, so leave empty NOT IN lists out of the query instead.
+    if not params or isinstance(params, dict) or not any(isinstance(p, (list, tuple, set)) for p in params):
+        return query, params
+    values = iter(params)
+    flat = []
+
+    def substitute(match):
+        value = next(values, match) if match.group() == '%s' else match
+        if value is match:
+            # %% escape, or more placeholders than parameters, which the driver reports
+            return match.group()
+        if isinstance(value, (list, tuple, set)):
+            items = list(value)
+            flat.extend(items)
+            return "(" + ", ".join(["%s"] * len(items)) + ")" if items else "(NULL)"
+        flat.append(value)
+        return "%s"
+
+    query = _PLACEHOLDER.sub(substitute, query)
+    flat.extend(values)
+    return query, tuple(flat)
+
+def get_db_connection(host=None):
+    if DB_BACKEND == 'sqlite':
+        try:
+            return sqlite_backend.connect(DB_SQLITE_PATH)
+        except sqlite3.Error as e:
+            logger.error(f"Error opening SQLite database: {e}")
+            return None
+
+    host = host or os.getenv('DB_HOST')
+    port = 3306
+    if host and ':' in host:
+        host, port = host.rsplit(':', 1)
+        port = int(port)
     try:
         connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST'),
+            host=host,
+            port=port,
             user=os.getenv('DB_USER'),
             password=os.getenv('DB_PASSWORD'),
             database=os.getenv('DB_NAME')
         )
         return connection
-    except Error as e:
+    except mysql.connector.Error as e:
         logger.error(f"Error connecting to MySQL database: {e}")
         return None
 
-def execute_query(query, params=None):
-    connection = get_db_connection()
-    if not connection:
-        logger.error("Failed to establish database connection")
-        return None
-
+def _explain(connection, query, params):
+    # EXPLAIN output for the slow-query log; never allowed to fail the original query
     try:
         with connection.cursor(dictionary=True) as cursor:
+            cursor.execute("EXPLAIN " + query, params)
+            return cursor.fetchall()
+    except DriverError as error:
+        return f"EXPLAIN failed: {error}"
+
+class ConnectionPool:
+    def __init__(self, connect, pool_size=5, max_overflow=10, recycle=3600, timeout=30, name="primary"):
+        self.connect = connect
+        self.name = name
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.recycle = recycle
+        self.timeout = timeout
+        # Idle connections as (connection, returned_at) pairs. LIFO keeps hot connections in use
+        # and lets the ones at the bottom sit idle long enough to be recycled.
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+
+    def acquire(self):
+        start = time.monotonic()
+        connection = self._checkout(start)
+        DB_POOL_WAIT_TIME.labels(pool=self.name).observe(time.monotonic() - start)
+        if connection is not None:
+            DB_POOL_CHECKOUTS.labels(pool=self.name).inc()
+        return connection
+
+    def _checkout(self, start):
+        exhausted = False
+        while True:
+            try:
+                connection, returned_at = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve():
+                    return self._open_connection()
+                if not exhausted:
+                    exhausted = True
+                    DB_POOL_EXHAUSTED.labels(pool=self.name).inc()
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    logger.error(f"Timed out after {self.timeout}s waiting for a database connection")
+                    return None
+                try:
+                    connection, returned_at = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+
+            if time.time() - returned_at > self.recycle or not self._is_healthy(connection):
+                self._discard(connection)
+                continue
+            return connection
+
+    def release(self, connection):
+        if connection is None:
+            return
+        try:
+            # End any implicit transaction so the next borrower gets a fresh snapshot
+            connection.rollback()
+        except DriverError:
+            self._discard(connection)
+            return
+
+        with self._lock:
+            overflow = self._idle.qsize() >= self.pool_size
+        if overflow:
+            self._discard(connection)
+        else:
+            self._idle.put((connection, time.time()))
+
+    @property
+    def in_use(self):
+        with self._lock:
+            return self._open - self._idle.qsize()
+
+    def dispose(self):
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection)
+
+    def _reserve(self):
+        with self._lock:
+            if self._open < self.pool_size + self.max_overflow:
+                self._open += 1
+                return True
+            return False
+
+    def _open_connection(self):
+        connection = self.connect()
+        if connection is None:
+            with self._lock:
+                self._open -= 1
+        return connection
+
+    def _discard(self, connection):
+        with self._lock:
+            self._open -= 1
+        try:
+            connection.close()
+        except DriverError:
+            pass
+
+    def _is_healthy(self, connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except DriverError:
+            return False
+
+_pool = None
+_replica_pools = None
+_replica_cycle = None
+_pool_lock = threading.Lock()
+
+def _create_pool(host=None, name="primary"):
+    return ConnectionPool(
+        lambda: get_db_connection(host),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_POOL_MAX_OVERFLOW,
+        recycle=DB_POOL_RECYCLE,
+        timeout=DB_POOL_TIMEOUT,
+        name=name
+    )
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _create_pool()
+    return _pool
+
+def get_replica_pools():
+    global _replica_pools, _replica_cycle
+    if _replica_pools is None:
+        with _pool_lock:
+            if _replica_pools is None:
+                pools = [_create_pool(host, name=host) for host in DB_REPLICA_HOSTS]
+                _replica_cycle = itertools.cycle(pools)
+                _replica_pools = pools
+    return _replica_pools
+
+# Session key -> monotonic time of that session's last write, for read-your-writes
+_last_write_at = {}
+_last_write_lock = threading.Lock()
+
+def _session_key():
+    # Streamlit runs each browser session's script in its own context; outside Streamlit
+    # (scripts, workers, tests) the current thread stands in for the session
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else threading.get_ident()
+
+def mark_write():
+    if not DB_REPLICA_HOSTS:
+        return
+    now = time.monotonic()
+    with _last_write_lock:
+        _last_write_at[_session_key()] = now
+        # Forget sessions whose read-your-writes window has passed
+        for key in [key for key, at in _last_write_at.items() if now - at > DB_READ_YOUR_WRITES_SECONDS]:
+            del _last_write_at[key]
+
+def _recently_wrote():
+    with _last_write_lock:
+        at = _last_write_at.get(_session_key())
+    return at is not None and time.monotonic() - at <= DB_READ_YOUR_WRITES_SECONDS
+
+def get_read_pool():
+    if not DB_REPLICA_HOSTS or _recently_wrote():
+        return get_pool()
+    pools = get_replica_pools()
+    if DB_REPLICA_ROUTING == 'least_loaded':
+        return min(pools, key=lambda pool: pool.in_use)
+    with _pool_lock:
+        return next(_replica_cycle)
+
+@contextmanager
+def pooled_connection(read=False):
+    pool = get_read_pool() if read else get_pool()
+    connection = pool.acquire()
+    if connection is None and pool is not get_pool():
+        # Replica unavailable or exhausted; the primary can always serve reads
+        logger.warning(f"Read replica {pool.name} unavailable, falling back to primary")
+        pool = get_pool()
+        connection = pool.acquire()
+    try:
+        yield connection
+    finally:
+        pool.release(connection)
+
+def execute_query(query, params=None):
+    query, params = expand_params(query, params)
+    is_select = query.strip().upper().startswith("SELECT")
+    with pooled_connection(read=is_select) as connection:
+        if not connection:
+            logger.error("Failed to establish database connection")
+            return None
+
+        try:
+            started = time.monotonic()
+            with connection.cursor(dictionary=True) as cursor:
+                cursor.execute(query, params)
+                if is_select:
+                    result = cursor.fetchall()
+                else:
+                    connection.commit()
+                    mark_write()
+                    result = cursor.lastrowid
+            record_query(query, params, time.monotonic() - started, explain=lambda: _explain(connection, query, params))
+            return result
+        except DriverError as error:
+            logger.error(f"Error executing query: {error}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Params: {params}")
+            return None
+
+def execute_multi(statements):
+    # Runs several SELECTs, given as (query, params) pairs, as one multi-statement round-trip
+    # and returns one list of rows per statement, or None if any of them fails
+    query = ";\n".join(statement.strip().rstrip(';') for statement, _ in statements)
+    params = tuple(param for _, statement_params in statements for param in (statement_params or ()))
+    query, params = expand_params(query, params)
+    with pooled_connection(read=True) as connection:
+        if not connection:
+            logger.error("Failed to establish database connection")
+            return None
+
+        try:
+            started = time.monotonic()
+            results = []
+            with connection.cursor(dictionary=True) as cursor:
+                for result in cursor.execute(query, params, multi=True):
+                    if result.with_rows:
+                        results.append(result.fetchall())
+            record_query(query, params, time.monotonic() - started)
+            return results
+        except DriverError as error:
+            logger.error(f"Error executing multi-statement query: {error}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Params: {params}")
+            return None
+
+def execute_many(query, rows, batch_size=None):
+    # Runs one parameterised statement for many rows inside a single transaction.
+    # For INSERT ... VALUES statements mysql-connector rewrites each executemany()
+    # batch into one multi-row INSERT, so each batch costs a single round-trip.
+    rows = list(rows)
+    if not rows:
+        return 0
+    batch_size = batch_size or DB_BATCH_SIZE
+
+    with pooled_connection() as connection:
+        if not connection:
+            logger.error("Failed to establish database connection")
+            return None
+
+        try:
+            started = time.monotonic()
+            affected = 0
+            with connection.cursor() as cursor:
+                for i in range(0, len(rows), batch_size):
+                    cursor.executemany(query, rows[i:i + batch_size])
+                    affected += cursor.rowcount
+            connection.commit()
+            mark_write()
+            record_query(query, rows[0], time.monotonic() - started)
+            return affected
+        except DriverError as error:
+            # Nothing was committed; releasing the connection rolls the batch back
+            logger.error(f"Error executing batch query: {error}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Rows: {len(rows)}")
+            return None
+
+def _iter_chunks(query, params, chunk_size, dictionary):
+    # Unbuffered cursor: rows are pulled from the server chunk_size at a time instead of
+    # being materialised by fetchall(). The pooled connection is held until the generator
+    # is exhausted or closed.
+    query, params = expand_params(query, params)
+    with pooled_connection(read=True) as connection:
+        if not connection:
+            logger.error("Failed to establish database connection")
+            return
+
+        cursor = connection.cursor(dictionary=dictionary)
+        exhausted = False
+        try:
             cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    exhausted = True
+                    break
+                yield cursor.column_names, rows
+        except DriverError as error:
+            logger.error(f"Error streaming query: {error}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Params: {params}")
+        finally:
+            if exhausted:
+                cursor.close()
+            else:
+                # Abandoned mid-stream or failed. Returning the connection would make release()
+                # drain the unread rows from the server first, so it is closed instead; the
+                # rollback in release() then fails and the pool discards it.
+                connection.close()
+
+def stream_query(query, params=None, chunk_size=1000, chunks=False):
+    # Yields rows as dicts one at a time, or lists of up to chunk_size rows when chunks=True
+    for _, rows in _iter_chunks(query, params, chunk_size, dictionary=True):
+        if chunks:
+            yield rows
+        else:
+            yield from rows
+
+def query_dataframe(query, params=None, chunk_size=10000):
+    # Builds a DataFrame straight from tuple chunks, skipping the list of dicts execute_query builds
+    import pandas as pd
+
+    frames = [
+        pd.DataFrame.from_records(rows, columns=columns)
+        for columns, rows in _iter_chunks(query, params, chunk_size, dictionary=False)
+    ]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+class Transaction:
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursor = connection.cursor(dictionary=True)
+
+    def execute(self, query, params=None):
+        # Same return convention as execute_query, but errors propagate so the whole
+        # transaction is rolled back
+        query, params = expand_params(query, params)
+        try:
+            started = time.monotonic()
+            self.cursor.execute(query, params)
             if query.strip().upper().startswith("SELECT"):
-                result = cursor.fetchall()
+                result = self.cursor.fetchall()
             else:
-                connection.commit()
-                result = cursor.lastrowid
-        return result
-    except mysql.connector.Error as error:
-        logger.error(f"Error executing query: {error}")
-        logger.error(f"Query: {query}")
-        logger.error(f"Params: {params}")
-        return None
-    finally:
-        if connection.is_connected():
-            connection.close()
+                result = self.cursor.lastrowid
+            record_query(query, params, time.monotonic() - started)
+            return result
+        except DriverError as error:
+            raise DatabaseError(f"Error executing query: {error}") from error
+
+    def execute_many(self, query, rows, batch_size=None):
+        rows = list(rows)
+        batch_size = batch_size or DB_BATCH_SIZE
+        affected = 0
+        try:
+            for i in range(0, len(rows), batch_size):
+                self.cursor.executemany(query, rows[i:i + batch_size])
+                affected += self.cursor.rowcount
+        except DriverError as error:
+            raise DatabaseError(f"Error executing batch query: {error}") from error
+        return affected
+
+@contextmanager
+def transaction():
+    # Runs every statement issued through the yielded Transaction on one pooled
+    # connection and commits once on exit. Any exception rolls everything back and
+    # is re-raised as DatabaseError (or as-is for non-database errors).
+    with pooled_connection() as connection:
+        if not connection:
+            raise DatabaseError("Failed to establish database connection")
+
+        tx = Transaction(connection)
+        try:
+            yield tx
+            connection.commit()
+            mark_write()
+        except DatabaseError as error:
+            logger.error(f"Transaction rolled back: {error}")
+            raise
+        except DriverError as error:
+            logger.error(f"Transaction rolled back: {error}")
+            raise DatabaseError(str(error)) from error
+        finally:
+            try:
+                tx.cursor.close()
+            except DriverError:
+                pass
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from app.utils.metrics import DB_QUERY_LATENCY
+
+# Queries slower than this are written to the slow-query log
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 500))
+# Attach EXPLAIN output to slow SELECT log entries
+DB_SLOW_QUERY_EXPLAIN = os.getenv('DB_SLOW_QUERY_EXPLAIN', 'False').lower() == 'true'
+# Optional file for slow-query entries (one JSON object per line) so promtail can ship them to Loki
+DB_SLOW_QUERY_LOG_FILE = os.getenv('DB_SLOW_QUERY_LOG_FILE')
+
+slow_query_logger = logging.getLogger('app.database.slow_query')
+if DB_SLOW_QUERY_LOG_FILE:
+    _handler = logging.FileHandler(DB_SLOW_QUERY_LOG_FILE)
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    slow_query_logger.addHandler(_handler)
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_IN_LIST = re.compile(r"\bin\s*(?:\(\s*\?(?:\s*,\s*\?)*\s*\)|\?)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+def fingerprint(query):
+    # Normalised query shape: literals and placeholders become ?, IN-lists of any
+    # length collapse to "in (?+)", whitespace and case are folded.
+    normalized = _STRING_LITERAL.sub("?", query)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("in (?+)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip().lower()
+
+def fingerprint_id(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+def params_shape(params):
+    # Types (and lengths of sequences) only - parameter values are never logged
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: _value_shape(value) for key, value in params.items()}
+    return [_value_shape(value) for value in params]
+
+def _value_shape(value):
+    if isinstance(value, (list, tuple, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+def find_caller():
+    # First frame outside the database package and contextlib, e.g. "app.search.search_engine.advanced_search"
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if not module.startswith('app.database') and module != 'contextlib':
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+def record_query(query, params, duration, explain=None):
+    normalized = fingerprint(query)
+    query_id = fingerprint_id(normalized)
+    caller = find_caller()
+    DB_QUERY_LATENCY.labels(fingerprint=query_id, caller=caller).observe(duration)
+
+    duration_ms = duration * 1000
+    if duration_ms < DB_SLOW_QUERY_MS:
+        return
+
+    entry = {
+        "event": "slow_query",
+        "fingerprint_id": query_id,
+        "fingerprint": normalized,
+        "caller": caller,
+        "duration_ms": round(duration_ms, 2),
+        "params_shape": params_shape(params),
+    }
+    if explain and DB_SLOW_QUERY_EXPLAIN and normalized.startswith("select"):
+        entry["explain"] = explain()
+    slow_query_logger.warning(json.dumps(entry, default=str))
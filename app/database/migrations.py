@@ -0,0 +1,67 @@
+import os
+import re
+import logging
+from app.database.db import execute_query, transaction, DatabaseError
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'sql', 'migrations')
+
+# Versioned migrations are files named NNNN_description.sql; NNNN is the version
+_MIGRATION_FILE = re.compile(r"^(\d+)_[\w-]+\.sql$")
+
+def ensure_migrations_table():
+    execute_query("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(50) PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+def get_applied_versions():
+    result = execute_query("SELECT version FROM schema_migrations")
+    return {row['version'] for row in result or []}
+
+def get_migrations(migrations_dir=MIGRATIONS_DIR):
+    migrations = []
+    for file_name in os.listdir(migrations_dir):
+        match = _MIGRATION_FILE.match(file_name)
+        if match:
+            migrations.append((match.group(1), file_name, os.path.join(migrations_dir, file_name)))
+    return sorted(migrations, key=lambda migration: int(migration[0]))
+
+def split_statements(sql_script):
+    # Strips "--" comment lines and splits on statement-terminating semicolons
+    lines = [line for line in sql_script.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in "\n".join(lines).split(';') if statement.strip()]
+
+def run_migrations(migrations_dir=MIGRATIONS_DIR):
+    ensure_migrations_table()
+    applied = get_applied_versions()
+    newly_applied = []
+
+    for version, file_name, path in get_migrations(migrations_dir):
+        if version in applied:
+            continue
+        with open(path, 'r') as f:
+            statements = split_statements(f.read())
+
+        logger.info(f"Applying migration {file_name}")
+        try:
+            # MySQL commits DDL implicitly, so the version row is what makes a migration "done"
+            with transaction() as tx:
+                for statement in statements:
+                    tx.execute(statement)
+                tx.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, file_name))
+        except DatabaseError as e:
+            logger.error(f"Migration {file_name} failed: {e}")
+            raise
+        newly_applied.append(file_name)
+
+    return newly_applied
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    applied = run_migrations()
+    print(f"Applied {len(applied)} migration(s): {', '.join(applied) if applied else 'none'}")
@@ -0,0 +1,81 @@
+import logging
+from datetime import datetime, timedelta
+from app.database.db import pooled_connection, expand_params, DriverError
+from app.analytics.dashboard import EVENT_VIEWS_QUERY
+from app.events.event_management import EVENTS_BY_PROVIDER_QUERY, COMMENTS_QUERY, PAGE_BLOCKS_QUERY
+from app.notifications.notification_system import USER_NOTIFICATIONS_QUERY
+from app.recommendations.recommendation_engine import SIMILAR_EVENTS_QUERY
+from app.search.search_engine import page_statement
+
+logger = logging.getLogger(__name__)
+
+# name -> function returning (query, params). Hot queries that must be served by an index;
+# check_query_plans() EXPLAINs each one and reports any table it reads with a full scan. The
+# queries are the ones the app runs, and the statements are built at check time so date
+# parameters are current.
+HOT_QUERIES = {}
+
+def register_hot_query(name, statement):
+    HOT_QUERIES[name] = statement
+
+def explain(query, params=None):
+    query, params = expand_params(query, params)
+    with pooled_connection() as connection:
+        with connection.cursor(dictionary=True) as cursor:
+            cursor.execute("EXPLAIN " + query, params)
+            return cursor.fetchall()
+
+def find_full_scans(plan):
+    return [row['table'] for row in plan if row.get('type') == 'ALL']
+
+def check_query_plans(queries=None):
+    # Returns {name: [tables read with a full scan]} for every regressed hot query; a query
+    # that cannot be EXPLAINed counts as regressed, with the error in place of the tables
+    regressions = {}
+    for name, statement in (queries or HOT_QUERIES).items():
+        try:
+            full_scans = find_full_scans(explain(*statement()))
+        except DriverError as e:
+            logger.error(f"Hot query {name} could not be explained: {e}")
+            regressions[name] = [f"EXPLAIN failed: {e}"]
+            continue
+        if full_scans:
+            logger.warning(f"Hot query {name} does a full scan of {', '.join(full_scans)}")
+            regressions[name] = full_scans
+    return regressions
+
+def _today():
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+register_hot_query(
+    "advanced_search.published_by_start_time",
+    lambda: page_statement(start_date=_today())
+)
+register_hot_query(
+    "keyset_search.published_by_price_after",
+    lambda: page_statement(sort_by='price', per_page=11, position={'value': 10, 'id': 1})
+)
+register_hot_query(
+    "events.by_provider",
+    lambda: (EVENTS_BY_PROVIDER_QUERY, (1,))
+)
+register_hot_query(
+    "notifications.by_user",
+    lambda: (USER_NOTIFICATIONS_QUERY, (1, 10))
+)
+register_hot_query(
+    "event_views.by_event_and_day",
+    lambda: (EVENT_VIEWS_QUERY, (1, _today() - timedelta(days=30), _today()))
+)
+register_hot_query(
+    "comments.by_event",
+    lambda: (COMMENTS_QUERY, (1,))
+)
+register_hot_query(
+    "page_blocks.by_event",
+    lambda: (PAGE_BLOCKS_QUERY, (1,))
+)
+register_hot_query(
+    "recommendations.similar_events",
+    lambda: (SIMILAR_EVENTS_QUERY, ((1, 2), 1, 5))
+)
@@ -0,0 +1,245 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, date
+
+# Embedded stand-in for MySQL, selected with DB_BACKEND=sqlite. It exposes the small part of
+# the mysql-connector API that app.database.db uses and translates the MySQL dialect the app
+# writes (%s placeholders, NOW(), DATE_ADD, ON DUPLICATE KEY UPDATE, FOR UPDATE)
+# so tests and benchmarks can run the real queries without any services.
+
+SCHEMA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'sql')
+
+_DATE_ADD = re.compile(r"\bDATE_(ADD|SUB)\((.+?),\s*INTERVAL\s+(\d+)\s+(\w+)\)", re.IGNORECASE)
+_ON_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b(.*)$", re.IGNORECASE | re.DOTALL)
+_VALUES_REF = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\s*$", re.IGNORECASE)
+_EXPLAIN = re.compile(r"^\s*EXPLAIN\s+", re.IGNORECASE)
+
+def _parse_datetime(value):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("DATETIME", _parse_datetime)
+sqlite3.register_converter("TIMESTAMP", _parse_datetime)
+
+def _expand_placeholders(query, params):
+    # %s -> ?. Sequence parameters are rejected as mysql-connector rejects them, so nothing
+    # passes here that fails on MySQL; app.database.db.expand_params expands "IN %s" lists
+    # for both backends.
+    if params is None:
+        return query, ()
+    params = list(params)
+    parts = query.split('%s')
+    if len(parts) - 1 != len(params):
+        raise sqlite3.ProgrammingError(f"Expected {len(parts) - 1} parameters, got {len(params)}")
+    for param in params:
+        if isinstance(param, (list, tuple, set, dict)):
+            raise sqlite3.ProgrammingError(
+                f"Failed processing format-parameters; Python '{type(param).__name__}' cannot be converted "
+                f"to a MySQL type"
+            )
+    return "?".join(parts), params
+
+def translate_query(query, params=None):
+    sql, flat = _expand_placeholders(query, params)
+    sql = _DATE_ADD.sub(
+        lambda m: f"datetime({m.group(2)}, '{'+' if m.group(1).upper() == 'ADD' else '-'}{m.group(3)} {m.group(4).lower()}s')",
+        sql
+    )
+    sql = _ON_DUPLICATE.sub(
+        lambda m: "ON CONFLICT DO UPDATE SET" + _VALUES_REF.sub(r"excluded.\1", m.group(1)),
+        sql
+    )
+    # SQLite locks the whole database for a write transaction, so row locks are implicit
+    sql = _FOR_UPDATE.sub("", sql)
+    sql = sql.replace('%%', '%')
+    return sql, flat
+
+def translate_ddl(statement):
+    # MySQL DDL from config/sql -> SQLite. Returns None for statements SQLite has no use for.
+    if re.search(r"\bFULLTEXT\b", statement, re.IGNORECASE):
+        return None
+    statement = re.sub(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT", statement, flags=re.IGNORECASE)
+    statement = re.sub(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b", "", statement, flags=re.IGNORECASE)
+    statement = re.sub(r"\bUNIQUE\s+KEY\s+(?:\w+\s*)?\(", "UNIQUE (", statement, flags=re.IGNORECASE)
+    return statement
+
+class SQLiteCursor:
+    def __init__(self, connection, dictionary=False):
+        self._cursor = connection.cursor()
+        self.dictionary = dictionary
+        self._explain = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def column_names(self):
+        if self._explain:
+            return ('id', 'table', 'type', 'key', 'Extra')
+        return tuple(column[0] for column in self._cursor.description or ())
+
+    @property
+    def with_rows(self):
+        return self._cursor.description is not None
+
+    def execute(self, query, params=None, multi=False):
+        if multi:
+            return self._execute_multi(query, params)
+        self._explain = bool(_EXPLAIN.match(query))
+        if self._explain:
+            query = "EXPLAIN QUERY PLAN " + _EXPLAIN.sub("", query, count=1)
+        sql, flat = translate_query(query, params)
+        self._cursor.execute(sql, flat)
+
+    def _execute_multi(self, query, params):
+        # Like mysql-connector's multi=True: runs each ;-separated statement in turn and
+        # yields the cursor positioned on its result. Parameters are handed out in order.
+        params = list(params or ())
+        for statement in (part for part in query.split(';') if part.strip()):
+            count = statement.count('%s')
+            self.execute(statement, params[:count])
+            params = params[count:]
+            yield self
+
+    def executemany(self, query, rows):
+        sql, _ = translate_query(query, None)
+        self._cursor.executemany(sql.replace('%s', '?'), [list(row) for row in rows])
+
+    def fetchall(self):
+        return self._convert(self._cursor.fetchall())
+
+    def fetchmany(self, size):
+        return self._convert(self._cursor.fetchmany(size))
+
+    def close(self):
+        self._cursor.close()
+
+    def _convert(self, rows):
+        if self._explain:
+            rows = [_plan_row(row) for row in rows]
+            rows = [row for row in rows if row is not None]
+            return rows if self.dictionary else [tuple(row.values()) for row in rows]
+        if not self.dictionary:
+            return rows
+        columns = self.column_names
+        return [dict(zip(columns, row)) for row in rows]
+
+_PLAN_DETAIL = re.compile(r"^(SCAN|SEARCH) (\w+)(?: AS \w+)?(?: USING (?:COVERING |INTEGER PRIMARY KEY|PRIMARY KEY)?(?:INDEX (\w+))?)?")
+
+def _plan_row(row):
+    # Maps an EXPLAIN QUERY PLAN step onto MySQL's EXPLAIN columns: SCAN without an index is a
+    # full table scan ("ALL"), SCAN over an index is a full index scan ("index"), SEARCH is "ref".
+    step_id, _, _, detail = row
+    match = _PLAN_DETAIL.match(detail)
+    if not match:
+        return None
+    operation, table, index = match.groups()
+    if table == 'CONSTANT':
+        return None
+    if operation == 'SEARCH':
+        access = 'ref'
+    elif 'USING' in detail:
+        access = 'index'
+    else:
+        access = 'ALL'
+    return {'id': step_id, 'table': table, 'type': access, 'key': index, 'Extra': detail}
+
+class SQLiteConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, dictionary=False):
+        return SQLiteCursor(self._connection, dictionary=dictionary)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def ping(self, reconnect=False):
+        self._connection.execute("SELECT 1")
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self._connection.close()
+
+# Databases whose schema has been loaded in this process. Shared in-memory databases live
+# as long as one connection to them is open, so the first connection is kept here.
+_initialized = {}
+_init_lock = threading.Lock()
+
+def _open(database):
+    connection = sqlite3.connect(
+        database, uri=database.startswith('file:'), detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False
+    )
+    connection.create_function("NOW", 0, lambda: datetime.now().isoformat(' ', 'seconds'))
+    connection.execute("PRAGMA foreign_keys = ON")
+    return connection
+
+def connect(database):
+    with _init_lock:
+        if database not in _initialized:
+            keeper = _open(database)
+            if not _has_table(keeper, 'users'):
+                load_schema(keeper)
+            _initialized[database] = keeper
+    return SQLiteConnection(_open(database))
+
+def _has_table(connection, name):
+    return connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+def load_schema(connection, schema_dir=SCHEMA_DIR):
+    # Base schema from config/sql followed by every versioned migration, recorded in
+    # schema_migrations so run_migrations() treats them as applied
+    from app.database.migrations import get_migrations, split_statements
+
+    def run_script(script):
+        for statement in split_statements(script):
+            statement = translate_ddl(statement)
+            if statement:
+                connection.execute(statement)
+
+    for file_name in sorted(os.listdir(schema_dir)):
+        if file_name.endswith('.sql'):
+            with open(os.path.join(schema_dir, file_name)) as f:
+                run_script(f.read())
+
+    connection.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(50) PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    for version, file_name, path in get_migrations(os.path.join(schema_dir, 'migrations')):
+        with open(path) as f:
+            run_script(f.read())
+        connection.execute("INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, file_name))
+    connection.commit()
@@ -2,8 +2,10 @@ import streamlit as st
 from app.database.db import execute_query
 from datetime import datetime, timedelta
 from app.events.event_management import get_all_categories
-from app.search.search_engine import advanced_search, get_categories, get_content_providers, get_tags
-from app.events.event_management import get_event_categories
+from app.search.search_engine import keyset_search, get_categories, get_content_providers, get_tags, price_bucket_label
+from app.search import search_engine
+from app.events.event_management import get_categories_and_tags_by_event
+from app.search.autocomplete import complete, normalize
 
 def get_all_events(search_query=None, start_date=None, end_date=None, min_price=None, max_price=None, categories=None):
     query = """
@@ -43,13 +45,45 @@ def get_all_events(search_query=None, start_date=None, end_date=None, min_price=
 
     return execute_query(query, tuple(params))
 
+def _facet_caption(counts, label=str, by_count=True):
+    # "Music (12) · Jazz (3)" for the values with matches, most first unless by_count is off
+    items = sorted(counts.items(), key=lambda item: -item[1] if by_count else item[0])
+    return " · ".join(f"{label(value)} ({count})" for value, count in items)
+
+def _apply_suggestion(suggestion):
+    # Runs before the rerun a suggestion button triggers, so the widgets pick up the new values
+    kind = suggestion['kind']
+    if kind == 'event':
+        st.session_state['view_event_id'] = suggestion['id']
+        return
+    if kind == 'provider':
+        # The selectbox rejects values it does not offer
+        if suggestion['text'] in [cp['username'] for cp in get_content_providers()]:
+            st.session_state['browser_provider'] = suggestion['text']
+    else:
+        key = 'browser_categories' if kind == 'category' else 'browser_tags'
+        selected = st.session_state.get(key, [])
+        if suggestion['text'] not in selected:
+            st.session_state[key] = selected + [suggestion['text']]
+    st.session_state['browser_search'] = ""
+
 def event_browser():
     st.header("Event Browser")
 
     user_role = st.session_state.get('user', {}).get('role')
 
     # Search and filter options
-    search_query = st.text_input("Search events", "")
+    search_query = st.text_input("Search events", key='browser_search')
+
+    # Completions of what has been typed so far, from the in-memory autocomplete index
+    suggestions = [suggestion for suggestion in complete(search_query, limit=5)
+                   if normalize(suggestion['text']) != normalize(search_query)] if search_query else []
+    if suggestions:
+        for column, suggestion in zip(st.columns(len(suggestions)), suggestions):
+            column.button(f"{suggestion['text']} ({suggestion['kind']})",
+                          key=f"suggestion_{suggestion['kind']}_{suggestion['id']}",
+                          on_click=_apply_suggestion, args=(suggestion,))
+    fuzzy = st.checkbox("Match misspellings", help="Find titles and providers that are spelled similarly")
     
     col1, col2 = st.columns(2)
     with col1:
@@ -62,6 +96,7 @@ def event_browser():
         min_price = st.number_input("Min price", min_value=0.0, value=0.0, step=1.0)
     with col4:
         max_price = st.number_input("Max price", min_value=0.0, value=1000.0, step=1.0)
+    price_counts = st.empty()
 
     # Category and tag filters
     categories = get_categories()
@@ -69,17 +104,23 @@ def event_browser():
     
     col5, col6 = st.columns(2)
     with col5:
-        selected_categories = st.multiselect("Filter by categories", options=[cat['name'] for cat in categories] if categories else [])
+        selected_categories = st.multiselect("Filter by categories", options=[cat['name'] for cat in categories] if categories else [],
+                                             key='browser_categories')
+        category_counts = st.empty()
     with col6:
-        selected_tags = st.multiselect("Filter by tags", options=[tag['name'] for tag in tags] if tags else [])
+        selected_tags = st.multiselect("Filter by tags", options=[tag['name'] for tag in tags] if tags else [],
+                                       key='browser_tags')
+        tag_counts = st.empty()
 
     category_ids = [cat['id'] for cat in categories if cat['name'] in selected_categories]
     tag_ids = [tag['id'] for tag in tags if tag['name'] in selected_tags]
 
     # Content provider filter
     content_providers = get_content_providers()
-    selected_provider = st.selectbox("Filter by content provider", options=["All"] + [cp['username'] for cp in content_providers])
+    selected_provider = st.selectbox("Filter by content provider", options=["All"] + [cp['username'] for cp in content_providers],
+                                     key='browser_provider')
     content_provider = None if selected_provider == "All" else selected_provider
+    provider_counts = st.empty()
 
     # Sorting options
     col7, col8 = st.columns(2)
@@ -88,21 +129,28 @@ def event_browser():
             "Start Date": "start_time",
             "Price": "price",
             "Average Rating": "avg_rating",
-            "Number of Ratings": "total_ratings"
+            "Number of Ratings": "total_ratings",
         }
+        # Substring matching has no relevance score to sort by
+        if search_engine.SEARCH_MODE != 'like':
+            sort_options["Relevance"] = "relevance"
         sort_by = st.selectbox("Sort by", options=list(sort_options.keys()))
     with col8:
         sort_order = st.radio("Sort order", options=["Ascending", "Descending"])
 
-    # Pagination
-    col9, col10 = st.columns(2)
-    with col9:
-        page = st.number_input("Page", min_value=1, value=1, step=1)
-    with col10:
-        per_page = st.number_input("Items per page", min_value=5, max_value=50, value=10, step=5)
+    per_page = st.number_input("Items per page", min_value=5, max_value=50, value=10, step=5)
 
-    # Fetch and display events
-    events, total_count = advanced_search(
+    # Pagination: one cursor per page visited, so Previous goes back to where that page started.
+    # Changing any filter starts again from the first page.
+    filters = (search_query, start_date, end_date, min_price, max_price, tuple(category_ids), tuple(tag_ids),
+               content_provider, sort_by, sort_order, per_page, fuzzy)
+    if st.session_state.get('browser_filters') != filters:
+        st.session_state['browser_filters'] = filters
+        st.session_state['browser_cursors'] = [None]
+    cursors = st.session_state['browser_cursors']
+
+    # Fetch and display events. The counts shown under each filter come back with the page.
+    events, total_count, next_cursor, facets = keyset_search(
         search_query=search_query,
         start_date=start_date,
         end_date=end_date,
@@ -113,15 +161,28 @@ def event_browser():
         content_provider=content_provider,
         sort_by=sort_options[sort_by],
         sort_order="ASC" if sort_order == "Ascending" else "DESC",
-        page=page,
-        per_page=per_page
+        cursor=cursors[-1],
+        per_page=per_page,
+        facets=True,
+        fuzzy=fuzzy
     )
+    events = events or []
+
+    if facets:
+        category_names = {cat['id']: cat['name'] for cat in categories}
+        tag_names = {tag['id']: tag['name'] for tag in tags}
+        price_counts.caption(_facet_caption(facets['price'], price_bucket_label, by_count=False))
+        category_counts.caption(_facet_caption(facets['categories'], lambda cat_id: category_names.get(cat_id, cat_id)))
+        tag_counts.caption(_facet_caption(facets['tags'], lambda tag_id: tag_names.get(tag_id, tag_id)))
+        provider_counts.caption(_facet_caption(facets['providers']))
 
     st.write(f"Showing {len(events)} of {total_count} events")
 
     if not events:
         st.write("No events found matching your criteria.")
     else:
+        # Categories and tags for the whole page in one query
+        event_labels = get_categories_and_tags_by_event([event['id'] for event in events])
         for event in events:
             with st.expander(f"{event['title']} - {event['start_time']}"):
                 st.write(f"Description: {event['description']}")
@@ -133,8 +194,10 @@ def event_browser():
                 rating_count = event.get('rating_count', 0)
                 st.write(f"Rating: {avg_rating:.2f} ({rating_count} ratings)")
                 
-                event_categories = get_event_categories(event['id'])
-                st.write("Categories: " + ", ".join([cat['name'] for cat in event_categories]))
+                labels = event_labels[event['id']]
+                st.write("Categories: " + ", ".join([cat['name'] for cat in labels['categories']]))
+                if labels['tags']:
+                    st.write("Tags: " + ", ".join([tag['name'] for tag in labels['tags']]))
                 
                 col1, col2 = st.columns(2)
                 with col1:
@@ -148,15 +211,16 @@ def event_browser():
                         st.rerun()
 
     # Pagination controls
-    total_pages = (total_count - 1) // per_page + 1
+    page = len(cursors)
+    total_pages = max((total_count - 1) // per_page + 1, 1)
     st.write(f"Page {page} of {total_pages}")
     
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("Previous Page", disabled=page==1):
-            st.session_state['page'] = page - 1
+        if st.button("Previous Page", disabled=page == 1):
+            cursors.pop()
             st.rerun()
     with col2:
-        if st.button("Next Page", disabled=page==total_pages):
-            st.session_state['page'] = page + 1
+        if st.button("Next Page", disabled=next_cursor is None):
+            cursors.append(next_cursor)
             st.rerun()
@@ -1,4 +1,4 @@
-from app.database.db import execute_query
+from app.database.db import execute_query, execute_many, execute_multi, transaction, DatabaseError
 from app.storage.minio_client import upload_file, get_secure_file_url, get_file_url
 from app.messaging.nats_client import publish_message
 from datetime import datetime, timedelta
@@ -6,73 +6,52 @@ import json
 import os
 from app.auth.auth import require_role
 from app.notifications.notification_system import create_event_notification, create_new_content_notification
+from app.utils.cache import TTLCache
+from app.payments.entitlements import has_event_access
+from app.analytics.view_buffer import record_event_view
+from app.search.search_engine import invalidate_reference_data, apply_event_update
 import pytz
+import logging
 
-def create_event(content_provider_id, title, description, start_time, end_time, price, categories, tags):
-    query = """
-    INSERT INTO events (content_provider_id, title, description, start_time, end_time, price, is_published)
-    VALUES (%s, %s, %s, %s, %s, %s, %s)
-    """
-    params = (content_provider_id, title, description, start_time, end_time, price, False)
-    event_id = execute_query(query, params)
-    
-    if event_id:
-        for category_id in categories:
-            add_event_category(event_id, category_id)
-        
-        for tag_id in tags:
-            add_event_tag(event_id, tag_id)
-        
-        # Create notification for the new event
-        create_event_notification(event_id)
-    
-    return event_id is not None
+logger = logging.getLogger(__name__)
 
-def get_events_by_provider(content_provider_id):
-    query = """
+# Assembled public part of each event (see get_event_details), keyed by event id
+EVENT_CACHE_TTL = int(os.getenv('EVENT_CACHE_TTL', 60))
+EVENT_CACHE_SIZE = int(os.getenv('EVENT_CACHE_SIZE', 1000))
+_event_cache = TTLCache(EVENT_CACHE_SIZE, EVENT_CACHE_TTL, name="event_details")
+
+# Comments served with the event page, newest first
+COMMENTS_PAGE_SIZE = 50
+
+EVENTS_BY_PROVIDER_QUERY = """
     SELECT * FROM events WHERE content_provider_id = %s ORDER BY start_time DESC
     """
-    params = (content_provider_id,)
-    return execute_query(query, params)
 
-@require_role('content_manager')
-def update_event(event_id, title, description, start_time, end_time, price, is_published, categories, tags):
-    query = """
-    UPDATE events
-    SET title = %s, description = %s, start_time = %s, end_time = %s, price = %s, is_published = %s
-    WHERE id = %s
-    """
-    params = (title, description, start_time, end_time, price, is_published, event_id)
-    result = execute_query(query, params)
-    
-    if result:
-        # Remove existing categories and tags
-        execute_query("DELETE FROM event_categories WHERE event_id = %s", (event_id,))
-        execute_query("DELETE FROM event_tags WHERE event_id = %s", (event_id,))
-        
-        # Add new categories and tags
-        for category_id in categories:
-            add_event_category(event_id, category_id)
-        for tag_id in tags:
-            add_event_tag(event_id, tag_id)
-        
-        # Publish message for analytics update
-        message = json.dumps({
-            "event_id": event_id,
-            "action": "update",
-            "is_published": is_published
-        })
-        publish_message("analytics.event_update", message)
-    
-    return result is not None
+def get_events_by_provider(content_provider_id):
+    params = (content_provider_id,)
+    return execute_query(EVENTS_BY_PROVIDER_QUERY, params)
 
 @require_role('content_manager')
 def delete_event(event_id):
     query = "DELETE FROM events WHERE id = %s"
     params = (event_id,)
     result = execute_query(query, params)
+    invalidate_event_cache(event_id)
+    if result is not None:
+        publish_event_update(event_id, "delete", False)
     return result is not None
 
+def publish_event_update(event_id, action, is_published):
+    # Updates this process's search cache and indexes, then tells the other replicas and
+    # the analytics worker
+    message = json.dumps({
+        "event_id": event_id,
+        "action": action,
+        "is_published": is_published
+    })
+    apply_event_update(message)
+    publish_message("analytics.event_update", message)
+
 def add_video_to_event(event_id, title, description, file_data, file_name, duration, qualities=None, subtitles=None):
     file_path = upload_file(file_data, file_name)
     if not file_path:
@@ -86,6 +65,8 @@ def add_video_to_event(event_id, title, description, file_data, file_name, durat
     result = execute_query(query, params)
     
     if result:
+        invalidate_event_cache(event_id)
+
         # Publish message for video processing
         message = json.dumps({
             "video_id": result,
@@ -116,18 +97,21 @@ def get_videos_by_event(event_id, user_id=None):
     videos = execute_query(query, params)
     
     if videos:
-        for video in videos:
-            if user_id and has_event_access(user_id, event_id):
-                video['url'] = get_secure_file_url(video['file_path'], expires=timedelta(hours=1))
-                video['qualities'] = json.loads(video['qualities']) if video['qualities'] else None
-                video['subtitles'] = json.loads(video['subtitles']) if video['subtitles'] else None
-            else:
-                video['url'] = None
-                video['qualities'] = None
-                video['subtitles'] = None
+        _attach_video_urls(videos, has_event_access(user_id, event_id))
     
     return videos
 
+def _attach_video_urls(videos, has_access):
+    for video in videos:
+        if has_access:
+            video['url'] = get_secure_file_url(video['file_path'], expires=timedelta(hours=1))
+            video['qualities'] = json.loads(video['qualities']) if video['qualities'] else None
+            video['subtitles'] = json.loads(video['subtitles']) if video['subtitles'] else None
+        else:
+            video['url'] = None
+            video['qualities'] = None
+            video['subtitles'] = None
+
 def add_merchandise_to_event(event_id, name, description, price, stock_quantity, image_data, image_name):
     image_path = upload_file(image_data, image_name, bucket_name="merchandise")
     if not image_path:
@@ -139,6 +123,7 @@ def add_merchandise_to_event(event_id, name, description, price, stock_quantity,
     """
     params = (event_id, name, description, price, stock_quantity, image_path)
     result = execute_query(query, params)
+    invalidate_event_cache(event_id)
     return result is not None
 
 def update_merchandise(merchandise_id, name, description, price, stock_quantity):
@@ -149,25 +134,35 @@ def update_merchandise(merchandise_id, name, description, price, stock_quantity)
     """
     params = (name, description, price, stock_quantity, merchandise_id)
     result = execute_query(query, params)
+    invalidate_event_cache(_get_merchandise_event_id(merchandise_id))
     return result is not None
 
 def delete_merchandise(merchandise_id):
+    event_id = _get_merchandise_event_id(merchandise_id)
     query = "DELETE FROM merchandise WHERE id = %s"
     params = (merchandise_id,)
     result = execute_query(query, params)
+    invalidate_event_cache(event_id)
     return result is not None
 
+def _get_merchandise_event_id(merchandise_id):
+    result = execute_query("SELECT event_id FROM merchandise WHERE id = %s", (merchandise_id,))
+    return result[0]['event_id'] if result else None
+
 def get_merchandise_by_event(event_id):
     query = "SELECT * FROM merchandise WHERE event_id = %s"
     params = (event_id,)
     merchandise = execute_query(query, params)
     
     if merchandise:
-        for item in merchandise:
-            item['image_url'] = get_file_url(item['image_path'], bucket_name="merchandise")
+        _attach_image_urls(merchandise)
     
     return merchandise
 
+def _attach_image_urls(merchandise):
+    for item in merchandise:
+        item['image_url'] = get_file_url(item['image_path'], bucket_name="merchandise")
+
 def get_merchandise_details(merchandise_id):
     query = "SELECT * FROM merchandise WHERE id = %s"
     params = (merchandise_id,)
@@ -178,43 +173,13 @@ def get_merchandise_details(merchandise_id):
         return item
     return None
 
-def get_event_details(event_id, user_id=None):
-    query = "SELECT * FROM events WHERE id = %s"
-    params = (event_id,)
-    event = execute_query(query, params)
-    
-    if event:
-        event = event[0]
-        event['start_time'] = pytz.utc.localize(event['start_time'])
-        event['end_time'] = pytz.utc.localize(event['end_time'])
-        event['videos'] = get_videos_by_event(event_id, user_id)
-        event['merchandise'] = get_merchandise_by_event(event_id)
-        event['page_blocks'] = get_page_blocks(event_id)
-        event['comments'] = get_comments(event_id)
-        event['categories'] = get_event_categories(event_id)
-        event['tags'] = get_event_tags(event_id)
-        if user_id:
-            event['user_rating'] = get_user_rating(user_id, event_id)
-            # Track the event view
-            track_event_view(event_id, user_id)
-    
-    return event
-
-def get_page_blocks(event_id):
-    query = """
+PAGE_BLOCKS_QUERY = """
     SELECT * FROM page_blocks WHERE event_id = %s ORDER BY order_index
     """
-    params = (event_id,)
-    return execute_query(query, params)
 
-def has_event_access(user_id, event_id):
-    query = """
-    SELECT * FROM event_access
-    WHERE user_id = %s AND event_id = %s
-    """
-    params = (user_id, event_id)
-    result = execute_query(query, params)
-    return len(result) > 0
+def get_page_blocks(event_id):
+    params = (event_id,)
+    return execute_query(PAGE_BLOCKS_QUERY, params)
 
 def get_all_categories():
     query = "SELECT * FROM categories"
@@ -223,12 +188,26 @@ def get_all_categories():
 def add_category(name):
     query = "INSERT INTO categories (name) VALUES (%s)"
     params = (name,)
-    return execute_query(query, params)
+    result = execute_query(query, params)
+    invalidate_reference_data('categories')
+    return result
 
 def add_event_category(event_id, category_id):
     query = "INSERT INTO event_categories (event_id, category_id) VALUES (%s, %s)"
     params = (event_id, category_id)
-    return execute_query(query, params)
+    result = execute_query(query, params)
+    invalidate_event_cache(event_id)
+    return result
+
+def add_event_categories(event_id, category_ids, tx=None):
+    query = "INSERT INTO event_categories (event_id, category_id) VALUES (%s, %s)"
+    rows = [(event_id, category_id) for category_id in dict.fromkeys(category_ids)]
+    if tx:
+        # The caller invalidates once the transaction commits
+        return tx.execute_many(query, rows)
+    result = execute_many(query, rows)
+    invalidate_event_cache(event_id)
+    return result
 
 def get_event_categories(event_id):
     query = """
@@ -243,7 +222,9 @@ def get_event_categories(event_id):
 def remove_event_category(event_id, category_id):
     query = "DELETE FROM event_categories WHERE event_id = %s AND category_id = %s"
     params = (event_id, category_id)
-    return execute_query(query, params)
+    result = execute_query(query, params)
+    invalidate_event_cache(event_id)
+    return result
 
 # Add these new functions
 
@@ -254,12 +235,26 @@ def get_all_tags():
 def add_tag(name):
     query = "INSERT INTO tags (name) VALUES (%s)"
     params = (name,)
-    return execute_query(query, params)
+    result = execute_query(query, params)
+    invalidate_reference_data('tags')
+    return result
 
 def add_event_tag(event_id, tag_id):
     query = "INSERT INTO event_tags (event_id, tag_id) VALUES (%s, %s)"
     params = (event_id, tag_id)
-    return execute_query(query, params)
+    result = execute_query(query, params)
+    invalidate_event_cache(event_id)
+    return result
+
+def add_event_tags(event_id, tag_ids, tx=None):
+    query = "INSERT INTO event_tags (event_id, tag_id) VALUES (%s, %s)"
+    rows = [(event_id, tag_id) for tag_id in dict.fromkeys(tag_ids)]
+    if tx:
+        # The caller invalidates once the transaction commits
+        return tx.execute_many(query, rows)
+    result = execute_many(query, rows)
+    invalidate_event_cache(event_id)
+    return result
 
 def get_event_tags(event_id):
     query = """
@@ -271,10 +266,34 @@ def get_event_tags(event_id):
     params = (event_id,)
     return execute_query(query, params)
 
+def get_categories_and_tags_by_event(event_ids):
+    # Categories and tags of many events in one query:
+    # {event_id: {'categories': [{'id', 'name'}, ...], 'tags': [...]}}
+    labels = {event_id: {'categories': [], 'tags': []} for event_id in event_ids}
+    if not labels:
+        return labels
+    query = """
+    SELECT 'categories' AS kind, ec.event_id, c.id, c.name
+    FROM categories c
+    JOIN event_categories ec ON c.id = ec.category_id
+    WHERE ec.event_id IN %s
+    UNION ALL
+    SELECT 'tags' AS kind, et.event_id, t.id, t.name
+    FROM tags t
+    JOIN event_tags et ON t.id = et.tag_id
+    WHERE et.event_id IN %s
+    """
+    event_ids = tuple(labels)
+    for row in execute_query(query, (event_ids, event_ids)) or []:
+        labels[row['event_id']][row['kind']].append({'id': row['id'], 'name': row['name']})
+    return labels
+
 def remove_event_tag(event_id, tag_id):
     query = "DELETE FROM event_tags WHERE event_id = %s AND tag_id = %s"
     params = (event_id, tag_id)
-    return execute_query(query, params)
+    result = execute_query(query, params)
+    invalidate_event_cache(event_id)
+    return result
 
 # Update the create_event function
 def create_event(content_provider_id, title, description, start_time, end_time, price, categories, tags):
@@ -283,19 +302,31 @@ def create_event(content_provider_id, title, description, start_time, end_time,
     VALUES (%s, %s, %s, %s, %s, %s, %s)
     """
     params = (content_provider_id, title, description, start_time, end_time, price, False)
-    event_id = execute_query(query, params)
-    
-    if event_id:
-        for category_id in categories:
-            add_event_category(event_id, category_id)
-        
-        for tag_id in tags:
-            add_event_tag(event_id, tag_id)
-        
-        # Create notification for the new event
-        create_event_notification(event_id)
-    
-    return event_id is not None
+    try:
+        with transaction() as tx:
+            event_id = tx.execute(query, params)
+            add_event_categories(event_id, categories, tx)
+            add_event_tags(event_id, tags, tx)
+    except DatabaseError:
+        return False
+
+    # Create notification for the new event
+    create_event_notification(event_id)
+    return True
+
+def _sync_event_links(tx, event_id, table, column, requested):
+    # Makes the event's rows in an event_categories/event_tags style link table match
+    # `requested`, inserting and deleting only the ids that differ
+    rows = tx.execute(f"SELECT {column} FROM {table} WHERE event_id = %s FOR UPDATE", (event_id,))
+    current = {row[column] for row in rows}
+    requested = list(dict.fromkeys(requested or []))
+    removed = tuple(current.difference(requested))
+    added = [(event_id, link_id) for link_id in requested if link_id not in current]
+    if removed:
+        tx.execute(f"DELETE FROM {table} WHERE event_id = %s AND {column} IN %s", (event_id, removed))
+    if added:
+        tx.execute_many(f"INSERT INTO {table} (event_id, {column}) VALUES (%s, %s)", added)
+    return len(added), len(removed)
 
 # Update the update_event function
 def update_event(event_id, title, description, start_time, end_time, price, is_published, categories, tags):
@@ -305,50 +336,80 @@ def update_event(event_id, title, description, start_time, end_time, price, is_p
     WHERE id = %s
     """
     params = (title, description, start_time, end_time, price, is_published, event_id)
-    result = execute_query(query, params)
-    
-    if result:
-        # Remove existing categories and tags
-        execute_query("DELETE FROM event_categories WHERE event_id = %s", (event_id,))
-        execute_query("DELETE FROM event_tags WHERE event_id = %s", (event_id,))
-        
-        # Add new categories and tags
-        for category_id in categories:
-            add_event_category(event_id, category_id)
-        for tag_id in tags:
-            add_event_tag(event_id, tag_id)
-        
-        # Publish message for analytics update
-        message = json.dumps({
-            "event_id": event_id,
-            "action": "update",
-            "is_published": is_published
-        })
-        publish_message("analytics.event_update", message)
-    
-    return result is not None
+    try:
+        # One transaction so readers never see a half-updated category/tag set
+        with transaction() as tx:
+            tx.execute(query, params)
+            _sync_event_links(tx, event_id, "event_categories", "category_id", categories)
+            _sync_event_links(tx, event_id, "event_tags", "tag_id", tags)
+    except DatabaseError:
+        return False
+    invalidate_event_cache(event_id)
+    invalidate_reference_data('providers')
+    publish_event_update(event_id, "update", is_published)
+    return True
+
+def _load_public_event(event_id):
+    # Everything on the landing page that is the same for every viewer, fetched in a single
+    # multi-statement round-trip
+    results = execute_multi([
+        ("SELECT * FROM events WHERE id = %s", (event_id,)),
+        ("SELECT * FROM videos WHERE event_id = %s", (event_id,)),
+        ("SELECT * FROM merchandise WHERE event_id = %s", (event_id,)),
+        ("SELECT * FROM page_blocks WHERE event_id = %s ORDER BY order_index", (event_id,)),
+        ("""
+        SELECT c.id, c.content, c.created_at, u.username
+        FROM comments c
+        JOIN users u ON c.user_id = u.id
+        WHERE c.event_id = %s
+        ORDER BY c.created_at DESC
+        LIMIT %s
+        """, (event_id, COMMENTS_PAGE_SIZE)),
+        ("""
+        SELECT 'category' AS kind, c.id, c.name
+        FROM categories c
+        JOIN event_categories ec ON c.id = ec.category_id
+        WHERE ec.event_id = %s
+        UNION ALL
+        SELECT 'tag' AS kind, t.id, t.name
+        FROM tags t
+        JOIN event_tags et ON t.id = et.tag_id
+        WHERE et.event_id = %s
+        """, (event_id, event_id)),
+    ])
+    if not results or not results[0]:
+        return None
+
+    event, videos, merchandise, page_blocks, comments, labels = results
+    event = event[0]
+    event['start_time'] = pytz.utc.localize(event['start_time'])
+    event['end_time'] = pytz.utc.localize(event['end_time'])
+    _attach_image_urls(merchandise)
+    event['videos'] = videos
+    event['merchandise'] = merchandise
+    event['page_blocks'] = page_blocks
+    event['comments'] = comments
+    event['categories'] = [{'id': row['id'], 'name': row['name']} for row in labels if row['kind'] == 'category']
+    event['tags'] = [{'id': row['id'], 'name': row['name']} for row in labels if row['kind'] == 'tag']
+    return event
+
+def invalidate_event_cache(event_id):
+    _event_cache.invalidate(event_id)
 
-# Update the get_event_details function
 def get_event_details(event_id, user_id=None):
-    query = "SELECT * FROM events WHERE id = %s"
-    params = (event_id,)
-    event = execute_query(query, params)
-    
-    if event:
-        event = event[0]
-        event['start_time'] = pytz.utc.localize(event['start_time'])
-        event['end_time'] = pytz.utc.localize(event['end_time'])
-        event['videos'] = get_videos_by_event(event_id, user_id)
-        event['merchandise'] = get_merchandise_by_event(event_id)
-        event['page_blocks'] = get_page_blocks(event_id)
-        event['comments'] = get_comments(event_id)
-        event['categories'] = get_event_categories(event_id)
-        event['tags'] = get_event_tags(event_id)
-        if user_id:
-            event['user_rating'] = get_user_rating(user_id, event_id)
-            # Track the event view
-            track_event_view(event_id, user_id)
-    
+    # The shared part comes from the event cache; the viewer's rating and access-dependent
+    # video URLs are layered onto a copy and never stored in it
+    cached = _event_cache.get_or_load(event_id, _load_public_event)
+    if not cached:
+        return None
+
+    event = dict(cached)
+    if user_id:
+        event['user_rating'] = get_user_rating(user_id, event_id)
+        track_event_view(event_id, user_id)
+
+    event['videos'] = [dict(video) for video in cached['videos']]
+    _attach_video_urls(event['videos'], has_event_access(user_id, event_id))
     return event
 
 def add_comment(user_id, event_id, content):
@@ -357,39 +418,89 @@ def add_comment(user_id, event_id, content):
     VALUES (%s, %s, %s)
     """
     params = (user_id, event_id, content)
-    return execute_query(query, params)
+    result = execute_query(query, params)
+    invalidate_event_cache(event_id)
+    return result
 
-def get_comments(event_id):
-    query = """
+COMMENTS_QUERY = """
     SELECT c.id, c.content, c.created_at, u.username
     FROM comments c
     JOIN users u ON c.user_id = u.id
     WHERE c.event_id = %s
     ORDER BY c.created_at DESC
     """
+
+def get_comments(event_id):
     params = (event_id,)
-    return execute_query(query, params)
+    return execute_query(COMMENTS_QUERY, params)
 
 def add_rating(user_id, event_id, rating):
+    try:
+        with transaction() as tx:
+            # Locks the user's existing rating (or the gap where it would go) so the
+            # delta below is computed against the value being replaced
+            previous = tx.execute(
+                "SELECT rating FROM ratings WHERE user_id = %s AND event_id = %s FOR UPDATE",
+                (user_id, event_id)
+            )
+            query = """
+            INSERT INTO ratings (user_id, event_id, rating)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE rating = VALUES(rating)
+            """
+            tx.execute(query, (user_id, event_id, rating))
+
+            if previous:
+                sum_delta, count_delta = rating - previous[0]['rating'], 0
+            else:
+                sum_delta, count_delta = rating, 1
+            # average_rating is assigned first so it reads the pre-update sum and count on
+            # every backend (MySQL evaluates single-table assignments left to right). A count
+            # that has drifted to zero gives 0 until the reconcile job corrects it, rather than
+            # a division by zero.
+            query = """
+            UPDATE events
+            SET average_rating = COALESCE((rating_sum + %s) * 1.0 / NULLIF(total_ratings + %s, 0), 0),
+                rating_sum = rating_sum + %s,
+                total_ratings = total_ratings + %s
+            WHERE id = %s
+            """
+            tx.execute(query, (sum_delta, count_delta, sum_delta, count_delta, event_id))
+    except DatabaseError:
+        return False
+    invalidate_event_cache(event_id)
+    # The search index keeps each event's rating aggregates for its rating sorts
+    publish_event_update(event_id, "rating", None)
+    return True
+
+def reconcile_rating_aggregates(batch_size=500):
+    # Recomputes the stored aggregates of events whose running sum or count has drifted
+    # from the ratings table; returns the ids that were corrected
     query = """
-    INSERT INTO ratings (user_id, event_id, rating)
-    VALUES (%s, %s, %s)
-    ON DUPLICATE KEY UPDATE rating = VALUES(rating)
+    SELECT e.id
+    FROM events e
+    LEFT JOIN (
+        SELECT event_id, SUM(rating) AS rating_sum, COUNT(*) AS total_ratings
+        FROM ratings GROUP BY event_id
+    ) r ON r.event_id = e.id
+    WHERE e.rating_sum <> COALESCE(r.rating_sum, 0) OR e.total_ratings <> COALESCE(r.total_ratings, 0)
     """
-    params = (user_id, event_id, rating)
-    result = execute_query(query, params)
-    
-    if result:
-        # Update average rating and total ratings for the event
+    drifted = [row['id'] for row in execute_query(query) or []]
+    for i in range(0, len(drifted), batch_size):
         query = """
-        UPDATE events e
-        SET average_rating = (SELECT AVG(rating) FROM ratings WHERE event_id = e.id),
-            total_ratings = (SELECT COUNT(*) FROM ratings WHERE event_id = e.id)
-        WHERE e.id = %s
+        UPDATE events
+        SET rating_sum = COALESCE((SELECT SUM(rating) FROM ratings WHERE event_id = events.id), 0),
+            total_ratings = (SELECT COUNT(*) FROM ratings WHERE event_id = events.id),
+            average_rating = COALESCE((SELECT AVG(rating) FROM ratings WHERE event_id = events.id), 0)
+        WHERE id IN %s
         """
-        execute_query(query, (event_id,))
-    
-    return result
+        execute_query(query, (tuple(drifted[i:i + batch_size]),))
+    for event_id in drifted:
+        invalidate_event_cache(event_id)
+        publish_event_update(event_id, "rating", None)
+    if drifted:
+        logger.warning(f"Reconciled rating aggregates for {len(drifted)} event(s)")
+    return drifted
 
 def get_user_rating(user_id, event_id):
     query = """
@@ -401,18 +512,5 @@ def get_user_rating(user_id, event_id):
     return result[0]['rating'] if result else None
 
 def track_event_view(event_id, user_id):
-    query = """
-    INSERT INTO event_views (event_id, user_id, timestamp)
-    VALUES (%s, %s, NOW())
-    """
-    params = (event_id, user_id)
-    return execute_query(query, params)
-
-def user_has_event_access(user_id, event_id):
-    query = """
-    SELECT * FROM event_access
-    WHERE user_id = %s AND event_id = %s
-    """
-    params = (user_id, event_id)
-    result = execute_query(query, params)
-    return len(result) > 0
+    # Buffered and bulk-written in the background so the page never waits on the insert
+    return record_event_view(event_id, user_id)
@@ -1,6 +1,7 @@
-from app.database.db import execute_query
+from app.database.db import execute_query, transaction, DatabaseError
 from app.storage.minio_client import upload_file, get_file_url
 from app.landing_page.templates import get_template
+from app.events.event_management import invalidate_event_cache, PAGE_BLOCKS_QUERY
 import json
 
 def create_page_block(event_id, block_type, content, order_index, styles=None):
@@ -10,29 +11,57 @@ def create_page_block(event_id, block_type, content, order_index, styles=None):
     """
     params = (event_id, block_type, content, order_index, json.dumps(styles))
     result = execute_query(query, params)
+    invalidate_event_cache(event_id)
     return result is not None
 
 def get_page_blocks(event_id):
-    query = """
-    SELECT * FROM page_blocks WHERE event_id = %s ORDER BY order_index
-    """
     params = (event_id,)
-    return execute_query(query, params)
+    return execute_query(PAGE_BLOCKS_QUERY, params)
 
 def update_page_block(block_id, content, order_index, styles=None):
-    query = """
-    UPDATE page_blocks SET content = %s, order_index = %s, styles = %s WHERE id = %s
-    """
-    params = (content, order_index, json.dumps(styles), block_id)
-    result = execute_query(query, params)
-    return result is not None
+    try:
+        with transaction() as tx:
+            blocks = tx.execute("""
+            SELECT id, event_id, order_index FROM page_blocks
+            WHERE event_id = (SELECT event_id FROM page_blocks WHERE id = %s)
+            ORDER BY order_index, id
+            FOR UPDATE
+            """, (block_id,))
+            if not blocks:
+                return False
+            query = "UPDATE page_blocks SET content = %s, styles = %s WHERE id = %s"
+            tx.execute(query, (content, json.dumps(styles), block_id))
+
+            # The order field is the block's position: it is moved there and the event's
+            # blocks are renumbered 0..n-1, so indexes never collide or leave gaps
+            ordered_ids = [block['id'] for block in blocks if block['id'] != block_id]
+            ordered_ids.insert(min(max(order_index, 0), len(ordered_ids)), block_id)
+            _apply_block_order(tx, blocks, ordered_ids)
+    except DatabaseError:
+        return False
+    invalidate_event_cache(blocks[0]['event_id'])
+    return True
+
+def _apply_block_order(tx, blocks, ordered_ids):
+    # Writes order_index only for the blocks whose position actually changed
+    current = {block['id']: block['order_index'] for block in blocks}
+    changed = [(index, block_id) for index, block_id in enumerate(ordered_ids) if current.get(block_id) != index]
+    if changed:
+        tx.execute_many("UPDATE page_blocks SET order_index = %s WHERE id = %s", changed)
+    return len(changed)
 
 def delete_page_block(block_id):
+    event_id = _get_block_event_id(block_id)
     query = "DELETE FROM page_blocks WHERE id = %s"
     params = (block_id,)
     result = execute_query(query, params)
+    invalidate_event_cache(event_id)
     return result is not None
 
+def _get_block_event_id(block_id):
+    result = execute_query("SELECT event_id FROM page_blocks WHERE id = %s", (block_id,))
+    return result[0]['event_id'] if result else None
+
 def upload_image(file_data, file_name):
     file_path = upload_file(file_data, file_name, bucket_name="landing_page_images")
     if file_path:
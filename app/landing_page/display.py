@@ -1,6 +1,7 @@
 import streamlit as st
 import json
-from app.events.event_management import get_event_details, user_has_event_access, get_merchandise_details, add_comment, add_rating
+from app.events.event_management import get_event_details, get_merchandise_details, add_comment, add_rating
+from app.payments.entitlements import has_event_access
 from app.payments.stripe_integration import create_merchandise_checkout_session, create_checkout_session
 from app.components.video_player import custom_video_player, get_video_qualities
 from app.utils.social_sharing import get_social_share_urls
@@ -93,7 +94,7 @@ def display_landing_page(event_id):
             if st.button(button_data['text']):
                 st.markdown(f"[{button_data['text']}]({button_data['url']})")
 
-    if user_role in ['admin', 'content_manager'] or (user_id and user_has_event_access(user_id, event_id)):
+    if user_role in ['admin', 'content_manager'] or has_event_access(user_id, event_id):
         st.subheader("Event Content")
         st.write("You have access to this event. Enjoy the content!")
 
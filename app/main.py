@@ -21,11 +21,12 @@ from recommendations.recommendation_engine import get_recommended_events
 from analytics.dashboard import analytics_dashboard
 from notifications.notification_system import get_user_notifications, mark_notification_as_read, delete_notification
 from tasks.notification_tasks import start_notification_scheduler
+from tasks.rating_tasks import schedule_rating_reconciliation
 from user.dashboard import user_dashboard
 from datetime import datetime, timedelta
 import asyncio
 import logging
-from prometheus_client import Counter, Histogram, CollectorRegistry, generate_latest
+from prometheus_client import generate_latest
 import time
 from utils.custom_css import get_custom_css
 from content.faq import get_faq_content
@@ -36,21 +37,22 @@ from utils.sitemap_generator import generate_sitemap
 from feedback.platform_feedback import platform_feedback_page
 from admin.dashboard import admin_dashboard
 from app.api_docs import api_documentation
+# Prometheus metrics live in a shared registry so the DB layer and other modules can record to it
+from app.utils.metrics import REGISTRY, REQUEST_COUNT, REQUEST_LATENCY, start_metrics_server
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Set up Prometheus metrics
-REGISTRY = CollectorRegistry()
-REQUEST_COUNT = Counter('request_count', 'App Request Count', ['method', 'endpoint'], registry=REGISTRY)
-REQUEST_LATENCY = Histogram('request_latency_seconds', 'Request latency in seconds', ['method', 'endpoint'], registry=REGISTRY)
+# Expose Prometheus metrics over HTTP when METRICS_PORT is set
+start_metrics_server()
 
 # Initialize NATS
 asyncio.run(initialize_nats())
 
 # Start the notification scheduler
 start_notification_scheduler()
+schedule_rating_reconciliation()
 
 load_dotenv()
 
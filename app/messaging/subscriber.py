@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import threading
+from app.messaging.nats_client import NatsClient
+
+logger = logging.getLogger(__name__)
+
+# Long-lived subscriptions and periodic jobs share one event loop thread and NATS connection
+# per process. The shared nats_client is driven by short-lived asyncio.run() calls, which
+# cannot keep a subscription alive.
+_loop = None
+_client = None
+_connected = None
+_lock = threading.Lock()
+
+def _start():
+    global _loop, _client, _connected
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='nats-subscriber', daemon=True).start()
+            _client = NatsClient()
+            _connected = asyncio.run_coroutine_threadsafe(_client.connect(), loop)
+            _loop = loop
+    return _loop
+
+def subscribe(subject, handler):
+    # handler(message body) runs on the subscriber thread, one message at a time. The
+    # subscription is core NATS, so it sees only messages published from now on: a JetStream
+    # consumer would replay the subject's whole retained history on every start. Changes made
+    # while the process was down are picked up when its indexes are built or caught up.
+    loop = _start()
+
+    async def callback(msg):
+        try:
+            handler(msg.data.decode())
+        except Exception as e:
+            logger.error(f"Failed to handle {subject} message: {e}")
+
+    async def run():
+        await asyncio.wrap_future(_connected)
+        if _client.nc is None:
+            logger.error(f"Not subscribed to {subject}: no NATS connection")
+            return
+        try:
+            await _client.nc.subscribe(subject, cb=callback)
+        except Exception as e:
+            logger.error(f"Failed to subscribe to {subject}: {e}")
+
+    asyncio.run_coroutine_threadsafe(run(), loop)
+
+def run_periodically(interval, job):
+    # Runs job() every interval seconds on the subscriber thread, so never at the same time
+    # as a message handler
+    loop = _start()
+
+    async def run():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                job()
+            except Exception as e:
+                logger.error(f"Periodic job {getattr(job, '__name__', job)} failed: {e}")
+
+    asyncio.run_coroutine_threadsafe(run(), loop)
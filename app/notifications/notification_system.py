@@ -1,4 +1,4 @@
-from app.database.db import execute_query
+from app.database.db import execute_query, execute_many
 from datetime import datetime, timedelta
 
 def create_notification(user_id, message, notification_type, related_id=None):
@@ -9,15 +9,27 @@ def create_notification(user_id, message, notification_type, related_id=None):
     params = (user_id, message, notification_type, related_id, datetime.now(), False)
     return execute_query(query, params)
 
-def get_user_notifications(user_id, limit=10):
+def create_notifications(notifications):
+    # notifications: iterable of (user_id, message, notification_type, related_id)
     query = """
+    INSERT INTO notifications (user_id, message, notification_type, related_id, created_at, is_read)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    """
+    now = datetime.now()
+    rows = [(user_id, message, notification_type, related_id, now, False)
+            for user_id, message, notification_type, related_id in notifications]
+    return execute_many(query, rows)
+
+USER_NOTIFICATIONS_QUERY = """
     SELECT * FROM notifications
     WHERE user_id = %s
     ORDER BY created_at DESC
     LIMIT %s
     """
+
+def get_user_notifications(user_id, limit=10):
     params = (user_id, limit)
-    return execute_query(query, params)
+    return execute_query(USER_NOTIFICATIONS_QUERY, params)
 
 def mark_notification_as_read(notification_id):
     query = """
@@ -61,9 +73,11 @@ def create_upcoming_event_notifications():
     """
     events = execute_query(query)
     
-    for event in events:
-        message = f"Reminder: Event '{event['title']}' is starting soon on {event['start_time']}"
-        create_notification(event['user_id'], message, 'upcoming_event', event['id'])
+    notifications = [
+        (event['user_id'], f"Reminder: Event '{event['title']}' is starting soon on {event['start_time']}", 'upcoming_event', event['id'])
+        for event in events or []
+    ]
+    return create_notifications(notifications)
 
 def create_new_content_notification(video_id):
     query = """
@@ -77,6 +91,8 @@ def create_new_content_notification(video_id):
     params = (video_id,)
     results = execute_query(query, params)
     
-    for result in results:
-        message = f"New video '{result['title']}' added to event '{result['event_title']}'"
-        create_notification(result['user_id'], message, 'new_content', result['event_id'])
+    notifications = [
+        (result['user_id'], f"New video '{result['title']}' added to event '{result['event_title']}'", 'new_content', result['event_id'])
+        for result in results or []
+    ]
+    return create_notifications(notifications)
@@ -0,0 +1,37 @@
+import os
+from app.database.db import execute_query
+from app.utils.cache import TTLCache
+
+# Per-user set of event ids the user has bought access to. Every access check goes
+# through here; grant_event_access invalidates the user's entry straight away.
+ENTITLEMENT_CACHE_TTL = int(os.getenv('ENTITLEMENT_CACHE_TTL', 30))
+ENTITLEMENT_CACHE_SIZE = int(os.getenv('ENTITLEMENT_CACHE_SIZE', 10000))
+_entitlements = TTLCache(ENTITLEMENT_CACHE_SIZE, ENTITLEMENT_CACHE_TTL, name="entitlements")
+
+def _load_owned_event_ids(user_id):
+    query = "SELECT event_id FROM event_access WHERE user_id = %s"
+    result = execute_query(query, (user_id,))
+    if result is None:
+        return None
+    return frozenset(row['event_id'] for row in result)
+
+def get_owned_event_ids(user_id):
+    if not user_id:
+        return frozenset()
+    return _entitlements.get_or_load(user_id, _load_owned_event_ids) or frozenset()
+
+def has_event_access(user_id, event_id):
+    return event_id in get_owned_event_ids(user_id)
+
+def grant_event_access(user_id, event_id):
+    query = """
+    INSERT INTO event_access (user_id, event_id, access_granted_at)
+    VALUES (%s, %s, NOW())
+    """
+    params = (user_id, event_id)
+    result = execute_query(query, params)
+    invalidate_entitlements(user_id)
+    return result is not None
+
+def invalidate_entitlements(user_id):
+    _entitlements.invalidate(user_id)
@@ -1,5 +1,6 @@
 import stripe
 from app.database.db import execute_query
+from app.payments.entitlements import grant_event_access, has_event_access
 import os
 from dotenv import load_dotenv
 
@@ -51,24 +52,6 @@ def handle_successful_payment(session_id):
         print(f"Error handling successful payment: {e}")
         return False
 
-def grant_event_access(user_id, event_id):
-    query = """
-    INSERT INTO event_access (user_id, event_id, access_granted_at)
-    VALUES (%s, %s, NOW())
-    """
-    params = (user_id, event_id)
-    result = execute_query(query, params)
-    return result is not None
-
-def has_event_access(user_id, event_id):
-    query = """
-    SELECT * FROM event_access
-    WHERE user_id = %s AND event_id = %s
-    """
-    params = (user_id, event_id)
-    result = execute_query(query, params)
-    return len(result) > 0
-
 def get_event_details(event_id):
     query = "SELECT * FROM events WHERE id = %s"
     params = (event_id,)
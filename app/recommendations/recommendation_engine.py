@@ -2,16 +2,6 @@ from app.database.db import execute_query
 from collections import Counter
 import random
 
-def get_user_viewed_events(user_id):
-    query = """
-    SELECT DISTINCT e.id, e.title, e.description, e.content_provider_id
-    FROM events e
-    JOIN event_access ea ON e.id = ea.event_id
-    WHERE ea.user_id = %s
-    """
-    params = (user_id,)
-    return execute_query(query, params)
-
 def get_event_categories(event_id):
     query = """
     SELECT c.id, c.name
@@ -22,61 +12,80 @@ def get_event_categories(event_id):
     params = (event_id,)
     return execute_query(query, params)
 
-def get_similar_events(event_id, limit=5):
-    categories = get_event_categories(event_id)
-    category_ids = [cat['id'] for cat in categories]
-    
-    query = """
+SIMILAR_EVENTS_QUERY = """
     SELECT DISTINCT e.id, e.title, e.description
     FROM events e
     JOIN event_categories ec ON e.id = ec.event_id
     WHERE ec.category_id IN %s AND e.id != %s AND e.is_published = TRUE
     LIMIT %s
     """
+
+def get_similar_events(event_id, limit=5):
+    categories = get_event_categories(event_id)
+    category_ids = [cat['id'] for cat in categories]
+    
     params = (tuple(category_ids), event_id, limit)
-    return execute_query(query, params)
+    return execute_query(SIMILAR_EVENTS_QUERY, params)
+
+def get_user_affinity(user_id):
+    # How many of the user's events fall in each category and come from each provider, from
+    # one grouped query: {'category': {id: count}, 'provider': {id: count}}, or None if the
+    # query failed
+    query = """
+    SELECT 'category' AS kind, ec.category_id AS affinity_id, COUNT(*) AS weight
+    FROM event_access ea
+    JOIN event_categories ec ON ec.event_id = ea.event_id
+    WHERE ea.user_id = %s
+    GROUP BY ec.category_id
+    UNION ALL
+    SELECT 'provider', e.content_provider_id, COUNT(*)
+    FROM event_access ea
+    JOIN events e ON e.id = ea.event_id
+    WHERE ea.user_id = %s
+    GROUP BY e.content_provider_id
+    """
+    rows = execute_query(query, (user_id, user_id))
+    if rows is None:
+        return None
+    affinity = {'category': Counter(), 'provider': Counter()}
+    for row in rows:
+        affinity[row['kind']][row['affinity_id']] = row['weight']
+    return affinity
 
 def get_recommended_events(user_id, limit=5):
-    viewed_events = get_user_viewed_events(user_id)
-    
-    if not viewed_events:
+    affinity = get_user_affinity(user_id)
+
+    if not affinity or not affinity['provider']:
         # If the user hasn't viewed any events, return random popular events
         return get_popular_events(limit)
-    
-    # Count categories and content providers from viewed events
-    category_counter = Counter()
-    provider_counter = Counter()
-    
-    for event in viewed_events:
-        categories = get_event_categories(event['id'])
-        for category in categories:
-            category_counter[category['id']] += 1
-        provider_counter[event['content_provider_id']] += 1
-    
+
     # Get top categories and providers
-    top_categories = [cat for cat, _ in category_counter.most_common(3)]
-    top_providers = [prov for prov, _ in provider_counter.most_common(2)]
-    
-    # Get recommended events based on top categories and providers
+    top_categories = [cat for cat, _ in affinity['category'].most_common(3)]
+    top_providers = [prov for prov, _ in affinity['provider'].most_common(2)]
+    if not top_categories:
+        return get_popular_events(limit)
+
+    # Get recommended events based on top categories and providers. The user's own events are
+    # left out by an anti-join on event_access's (user_id, event_id) key rather than a NOT IN
+    # list that grows with every purchase.
     query = """
     SELECT DISTINCT e.id, e.title, e.description
     FROM events e
     JOIN event_categories ec ON e.id = ec.event_id
     WHERE ec.category_id IN %s
     AND e.content_provider_id IN %s
-    AND e.id NOT IN %s
+    AND NOT EXISTS (SELECT 1 FROM event_access ea WHERE ea.user_id = %s AND ea.event_id = e.id)
     AND e.is_published = TRUE
     LIMIT %s
     """
-    viewed_event_ids = tuple(event['id'] for event in viewed_events)
-    params = (tuple(top_categories), tuple(top_providers), viewed_event_ids, limit)
-    recommended_events = execute_query(query, params)
-    
+    params = (tuple(top_categories), tuple(top_providers), user_id, limit)
+    recommended_events = execute_query(query, params) or []
+
     # If we don't have enough recommendations, add some popular events
     if len(recommended_events) < limit:
         popular_events = get_popular_events(limit - len(recommended_events))
-        recommended_events.extend(popular_events)
-    
+        recommended_events.extend(popular_events or [])
+
     return recommended_events
 
 def get_popular_events(limit=5):
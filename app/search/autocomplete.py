@@ -0,0 +1,293 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import numpy as np
+from app.database.db import execute_query, stream_query
+from app.messaging.subscriber import subscribe, run_periodically
+from app.search.event_index import load_event_documents
+
+logger = logging.getLogger(__name__)
+
+# Typeahead for the event browser's search box: completions of event titles, category and
+# tag names and provider usernames, most popular first. An event's popularity is its number
+# of event_access grants; a category's, tag's or provider's is the sum over its events.
+#
+# Entries live in one array sorted by normalised text, so the completions of a prefix are a
+# contiguous range found by bisection. Ranges of more than HEAVY_RANGE entries have their
+# best CACHED_COMPLETIONS precomputed; smaller ones are ranked when asked. Changes go to a
+# small pending set that queries merge in, and are folded into the arrays by a rebuild once
+# there are REBUILD_PENDING of them.
+HEAVY_RANGE = 256
+CACHED_COMPLETIONS = 32
+REBUILD_PENDING = 500
+# Seconds between full reloads, which bring the popularity weights up to date
+AUTOCOMPLETE_REFRESH_INTERVAL = int(os.getenv('AUTOCOMPLETE_REFRESH_INTERVAL', 3600))
+KINDS = ('event', 'category', 'tag', 'provider')
+# Entry codes are the kind's index above 40 bits of id
+ID_MASK = (1 << 40) - 1
+# Sorts after every character, for the upper end of a prefix range
+MAX_CHAR = '\U0010ffff'
+
+def normalize(text):
+    return " ".join(text.lower().split()) if text else ""
+
+def _code(kind, entry_id):
+    return KINDS.index(kind) << 40 | entry_id
+
+class _Segment:
+    # Entries sorted by key, with the cached completions of every large prefix range. Never
+    # changed once built; CompletionIndex replaces it on rebuild.
+    def __init__(self, entries):
+        # entries: {(kind, id): (text, weight)}
+        items = sorted((normalize(text), _code(kind, entry_id), text, weight)
+                       for (kind, entry_id), (text, weight) in entries.items())
+        self.keys = [item[0] for item in items]
+        self.texts = [item[2] for item in items]
+        self.codes = np.array([item[1] for item in items], dtype=np.int64)
+        self.weights = np.array([item[3] for item in items], dtype=np.float64)
+        self._by_code = np.argsort(self.codes, kind='stable')
+        self._sorted_codes = self.codes[self._by_code]
+        self.cached = self._cache_heavy_ranges()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def position(self, code):
+        i = np.searchsorted(self._sorted_codes, code)
+        if i < len(self._sorted_codes) and self._sorted_codes[i] == code:
+            return int(self._by_code[i])
+        return None
+
+    def range(self, key):
+        lo = bisect.bisect_left(self.keys, key)
+        return lo, bisect.bisect_left(self.keys, key + MAX_CHAR, lo)
+
+    def best(self, lo, hi, count):
+        # Positions in lo:hi with the highest weights, best first; ties in key order
+        weights = self.weights[lo:hi]
+        if hi - lo > count:
+            top = np.argpartition(-weights, count - 1)[:count]
+        else:
+            top = np.arange(hi - lo)
+        return (top[np.lexsort((top, -weights[top]))] + lo).tolist()
+
+    def _cache_heavy_ranges(self):
+        # Walks the implicit trie of the sorted keys: each range sharing a prefix of length
+        # depth splits by the character at depth, down to ranges of HEAVY_RANGE or fewer
+        cached = {}
+        keys = self.keys
+        stack = [(0, len(keys), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= HEAVY_RANGE:
+                continue
+            prefix = keys[lo][:depth]
+            cached[prefix] = self.best(lo, hi, CACHED_COMPLETIONS)
+            # Keys that end here sort first and have no children
+            i = lo
+            while i < hi and len(keys[i]) == depth:
+                i += 1
+            while i < hi:
+                end = bisect.bisect_left(keys, prefix + keys[i][depth] + MAX_CHAR, i, hi)
+                stack.append((i, end, depth + 1))
+                i = end
+        return cached
+
+class CompletionIndex:
+    def __init__(self, entries=None):
+        self._segment = _Segment(entries or {})
+        # (kind, id) -> (key, text, weight) added or changed since the last rebuild
+        self._pending = {}
+        # Codes of segment entries that were removed or replaced since
+        self._removed = set()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._segment) - len(self._removed) + len(self._pending)
+
+    def complete(self, prefix, limit=10):
+        # Up to limit completions of prefix as {'kind', 'id', 'text', 'weight'}, most popular
+        # first, with entries of the same kind and text listed once
+        key = normalize(prefix)
+        if not key:
+            return []
+        with self._lock:
+            segment = self._segment
+            pending = [(-weight, entry_key, kind, entry_id, text)
+                       for (kind, entry_id), (entry_key, text, weight) in self._pending.items()
+                       if entry_key.startswith(key)]
+            lo, hi = segment.range(key)
+            positions = segment.cached.get(key) or segment.best(lo, hi, CACHED_COMPLETIONS)
+            completions = self._merge(segment, positions, pending, limit)
+            if len(completions) < limit and len(positions) < hi - lo:
+                # Removed or duplicate entries crowded out the short list; rank the whole range
+                completions = self._merge(segment, segment.best(lo, hi, hi - lo), pending, limit)
+            return completions
+
+    def _merge(self, segment, positions, pending, limit):
+        # positions come best first, so only pending entries need sorting in
+        candidates = ((-segment.weights[position], segment.keys[position], KINDS[code >> 40], code & ID_MASK,
+                       segment.texts[position])
+                      for position, code in zip(positions, segment.codes[positions].tolist())
+                      if code not in self._removed)
+        if pending:
+            candidates = sorted(pending + list(candidates))
+        completions, seen = [], set()
+        for negative_weight, entry_key, kind, entry_id, text in candidates:
+            if (kind, entry_key) not in seen:
+                seen.add((kind, entry_key))
+                completions.append({'kind': kind, 'id': entry_id, 'text': text, 'weight': float(-negative_weight)})
+                if len(completions) == limit:
+                    break
+        return completions
+
+    def get(self, kind, entry_id):
+        # (text, weight) of an entry, or None
+        with self._lock:
+            if (kind, entry_id) in self._pending:
+                _, text, weight = self._pending[(kind, entry_id)]
+                return text, weight
+            code = _code(kind, entry_id)
+            position = self._segment.position(code)
+            if position is None or code in self._removed:
+                return None
+            return self._segment.texts[position], float(self._segment.weights[position])
+
+    def upsert(self, kind, entry_id, text, weight):
+        with self._write_lock:
+            with self._lock:
+                self._remove(kind, entry_id)
+                self._pending[(kind, entry_id)] = (normalize(text), text, weight)
+            self._maybe_rebuild()
+
+    def remove(self, kind, entry_id):
+        with self._write_lock:
+            with self._lock:
+                self._remove(kind, entry_id)
+            self._maybe_rebuild()
+
+    def _remove(self, kind, entry_id):
+        self._pending.pop((kind, entry_id), None)
+        code = _code(kind, entry_id)
+        if self._segment.position(code) is not None:
+            self._removed.add(code)
+
+    def _maybe_rebuild(self):
+        if len(self._pending) + len(self._removed) >= REBUILD_PENDING:
+            self._rebuild(self.entries())
+
+    def entries(self):
+        # {(kind, id): (text, weight)} of everything in the index
+        with self._lock:
+            segment = self._segment
+            entries = {}
+            for position, code in enumerate(segment.codes.tolist()):
+                if code not in self._removed:
+                    entries[(KINDS[code >> 40], code & ID_MASK)] = (segment.texts[position],
+                                                                          float(segment.weights[position]))
+            for entry, (_, text, weight) in self._pending.items():
+                entries[entry] = (text, weight)
+            return entries
+
+    def rebuild(self, entries=None):
+        # Replaces the contents with entries (by default the current ones, compacted)
+        with self._write_lock:
+            self._rebuild(self.entries() if entries is None else entries)
+
+    def _rebuild(self, entries):
+        # Built without holding _lock, so completions carry on meanwhile; writers wait on
+        # _write_lock, so nothing changes under it
+        segment = _Segment(entries)
+        with self._lock:
+            self._segment = segment
+            self._pending = {}
+            self._removed = set()
+
+_index = None
+_build_thread = None
+_build_lock = threading.Lock()
+
+def _add_weight(entries, kind, entry_id, text, weight):
+    _, total = entries.get((kind, entry_id), (text, 0))
+    entries[(kind, entry_id)] = (text, total + weight)
+
+def load_completion_entries():
+    # {(kind, id): (text, weight)} for every published event and the categories, tags and
+    # providers they use
+    accesses = {row['event_id']: row['accesses'] for row in stream_query(
+        "SELECT event_id, COUNT(*) AS accesses FROM event_access GROUP BY event_id", chunk_size=10000
+    )}
+    entries = {}
+    for doc in load_event_documents():
+        weight = accesses.get(doc['id'], 0)
+        entries[('event', doc['id'])] = (doc['title'], weight)
+        for kind, labels in (('category', doc['categories']), ('tag', doc['tags'])):
+            for label_id, name in labels.items():
+                _add_weight(entries, kind, label_id, name, weight)
+        _add_weight(entries, 'provider', doc['content_provider_id'], doc['content_provider_name'], weight)
+    return entries
+
+def _build():
+    # Changes made while the first build runs are picked up by the next refresh
+    global _index, _build_thread
+    try:
+        index = CompletionIndex(load_completion_entries())
+    except Exception as e:
+        logger.error(f"Failed to build autocomplete index: {e}")
+        _build_thread = None
+        return
+    logger.info(f"Built autocomplete index with {len(index)} entries")
+    _index = index
+    subscribe("analytics.event_update", apply_event_update)
+    run_periodically(AUTOCOMPLETE_REFRESH_INTERVAL, refresh)
+
+def get_completion_index():
+    # The process-wide index, or None while it is first built in the background
+    global _build_thread
+    if _index is None:
+        with _build_lock:
+            if _build_thread is None:
+                _build_thread = threading.Thread(target=_build, name='autocomplete-build', daemon=True)
+                _build_thread.start()
+    return _index
+
+def complete(prefix, limit=10):
+    # Completions for the search box; none until the index is ready
+    index = get_completion_index()
+    return index.complete(prefix, limit) if index is not None else []
+
+def refresh():
+    if _index is not None:
+        _index.rebuild(load_completion_entries())
+
+def apply_event_update(message):
+    # message: the JSON body of an analytics.event_update message. The event's entry is
+    # replaced; its labels and provider are added (or renamed) with their current weights.
+    data = json.loads(message)
+    index = _index
+    if index is None:
+        return
+    event_id = data['event_id']
+    docs = [] if data.get('action') == 'delete' else list(load_event_documents([event_id]))
+    if not docs:
+        index.remove('event', event_id)
+        return
+    doc = docs[0]
+    current = index.get('event', event_id)
+    if current is None:
+        result = execute_query("SELECT COUNT(*) AS accesses FROM event_access WHERE event_id = %s", (event_id,))
+        weight = result[0]['accesses'] if result else 0
+    else:
+        weight = current[1]
+    index.upsert('event', event_id, doc['title'], weight)
+    labels = [('category', label_id, name) for label_id, name in doc['categories'].items()]
+    labels += [('tag', label_id, name) for label_id, name in doc['tags'].items()]
+    labels.append(('provider', doc['content_provider_id'], doc['content_provider_name']))
+    for kind, entry_id, text in labels:
+        current = index.get(kind, entry_id)
+        if current is None or current[0] != text:
+            index.upsert(kind, entry_id, text, current[1] if current else 0)
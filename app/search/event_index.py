@@ -0,0 +1,162 @@
+import atexit
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from app.database.db import execute_query, stream_query
+from app.messaging.subscriber import subscribe, run_periodically
+from app.search.inverted_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+# The process-wide search index behind search_mode='index'. It is built from the database
+# (or loaded from SEARCH_INDEX_SNAPSHOT and caught up) on first use, then kept current
+# from analytics.event_update messages and caught up with the database periodically.
+SEARCH_INDEX_SNAPSHOT = os.getenv('SEARCH_INDEX_SNAPSHOT', '')
+# Seconds between snapshots while changes keep arriving
+SEARCH_INDEX_SNAPSHOT_INTERVAL = int(os.getenv('SEARCH_INDEX_SNAPSHOT_INTERVAL', 300))
+# Seconds between catch-ups with the database, which pick up any analytics.event_update
+# message this process missed
+SEARCH_INDEX_CATCH_UP_INTERVAL = int(os.getenv('SEARCH_INDEX_CATCH_UP_INTERVAL', 600))
+# Events updated this long before a snapshot was taken are re-read when loading it, to
+# cover changes still in flight at the time
+SNAPSHOT_CATCH_UP_MARGIN = timedelta(minutes=5)
+REINDEX_BATCH_SIZE = 500
+
+EVENT_DOCUMENTS_QUERY = """
+SELECT e.id, e.title, e.description, e.price, e.start_time, e.end_time,
+       e.average_rating, e.total_ratings, e.content_provider_id, u.username AS content_provider_name
+FROM events e
+JOIN users u ON e.content_provider_id = u.id
+WHERE {where}
+ORDER BY e.id
+"""
+EVENT_LABELS_QUERY = """
+SELECT ec.event_id, 'categories' AS kind, c.id, c.name
+FROM event_categories ec
+JOIN categories c ON ec.category_id = c.id
+JOIN events e ON ec.event_id = e.id
+WHERE {where}
+UNION ALL
+SELECT et.event_id, 'tags' AS kind, t.id, t.name
+FROM event_tags et
+JOIN tags t ON et.tag_id = t.id
+JOIN events e ON et.event_id = e.id
+WHERE {where}
+ORDER BY event_id
+"""
+
+_index = None
+_index_lock = threading.Lock()
+_updates_started = False
+_caught_up_at = None
+
+def load_event_documents(event_ids=None):
+    # Yields published events with their 'categories' and 'tags' ({id: name}). Events and
+    # labels are streamed in id order side by side, so memory stays flat at any catalog size.
+    where, params = "e.is_published = TRUE", ()
+    if event_ids is not None:
+        where, params = "e.is_published = TRUE AND e.id IN %s", (tuple(event_ids),)
+    labels = stream_query(EVENT_LABELS_QUERY.format(where=where), params * 2, chunk_size=10000)
+    label = next(labels, None)
+    for row in stream_query(EVENT_DOCUMENTS_QUERY.format(where=where), params, chunk_size=10000):
+        doc = dict(row, categories={}, tags={})
+        while label is not None and label['event_id'] <= row['id']:
+            if label['event_id'] == row['id']:
+                doc[label['kind']][label['id']] = label['name']
+            label = next(labels, None)
+        yield doc
+
+def reindex_events(index, event_ids):
+    # Re-reads the given events; those no longer published (or deleted) leave the index
+    event_ids = list(event_ids)
+    for start in range(0, len(event_ids), REINDEX_BATCH_SIZE):
+        batch = event_ids[start:start + REINDEX_BATCH_SIZE]
+        docs = {doc['id']: doc for doc in load_event_documents(batch)}
+        for event_id in batch:
+            if event_id in docs:
+                index.upsert(docs[event_id])
+            else:
+                index.remove(event_id)
+
+def catch_up(index, since):
+    # Brings a loaded snapshot up to date: drops events that were deleted or unpublished
+    # and re-reads those changed since the snapshot
+    published = {row['id'] for row in stream_query("SELECT id FROM events WHERE is_published = TRUE",
+                                                   chunk_size=10000)}
+    for event_id in index.event_ids():
+        if event_id not in published:
+            index.remove(event_id)
+    changed = execute_query(
+        "SELECT id FROM events WHERE is_published = TRUE AND updated_at >= %s", (since - SNAPSHOT_CATCH_UP_MARGIN,)
+    ) or []
+    event_ids = {row['id'] for row in changed} | {event_id for event_id in published if event_id not in index}
+    reindex_events(index, sorted(event_ids))
+
+def save_snapshot(index):
+    if not SEARCH_INDEX_SNAPSHOT:
+        return False
+    try:
+        index.save(SEARCH_INDEX_SNAPSHOT)
+    except OSError as e:
+        logger.error(f"Failed to write search index snapshot {SEARCH_INDEX_SNAPSHOT}: {e}")
+        return False
+    return True
+
+def _load_index():
+    if SEARCH_INDEX_SNAPSHOT and os.path.exists(SEARCH_INDEX_SNAPSHOT):
+        try:
+            index = SearchIndex.load(SEARCH_INDEX_SNAPSHOT)
+            catch_up(index, index.snapshot_at)
+            logger.info(f"Loaded search index snapshot with {len(index)} events")
+            return index
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Ignoring unreadable search index snapshot {SEARCH_INDEX_SNAPSHOT}: {e}")
+    index = SearchIndex.build(load_event_documents())
+    logger.info(f"Built search index with {len(index)} events")
+    save_snapshot(index)
+    return index
+
+def get_event_index():
+    global _index, _caught_up_at
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _caught_up_at = datetime.now()
+                _index = _load_index()
+                start_index_updates()
+    return _index
+
+def apply_event_update(message):
+    # message: the JSON body of an analytics.event_update message. Nothing to do until the
+    # index is first used, when it is built from the database.
+    data = json.loads(message)
+    index = _index
+    if index is None:
+        return
+    if data.get('action') == 'delete':
+        index.remove(data['event_id'])
+    else:
+        reindex_events(index, [data['event_id']])
+
+def _catch_up_periodically():
+    global _caught_up_at
+    started = datetime.now()
+    catch_up(_index, _caught_up_at)
+    _caught_up_at = started
+
+def _snapshot_if_changed():
+    if _index is not None and _index.changes:
+        save_snapshot(_index)
+
+def start_index_updates():
+    # Once per process; main.py is re-run by Streamlit on every interaction
+    global _updates_started
+    if not _updates_started:
+        _updates_started = True
+        subscribe("analytics.event_update", apply_event_update)
+        run_periodically(SEARCH_INDEX_CATCH_UP_INTERVAL, _catch_up_periodically)
+        if SEARCH_INDEX_SNAPSHOT:
+            run_periodically(SEARCH_INDEX_SNAPSHOT_INTERVAL, _snapshot_if_changed)
+        atexit.register(_snapshot_if_changed)
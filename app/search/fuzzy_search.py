@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import threading
+from app.database.db import execute_query, stream_query
+from app.messaging.subscriber import subscribe
+from app.search.trigram_index import TrigramIndex
+
+logger = logging.getLogger(__name__)
+
+# Typo-tolerant matching for advanced_search(fuzzy=True): trigram indexes over published
+# event titles and over the usernames of providers with published events. They are built
+# in the background on first use and kept current from analytics.event_update messages;
+# until they are ready the fuzzy functions return None and the search matches as usual.
+#
+# Defaults as in pg_trgm: word_similarity_threshold for titles, similarity_threshold for
+# usernames
+TITLE_SIMILARITY = float(os.getenv('FUZZY_TITLE_SIMILARITY', 0.6))
+PROVIDER_SIMILARITY = float(os.getenv('FUZZY_PROVIDER_SIMILARITY', 0.3))
+# Only the best matches become the search's IN list: those scoring at least this fraction
+# of the top match (so a correctly spelled name does not bring in its look-alikes), up to
+# a maximum count
+FUZZY_BEST_RATIO = 0.8
+FUZZY_MAX_EVENTS = int(os.getenv('FUZZY_MAX_EVENTS', 1000))
+FUZZY_MAX_PROVIDERS = 100
+
+EVENT_TITLES_QUERY = "SELECT e.id, e.title FROM events e WHERE e.is_published = TRUE"
+PROVIDER_NAMES_QUERY = """
+SELECT DISTINCT u.id, u.username
+FROM users u
+JOIN events e ON e.content_provider_id = u.id
+WHERE e.is_published = TRUE
+"""
+EVENT_QUERY = """
+SELECT e.id, e.title, u.id AS provider_id, u.username
+FROM events e
+JOIN users u ON e.content_provider_id = u.id
+WHERE e.id = %s AND e.is_published = TRUE
+"""
+
+_titles = None
+_providers = None
+_build_thread = None
+_build_lock = threading.Lock()
+
+def _build():
+    global _titles, _providers, _build_thread
+    try:
+        titles = TrigramIndex.build(((row['id'], row['title']) for row in
+                                     stream_query(EVENT_TITLES_QUERY, chunk_size=10000)), word_match=True)
+        providers = TrigramIndex.build((row['id'], row['username']) for row in
+                                       stream_query(PROVIDER_NAMES_QUERY, chunk_size=10000))
+    except Exception as e:
+        logger.error(f"Failed to build trigram indexes: {e}")
+        _build_thread = None
+        return
+    logger.info(f"Built trigram indexes for {len(titles)} events and {len(providers)} providers")
+    _titles, _providers = titles, providers
+    subscribe("analytics.event_update", apply_event_update)
+
+def _ready():
+    # True once the indexes are built; starts building them on first call
+    global _build_thread
+    if _titles is None:
+        with _build_lock:
+            if _build_thread is None:
+                _build_thread = threading.Thread(target=_build, name='trigram-build', daemon=True)
+                _build_thread.start()
+        return False
+    return True
+
+def _closest(matches):
+    if not matches:
+        return []
+    cutoff = matches[0][1] * FUZZY_BEST_RATIO
+    return [item_id for item_id, score in matches if score >= cutoff]
+
+def fuzzy_event_ids(text):
+    # Ids of the published events whose titles resemble text, best first, or None while the
+    # index is not ready
+    if not _ready():
+        return None
+    return _closest(_titles.search(text, TITLE_SIMILARITY, FUZZY_MAX_EVENTS))
+
+def fuzzy_provider_ids(name):
+    if not _ready():
+        return None
+    return _closest(_providers.search(name, PROVIDER_SIMILARITY, FUZZY_MAX_PROVIDERS))
+
+def apply_event_update(message):
+    # message: the JSON body of an analytics.event_update message
+    data = json.loads(message)
+    if _titles is None:
+        return
+    event_id = data['event_id']
+    rows = [] if data.get('action') == 'delete' else execute_query(EVENT_QUERY, (event_id,))
+    if rows is None:
+        logger.error(f"Trigram index not updated for event {event_id}: query failed")
+        return
+    if not rows:
+        _titles.remove(event_id)
+        return
+    row = rows[0]
+    _titles.add(event_id, row['title'])
+    if row['provider_id'] not in _providers:
+        _providers.add(row['provider_id'], row['username'])
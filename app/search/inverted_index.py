@@ -0,0 +1,568 @@
+import bisect
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from datetime import date, datetime
+import numpy as np
+
+# In-memory inverted index over published events. Documents live in dense slots 0..n-1;
+# per-slot attributes are numpy columns and every term, category and tag maps to a sorted
+# int32 array of slots. Filters become boolean masks over the slots, so a query is a
+# handful of vectorised operations whatever the size of the catalog.
+#
+# Text postings also carry term frequencies and their BM25 term weights ("impacts"),
+# precomputed at compaction so scoring a term is a single scatter-add. Changes go to a
+# small pending segment that is merged into the main arrays by compaction; removed and
+# replaced documents are only masked out until the next full compaction, so document
+# frequencies may briefly count them.
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Title words count this many times toward a document's term frequencies
+TITLE_WEIGHT = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Pending postings are merged once they exceed this fraction of the compacted ones ...
+COMPACT_PENDING_RATIO = 0.1
+COMPACT_PENDING_MIN = 50000
+# ... and removed slots are dropped once they make up this fraction of all slots
+COMPACT_DEAD_RATIO = 0.2
+# Results are picked from a list of the matching slots when fewer than 1/SPARSE_RATIO of
+# all slots match, otherwise straight from the full columns
+SPARSE_RATIO = 16
+SNAPSHOT_VERSION = 2
+
+COLUMNS = {
+    'event_id': np.int64,
+    'alive': np.bool_,
+    'price': np.float64,
+    'start_time': np.float64,
+    'end_time': np.float64,
+    'avg_rating': np.float32,
+    'rating_count': np.int32,
+    'provider': np.int64,
+    'length': np.float32,
+    'price_bucket': np.uint8,
+}
+SORT_COLUMNS = {
+    'start_time': 'start_time',
+    'price': 'price',
+    'avg_rating': 'avg_rating',
+    'rating_count': 'rating_count',
+    'total_ratings': 'rating_count',
+}
+# Upper bounds of the price facet's buckets; the last bucket is everything from the last bound up
+PRICE_FACET_BOUNDS = (25, 50, 100, 250, 500)
+# Sort key for events without a value (NULL start or end time), past every real value
+MISSING_KEY = 1e300
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def document_terms(doc):
+    terms = Counter()
+    for _ in range(TITLE_WEIGHT):
+        terms.update(tokenize(doc.get('title')))
+    terms.update(tokenize(doc.get('description')))
+    for name in list(doc.get('categories', {}).values()) + list(doc.get('tags', {}).values()):
+        terms.update(tokenize(name))
+    terms.update(tokenize(doc.get('content_provider_name')))
+    return terms
+
+def _timestamp(value):
+    if value is None:
+        return math.nan
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).timestamp()
+    return datetime.fromisoformat(str(value)).timestamp()
+
+def _top(keys, k):
+    # Positions of the k smallest keys, in order. Partitioning the values and then picking
+    # out the few at or under the k-th is much cheaper than argpartition on large arrays.
+    if k < len(keys):
+        threshold = np.partition(keys, k - 1)[k - 1]
+        candidates = np.flatnonzero(keys <= threshold)
+    else:
+        candidates = np.arange(len(keys))
+    return candidates[np.argsort(keys[candidates], kind='stable')][:k]
+
+def _first_matches(slots, mask, k):
+    # The first k of slots that are set in mask, scanning in growing chunks
+    found = []
+    count, start, chunk = 0, 0, max(1024, 4 * k)
+    while count < k and start < len(slots):
+        part = slots[start:start + chunk]
+        hits = part[mask[part]]
+        found.append(hits)
+        count += len(hits)
+        start += chunk
+        chunk *= 2
+    return np.concatenate(found)[:k] if found else np.zeros(0, dtype=np.int32)
+
+class _Postings:
+    # key -> sorted slot array (with term frequencies and impacts when with_freqs), plus
+    # lists of slots added since the last compaction
+    def __init__(self, with_freqs):
+        self.with_freqs = with_freqs
+        self.docs = {}
+        self.freqs = {}
+        self.impacts = {}
+        self.pending = {}
+        self.pending_count = 0
+        self.count = 0
+
+    def add(self, items, slot):
+        # items: (key, frequency) pairs of one document
+        pending = self.pending
+        count = 0
+        for key, freq in items:
+            entry = pending.get(key)
+            if entry is None:
+                entry = pending[key] = ([], [])
+            entry[0].append(slot)
+            entry[1].append(freq)
+            count += 1
+        self.pending_count += count
+
+    def get(self, key):
+        # All slots (and frequencies) of key, compacted and pending
+        docs = self.docs.get(key)
+        freqs = self.freqs.get(key)
+        pending = self.pending.get(key)
+        if pending:
+            extra_docs = np.array(pending[0], dtype=np.int32)
+            extra_freqs = np.minimum(pending[1], 65535).astype(np.uint16)
+            if docs is None:
+                docs, freqs = extra_docs, extra_freqs
+            else:
+                docs = np.concatenate((docs, extra_docs))
+                freqs = np.concatenate((freqs, extra_freqs)) if self.with_freqs else None
+        return docs, freqs
+
+    def keys(self):
+        return set(self.docs) | set(self.pending)
+
+    def compact(self, remap=None):
+        # Merges pending postings; with remap (old slot -> new slot, -1 for dropped) also
+        # renumbers every list. Impacts must be recomputed afterwards.
+        for key in self.keys():
+            docs, freqs = self.get(key)
+            if remap is not None:
+                docs = remap[docs]
+                keep = docs >= 0
+                docs = docs[keep]
+                freqs = freqs[keep] if self.with_freqs else None
+            if len(docs):
+                self.docs[key] = docs
+                if self.with_freqs:
+                    self.freqs[key] = freqs
+            else:
+                self.docs.pop(key, None)
+                self.freqs.pop(key, None)
+        self.pending = {}
+        self.pending_count = 0
+        self.count = sum(len(docs) for docs in self.docs.values())
+
+    def compute_impacts(self, weight):
+        self.impacts = {key: weight(self.docs[key], freqs) for key, freqs in self.freqs.items()}
+
+    def to_arrays(self, prefix, string_keys):
+        keys = sorted(self.docs)
+        lists = [self.docs[key] for key in keys]
+        arrays = {
+            f"{prefix}_offsets": np.cumsum([0] + [len(docs) for docs in lists], dtype=np.int64),
+            f"{prefix}_docs": np.concatenate(lists) if lists else np.zeros(0, dtype=np.int32),
+        }
+        if string_keys:
+            arrays[f"{prefix}_keys"] = np.frombuffer("\n".join(keys).encode(), dtype=np.uint8)
+        else:
+            arrays[f"{prefix}_keys"] = np.array(keys, dtype=np.int64)
+        if self.with_freqs:
+            arrays[f"{prefix}_freqs"] = (np.concatenate([self.freqs[key] for key in keys]) if keys
+                                         else np.zeros(0, dtype=np.uint16))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix, string_keys, with_freqs):
+        postings = cls(with_freqs)
+        if string_keys:
+            raw = arrays[f"{prefix}_keys"].tobytes().decode()
+            keys = raw.split("\n") if raw else []
+        else:
+            keys = arrays[f"{prefix}_keys"].tolist()
+        offsets = arrays[f"{prefix}_offsets"]
+        docs = arrays[f"{prefix}_docs"]
+        freqs = arrays[f"{prefix}_freqs"] if with_freqs else None
+        for i, key in enumerate(keys):
+            start, end = offsets[i], offsets[i + 1]
+            postings.docs[key] = docs[start:end]
+            if with_freqs:
+                postings.freqs[key] = freqs[start:end]
+        postings.count = len(docs)
+        return postings
+
+class SearchIndex:
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.snapshot_at = None
+        self.changes = 0
+        self.provider_names = {}
+        self._lock = threading.RLock()
+        self._size = 0
+        self._alive_count = 0
+        self._total_length = 0.0
+        self._columns = {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._slots = {}
+        self._terms = _Postings(with_freqs=True)
+        self._categories = _Postings(with_freqs=False)
+        self._tags = _Postings(with_freqs=False)
+        self._norm = None
+        self._orders = {}
+
+    @classmethod
+    def build(cls, docs, **kwargs):
+        index = cls(**kwargs)
+        for doc in docs:
+            index.upsert(doc, compact=False)
+        index.compact()
+        index.changes = 0
+        return index
+
+    def __len__(self):
+        return self._alive_count
+
+    def __contains__(self, event_id):
+        return event_id in self._slots
+
+    def event_ids(self):
+        with self._lock:
+            return list(self._slots)
+
+    def upsert(self, doc, compact=True):
+        # doc: event row with 'categories' and 'tags' dicts of id -> name
+        with self._lock:
+            self._remove(doc['id'])
+            slot = self._append_slot()
+            terms = document_terms(doc)
+            length = sum(terms.values())
+            values = {
+                'event_id': doc['id'],
+                'alive': True,
+                'price': float(doc.get('price') or 0),
+                'start_time': _timestamp(doc.get('start_time')),
+                'end_time': _timestamp(doc.get('end_time')),
+                'avg_rating': float(doc.get('average_rating') or 0),
+                'rating_count': int(doc.get('total_ratings') or 0),
+                'provider': doc.get('content_provider_id') or 0,
+                'length': length,
+                'price_bucket': bisect.bisect_right(PRICE_FACET_BOUNDS, float(doc.get('price') or 0)),
+            }
+            for name, value in values.items():
+                self._columns[name][slot] = value
+            self._terms.add(terms.items(), slot)
+            self._categories.add(((category_id, 1) for category_id in doc.get('categories', {})), slot)
+            self._tags.add(((tag_id, 1) for tag_id in doc.get('tags', {})), slot)
+            if doc.get('content_provider_name'):
+                self.provider_names[values['provider']] = doc['content_provider_name']
+            self._slots[doc['id']] = slot
+            self._alive_count += 1
+            self._total_length += length
+            self.changes += 1
+            if compact:
+                self._maybe_compact()
+
+    def remove(self, event_id):
+        with self._lock:
+            removed = self._remove(event_id)
+            if removed:
+                self.changes += 1
+                self._maybe_compact()
+            return removed
+
+    def _remove(self, event_id):
+        slot = self._slots.pop(event_id, None)
+        if slot is None:
+            return False
+        self._columns['alive'][slot] = False
+        self._alive_count -= 1
+        self._total_length -= float(self._columns['length'][slot])
+        return True
+
+    def _append_slot(self):
+        if self._size == len(self._columns['alive']):
+            capacity = max(1024, 2 * self._size)
+            for name, column in self._columns.items():
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:self._size] = column[:self._size]
+                self._columns[name] = grown
+        self._size += 1
+        return self._size - 1
+
+    def _maybe_compact(self):
+        if self._size and (self._size - self._alive_count) / self._size > COMPACT_DEAD_RATIO:
+            self.compact()
+        elif self._terms.pending_count > max(COMPACT_PENDING_MIN, COMPACT_PENDING_RATIO * self._terms.count):
+            for postings in (self._terms, self._categories, self._tags):
+                postings.compact()
+            self._refresh_impacts()
+
+    def compact(self):
+        # Merges pending postings and drops removed slots, renumbering the rest
+        with self._lock:
+            alive = self._columns['alive'][:self._size]
+            keep = np.flatnonzero(alive)
+            remap = np.full(self._size, -1, dtype=np.int32)
+            remap[keep] = np.arange(len(keep), dtype=np.int32)
+            for name, column in self._columns.items():
+                self._columns[name] = column[keep]
+            self._size = len(keep)
+            self._slots = {event_id: slot for slot, event_id in enumerate(self._columns['event_id'].tolist())}
+            for postings in (self._terms, self._categories, self._tags):
+                postings.compact(remap)
+            self._refresh_impacts()
+
+    def _refresh_impacts(self):
+        self._norm = None
+        self._orders = {}
+        self._terms.compute_impacts(self._term_weight)
+
+    def _length_norm(self):
+        # k1 * (1 - b + b * len / avglen) per slot, recomputed when slots are added or dropped
+        if self._norm is None or len(self._norm) != self._size:
+            avg_length = self._total_length / self._alive_count if self._alive_count else 1.0
+            lengths = self._columns['length'][:self._size]
+            self._norm = (self.k1 * (1 - self.b + self.b * lengths / max(avg_length, 1e-9))).astype(np.float32)
+        return self._norm
+
+    def _term_weight(self, docs, freqs):
+        # The BM25 term-frequency component for each posting
+        freqs = freqs.astype(np.float32)
+        return freqs * np.float32(self.k1 + 1) / (freqs + self._length_norm()[docs])
+
+    def _term_postings(self, term):
+        # (idf, [(slots, BM25 weights), ...]) for the compacted and pending postings of term
+        docs = self._terms.docs.get(term)
+        pending = self._terms.pending.get(term)
+        df = (len(docs) if docs is not None else 0) + (len(pending[0]) if pending else 0)
+        if not df:
+            return None, []
+        idf = np.float32(math.log(1 + (self._alive_count - df + 0.5) / (df + 0.5)))
+        segments = []
+        if docs is not None:
+            segments.append((docs, self._terms.impacts[term]))
+        if pending:
+            pending_docs = np.array(pending[0], dtype=np.int32)
+            segments.append((pending_docs, self._term_weight(pending_docs, np.array(pending[1]))))
+        return idf, segments
+
+    def _score(self, terms, within=None):
+        # BM25 score per slot; with within (a mask of few slots), only those slots are scored
+        scores = np.zeros(self._size, dtype=np.float32)
+        for term in set(terms):
+            idf, segments = self._term_postings(term)
+            for docs, weights in segments:
+                if within is not None:
+                    keep = within[docs]
+                    docs, weights = docs[keep], weights[keep]
+                # Slots are unique within one posting list, so the fancy-indexed += is safe
+                scores[docs] += idf * weights
+        return scores
+
+    def _label_mask(self, postings, ids):
+        mask = np.zeros(self._size, dtype=np.bool_)
+        for label_id in ids:
+            docs, _ = postings.get(label_id)
+            if docs is not None:
+                mask[docs] = True
+        return mask
+
+    def provider_ids(self, content_provider):
+        # Providers whose username contains content_provider, like the SQL search's LIKE
+        needle = content_provider.lower()
+        return [provider_id for provider_id, name in self.provider_names.items() if needle in name.lower()]
+
+    def _sparse(self, total, k):
+        # Few enough matches to list them all
+        return total * SPARSE_RATIO < self._size or k == total
+
+    def _top_scores(self, scores, mask, total, k):
+        if self._sparse(total, k):
+            slots = np.flatnonzero(mask)
+            return slots[_top(-scores[slots], k)]
+        # Unmatched slots score 0, so with more than k matches they never reach the top k
+        keys = scores * mask
+        np.negative(keys, out=keys)
+        return _top(keys, k)
+
+    def _sort_order(self, name):
+        # Slots ordered by a column (those without a value kept apart), computed on first use
+        # after each compaction. Slots appended since are not covered.
+        if name not in self._orders:
+            column = self._columns[name][:self._size]
+            missing = np.isnan(column) if column.dtype.kind == 'f' else np.zeros(self._size, dtype=np.bool_)
+            present = np.flatnonzero(~missing).astype(np.int32)
+            ordered = present[np.argsort(column[present], kind='stable')]
+            self._orders[name] = (ordered, np.flatnonzero(missing).astype(np.int32), self._size)
+        return self._orders[name]
+
+    def _top_by_column(self, name, descending, mask, total, k):
+        column = self._columns[name][:self._size]
+        if self._sparse(total, k):
+            candidates = np.flatnonzero(mask)
+        else:
+            # Walk the presorted slots until k of them match, then add the unsorted tail
+            ordered, missing, sorted_size = self._sort_order(name)
+            tail = np.arange(sorted_size, self._size, dtype=np.int32)
+            candidates = np.concatenate((
+                _first_matches(ordered[::-1] if descending else ordered, mask, k),
+                _first_matches(missing, mask, k),
+                tail[mask[sorted_size:]],
+            ))
+        keys = column[candidates].astype(np.float64)
+        if descending:
+            np.negative(keys, out=keys)
+        # Events without a start or end time sort last, as NULLs do in MySQL ascending order
+        np.putmask(keys, np.isnan(keys), MISSING_KEY)
+        return candidates[_top(keys, k)]
+
+    def _filter_masks(self, columns, start_time, end_time, min_price, max_price, categories, tags,
+                      content_provider):
+        # {facet dimension: mask} for each filter that is set
+        filters = {}
+        if start_time is not None:
+            filters['start_date'] = columns['start_time'] >= _timestamp(start_time)
+        if end_time is not None:
+            filters['end_date'] = columns['end_time'] <= _timestamp(end_time)
+        if min_price is not None or max_price is not None:
+            filters['price'] = np.ones(self._size, dtype=np.bool_)
+            if min_price is not None:
+                filters['price'] &= columns['price'] >= min_price
+            if max_price is not None:
+                filters['price'] &= columns['price'] <= max_price
+        if categories:
+            filters['categories'] = self._label_mask(self._categories, categories)
+        if tags:
+            filters['tags'] = self._label_mask(self._tags, tags)
+        if content_provider:
+            filters['providers'] = np.isin(columns['provider'], self.provider_ids(content_provider))
+        return filters
+
+    def search(self, text=None, start_time=None, end_time=None, min_price=None, max_price=None,
+               categories=None, tags=None, content_provider=None, sort_by='start_time', sort_order='ASC',
+               offset=0, limit=10, facets=False):
+        # Returns (event ids, total matches, scores, facet counts) for one page. Text matches any
+        # of its words and is ranked by BM25; the other arguments filter like advanced_search.
+        # Facet counts (see _facet_counts) are None unless facets is set.
+        with self._lock:
+            columns = {name: column[:self._size] for name, column in self._columns.items()}
+            filters = self._filter_masks(columns, start_time, end_time, min_price, max_price, categories, tags,
+                                         content_provider)
+            mask = columns['alive'].copy()
+            for filter_mask in filters.values():
+                mask &= filter_mask
+
+            scores = None
+            if text:
+                # Once the filters have narrowed things down, only the remaining events are scored
+                selective = np.count_nonzero(mask) * SPARSE_RATIO < self._size
+                scores = self._score(tokenize(text), within=mask if selective else None)
+                mask &= scores > 0
+            total = int(np.count_nonzero(mask))
+
+            counts = None
+            if facets:
+                base = columns['alive']
+                if text:
+                    base = base & self._label_mask(self._terms, set(tokenize(text)))
+                counts = self._facet_counts(columns, base, filters)
+
+            k = min(offset + limit, total)
+            if sort_by == 'relevance' and scores is not None:
+                page = self._top_scores(scores, mask, total, k)
+            else:
+                page = self._top_by_column(SORT_COLUMNS.get(sort_by, 'start_time'), sort_order == 'DESC',
+                                           mask, total, k)
+            page = page[offset:]
+            event_ids = columns['event_id'][page].tolist()
+            page_scores = scores[page].tolist() if scores is not None else [0.0] * len(event_ids)
+            return event_ids, total, page_scores, counts
+
+    def _facet_counts(self, columns, base, filters):
+        # {'categories': {id: count}, 'tags': {id: count}, 'providers': {username: count},
+        # 'price': {bucket: count}} over the matching events. Each dimension ignores its own
+        # filter, so the counts say what picking another value there would add.
+        def matching(dimension):
+            mask = base.copy()
+            for name, filter_mask in filters.items():
+                if name != dimension:
+                    mask &= filter_mask
+            return mask
+
+        counts = {}
+        for dimension, postings in (('categories', self._categories), ('tags', self._tags)):
+            mask = matching(dimension)
+            counts[dimension] = {}
+            for label_id in postings.keys():
+                docs, _ = postings.get(label_id)
+                count = int(np.count_nonzero(mask[docs]))
+                if count:
+                    counts[dimension][label_id] = count
+        provider_counts = np.bincount(columns['provider'][matching('providers')])
+        counts['providers'] = {}
+        for provider_id in np.flatnonzero(provider_counts).tolist():
+            name = self.provider_names.get(provider_id)
+            if name is not None:
+                counts['providers'][name] = counts['providers'].get(name, 0) + int(provider_counts[provider_id])
+        buckets = np.bincount(columns['price_bucket'][matching('price')])
+        counts['price'] = {bucket: count for bucket, count in enumerate(buckets.tolist()) if count}
+        return counts
+
+    def save(self, path):
+        # Written to a temporary file and renamed, so a crash never leaves a torn snapshot
+        with self._lock:
+            self.compact()
+            self.snapshot_at = datetime.now()
+            meta = {
+                'version': SNAPSHOT_VERSION,
+                'k1': self.k1,
+                'b': self.b,
+                'snapshot_at': self.snapshot_at.isoformat(),
+                'total_length': self._total_length,
+                'provider_names': {str(key): name for key, name in self.provider_names.items()},
+            }
+            arrays = {f"column_{name}": column for name, column in self._columns.items()}
+            arrays.update(self._terms.to_arrays('terms', string_keys=True))
+            arrays.update(self._categories.to_arrays('categories', string_keys=False))
+            arrays.update(self._tags.to_arrays('tags', string_keys=False))
+            arrays['meta'] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, path)
+            self.changes = 0
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+        meta = json.loads(arrays['meta'].tobytes().decode())
+        if meta['version'] != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported search index snapshot version {meta['version']}")
+        index = cls(k1=meta['k1'], b=meta['b'])
+        index.snapshot_at = datetime.fromisoformat(meta['snapshot_at'])
+        index.provider_names = {int(key): name for key, name in meta['provider_names'].items()}
+        index._columns = {name: arrays[f"column_{name}"] for name in COLUMNS}
+        index._size = len(index._columns['alive'])
+        index._alive_count = int(index._columns['alive'].sum())
+        index._total_length = meta['total_length']
+        index._slots = {event_id: slot for slot, event_id in enumerate(index._columns['event_id'].tolist())}
+        index._terms = _Postings.from_arrays(arrays, 'terms', string_keys=True, with_freqs=True)
+        index._categories = _Postings.from_arrays(arrays, 'categories', string_keys=False, with_freqs=False)
+        index._tags = _Postings.from_arrays(arrays, 'tags', string_keys=False, with_freqs=False)
+        index._refresh_impacts()
+        return index
@@ -1,125 +1,559 @@
-from app.database.db import execute_query
+from app.database import db
+from app.database.db import execute_query, execute_multi
+from app.search import autocomplete, event_index, fuzzy_search
+from app.search.event_index import get_event_index
+from app.search.fuzzy_search import fuzzy_event_ids, fuzzy_provider_ids
+from app.search.inverted_index import PRICE_FACET_BOUNDS
+from app.messaging.subscriber import subscribe
+from app.utils.cache import TTLCache
+from app.utils.metrics import SEARCH_CACHE_INVALIDATIONS
 from datetime import datetime
+from decimal import Decimal
+import base64
+import json
+import logging
+import os
+import re
+import threading
 
-def advanced_search(
-    search_query=None,
-    start_date=None,
-    end_date=None,
-    min_price=None,
-    max_price=None,
-    categories=None,
-    tags=None,
-    content_provider=None,
-    sort_by='start_time',
-    sort_order='ASC',
-    page=1,
-    per_page=10
-):
+logger = logging.getLogger(__name__)
+
+# Sortable fields -> column. Ratings come from the aggregates add_rating maintains on events.
+SORT_COLUMNS = {
+    'start_time': 'e.start_time',
+    'price': 'e.price',
+    'avg_rating': 'e.average_rating',
+    'rating_count': 'e.total_ratings',
+    'total_ratings': 'e.total_ratings',
+}
+
+# "like" (the default) matches search_query as a substring of the title or description. "natural"
+# or "boolean" opt in to the FULLTEXT index on events(title, description), which matches whole words
+# and ranks by relevance; any database without that index falls back to "like". "index" answers the
+# whole search from the in-process BM25 index (app/search/inverted_index.py).
+SEARCH_MODE = os.getenv('SEARCH_MODE', 'like')
+FULLTEXT_INDEX = 'ft_events_title_description'
+FULLTEXT_MATCH = "MATCH(e.title, e.description)"
+# InnoDB does not index words shorter than innodb_ft_min_token_size (3 by default)
+FULLTEXT_MIN_TOKEN_SIZE = int(os.getenv('FULLTEXT_MIN_TOKEN_SIZE', 3))
+
+_fulltext_index = TTLCache(1, 300, name="fulltext_index")
+
+# Streamlit reruns the event browser on every widget interaction, repeating the same search.
+# Results are cached for SEARCH_CACHE_TTL seconds under the canonical form of the arguments
+# and the current generation, which invalidate_search_results bumps whenever an event is
+# created, published, updated or deleted - here directly, on other replicas through the
+# analytics.event_update message.
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 30))
+SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', 500))
+_search_results = TTLCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL, name="search_results")
+_generation = 0
+_generation_lock = threading.Lock()
+_generation_updates_started = False
+
+def _load_fulltext_available(index_name):
+    if db.DB_BACKEND != 'mysql':
+        return False
     query = """
-    SELECT DISTINCT e.*, u.username as content_provider_name,
-           COALESCE(AVG(r.rating), 0) as avg_rating, 
-           COUNT(DISTINCT r.id) as rating_count
+    SELECT COUNT(*) AS total FROM information_schema.STATISTICS
+    WHERE table_schema = DATABASE() AND table_name = 'events' AND index_name = %s
+    """
+    result = execute_query(query, (index_name,))
+    if result is None:
+        return None
+    return result[0]['total'] > 0
+
+def fulltext_available():
+    return bool(_fulltext_index.get_or_load(FULLTEXT_INDEX, _load_fulltext_available))
+
+def to_boolean_query(search_query):
+    # Every word required and matched as a prefix: "jazz fest" -> "+jazz* +fest*"
+    return " ".join(f"+{word}*" for word in re.findall(r"\w+", search_query))
+
+def _text_search(search_query, search_mode):
+    # (WHERE clause, params, relevance expression or None) for the free-text part of a search
+    words = re.findall(r"\w+", search_query)
+    if (search_mode in ('natural', 'boolean') and fulltext_available()
+            and any(len(word) >= FULLTEXT_MIN_TOKEN_SIZE for word in words)):
+        if search_mode == 'boolean':
+            match = f"{FULLTEXT_MATCH} AGAINST (%s IN BOOLEAN MODE)"
+            against = to_boolean_query(search_query)
+        else:
+            match = f"{FULLTEXT_MATCH} AGAINST (%s IN NATURAL LANGUAGE MODE)"
+            against = search_query
+        return f" AND {match}", [against], match
+    pattern = f"%{search_query}%"
+    return " AND (e.title LIKE %s OR e.description LIKE %s)", [pattern, pattern], None
+
+SEARCH_QUERY = """
+    SELECT e.*, u.username as content_provider_name,
+           e.average_rating as avg_rating,
+           e.total_ratings as rating_count,
+           {relevance} as relevance
     FROM events e
     JOIN users u ON e.content_provider_id = u.id
-    LEFT JOIN event_categories ec ON e.id = ec.event_id
-    LEFT JOIN event_tags et ON e.id = et.event_id
-    LEFT JOIN ratings r ON e.id = r.event_id
     WHERE e.is_published = TRUE
     """
-    params = []
 
+# The exact total and the facet counts for the event browser's filters are one UNION ALL
+# statement sent in the same round trip as the page. Each facet leaves out its own filter,
+# so its counts say what picking another value there would add.
+PRICE_BUCKET = " + ".join(f"(e.price >= {bound})" for bound in PRICE_FACET_BOUNDS)
+TOTAL_QUERY = """
+    SELECT 'total' AS facet, NULL AS facet_value, COUNT(*) AS facet_count
+    FROM events e
+    JOIN users u ON e.content_provider_id = u.id
+    WHERE e.is_published = TRUE{where}
+    """
+FACET_QUERIES = {
+    'categories': """
+    SELECT 'categories', fc.category_id, COUNT(*)
+    FROM events e
+    JOIN users u ON e.content_provider_id = u.id
+    JOIN event_categories fc ON fc.event_id = e.id
+    WHERE e.is_published = TRUE{where}
+    GROUP BY fc.category_id
+    """,
+    'tags': """
+    SELECT 'tags', ft.tag_id, COUNT(*)
+    FROM events e
+    JOIN users u ON e.content_provider_id = u.id
+    JOIN event_tags ft ON ft.event_id = e.id
+    WHERE e.is_published = TRUE{where}
+    GROUP BY ft.tag_id
+    """,
+    'providers': """
+    SELECT 'providers', u.username, COUNT(*)
+    FROM events e
+    JOIN users u ON e.content_provider_id = u.id
+    WHERE e.is_published = TRUE{where}
+    GROUP BY u.username
+    """,
+    'price': f"""
+    SELECT 'price', {PRICE_BUCKET}, COUNT(*)
+    FROM events e
+    JOIN users u ON e.content_provider_id = u.id
+    WHERE e.is_published = TRUE{{where}}
+    GROUP BY {PRICE_BUCKET}
+    """,
+}
+
+def price_bucket_label(bucket):
+    # "$25-50" for the price facet's bucket numbers
+    bounds = (0,) + PRICE_FACET_BOUNDS
+    if bucket >= len(PRICE_FACET_BOUNDS):
+        return f"${bounds[-1]}+"
+    return f"${bounds[bucket]}-{bounds[bucket + 1]}"
+
+def _in_condition(column, ids):
+    if not ids:
+        return " AND FALSE", []
+    return f" AND {column} IN %s", [tuple(ids)]
+
+def _search_conditions(search_query, start_date, end_date, min_price, max_price, categories, tags,
+                       content_provider, search_mode, fuzzy=False):
+    # ({facet dimension: (WHERE condition, params)} for SEARCH_QUERY, text search params,
+    # relevance expression or None). Categories and tags are EXISTS checks, so an event
+    # matches once however many of its labels are picked. With fuzzy, the query and provider
+    # are matched against titles and usernames by the trigram indexes, once they are built.
+    conditions, text_params, relevance = {}, [], None
     if search_query:
-        query += " AND (e.title LIKE %s OR e.description LIKE %s)"
-        params.extend([f"%{search_query}%", f"%{search_query}%"])
+        event_ids = fuzzy_event_ids(search_query) if fuzzy else None
+        if event_ids is not None:
+            conditions['text'] = _in_condition("e.id", event_ids)
+        else:
+            text_clause, text_params, relevance = _text_search(search_query, search_mode or SEARCH_MODE)
+            conditions['text'] = (text_clause, text_params)
 
     if start_date:
-        query += " AND e.start_time >= %s"
-        params.append(start_date)
+        conditions['start_date'] = (" AND e.start_time >= %s", [start_date])
 
     if end_date:
-        query += " AND e.end_time <= %s"
-        params.append(end_date)
+        conditions['end_date'] = (" AND e.end_time <= %s", [end_date])
 
+    price_clause, price_params = "", []
     if min_price is not None:
-        query += " AND e.price >= %s"
-        params.append(min_price)
-
+        price_clause += " AND e.price >= %s"
+        price_params.append(min_price)
     if max_price is not None:
-        query += " AND e.price <= %s"
-        params.append(max_price)
+        price_clause += " AND e.price <= %s"
+        price_params.append(max_price)
+    if price_clause:
+        conditions['price'] = (price_clause, price_params)
 
     if categories:
-        query += " AND ec.category_id IN %s"
-        params.append(tuple(categories))
+        conditions['categories'] = (
+            " AND EXISTS (SELECT 1 FROM event_categories ec WHERE ec.event_id = e.id AND ec.category_id IN %s)",
+            [tuple(categories)]
+        )
 
     if tags:
-        query += " AND et.tag_id IN %s"
-        params.append(tuple(tags))
+        conditions['tags'] = (
+            " AND EXISTS (SELECT 1 FROM event_tags et WHERE et.event_id = e.id AND et.tag_id IN %s)",
+            [tuple(tags)]
+        )
 
     if content_provider:
-        query += " AND u.username LIKE %s"
-        params.append(f"%{content_provider}%")
+        provider_ids = fuzzy_provider_ids(content_provider) if fuzzy else None
+        if provider_ids is not None:
+            conditions['providers'] = _in_condition("e.content_provider_id", provider_ids)
+        else:
+            conditions['providers'] = (" AND u.username LIKE %s", [f"%{content_provider}%"])
 
-    query += " GROUP BY e.id"
+    return conditions, text_params, relevance
 
-    # Add sorting
-    valid_sort_columns = ['start_time', 'price', 'avg_rating', 'rating_count']
-    if sort_by in valid_sort_columns:
-        query += f" ORDER BY {sort_by} {sort_order}"
-    else:
-        query += " ORDER BY e.start_time ASC"
+def _where(conditions, exclude=None):
+    clause, params = "", []
+    for dimension, (condition, condition_params) in conditions.items():
+        if dimension != exclude:
+            clause += condition
+            params.extend(condition_params)
+    return clause, params
 
-    # Add pagination
-    offset = (page - 1) * per_page
-    query += " LIMIT %s OFFSET %s"
-    params.extend([per_page, offset])
+def _search_order(sort_by, sort_order, relevance):
+    # (ORDER BY expression, direction, result field holding the sort value). Relevance is
+    # always best match first and needs a FULLTEXT search.
+    if sort_by == 'relevance' and relevance:
+        return "relevance", 'DESC', 'relevance'
+    if sort_by in SORT_COLUMNS and sort_order in ('ASC', 'DESC'):
+        return SORT_COLUMNS[sort_by], sort_order, SORT_COLUMNS[sort_by].split('.')[1]
+    return "e.start_time", 'ASC', 'start_time'
 
-    results = execute_query(query, tuple(params))
-    
-    # Get total count for pagination
-    count_query = f"SELECT COUNT(DISTINCT e.id) as total FROM events e WHERE e.is_published = TRUE"
-    count_params = []
+def _facet_statement(conditions, facets):
+    # (query, params) counting the matching events and, with facets, each facet's values
+    clause, params = _where(conditions)
+    parts = [TOTAL_QUERY.format(where=clause)]
+    if facets:
+        for dimension, query in FACET_QUERIES.items():
+            clause, dimension_params = _where(conditions, exclude=dimension)
+            parts.append(query.format(where=clause))
+            params += dimension_params
+    return " UNION ALL ".join(parts), params
 
-    if search_query:
-        count_query += " AND (e.title LIKE %s OR e.description LIKE %s)"
-        count_params.extend([f"%{search_query}%", f"%{search_query}%"])
+def _read_facets(rows, facets):
+    # (total, {'categories': {id: count}, 'tags': {id: count}, 'providers': {username: count},
+    # 'price': {bucket: count}} or None) from the rows of _facet_statement
+    total = 0
+    counts = {dimension: {} for dimension in FACET_QUERIES} if facets else None
+    for row in rows:
+        if row['facet'] == 'total':
+            total = int(row['facet_count'])
+        else:
+            value = row['facet_value'] if row['facet'] == 'providers' else int(row['facet_value'])
+            counts[row['facet']][value] = int(row['facet_count'])
+    return total, counts
 
-    if start_date:
-        count_query += " AND e.start_time >= %s"
-        count_params.append(start_date)
+def _page_statement(conditions, text_params, relevance, order, direction, limit, offset=0, after=None):
+    # (query, params) reading a page of SEARCH_QUERY. after: extra (condition, params) for
+    # the page only.
+    clause, params = _where(conditions)
+    if after:
+        clause += after[0]
+        params += after[1]
+    query = SEARCH_QUERY.format(relevance=relevance or 0) + clause
+    query += f" ORDER BY {order} {direction}, e.id {direction} LIMIT %s"
+    params = (text_params if relevance else []) + params + [limit]
+    if offset:
+        query += " OFFSET %s"
+        params.append(offset)
+    return query, tuple(params)
 
-    if end_date:
-        count_query += " AND e.end_time <= %s"
-        count_params.append(end_date)
+def _after_condition(order, direction, relevance, text_params, position):
+    # The keyset condition for the rows after a decoded cursor's (sort value, e.id). The
+    # alias cannot be used in WHERE, so relevance repeats its MATCH expression.
+    if order == "relevance":
+        operator = '>' if direction == 'ASC' else '<'
+        return (f" AND ({relevance} {operator} %s OR ({relevance} = %s AND e.id {operator} %s))",
+                text_params + [position['value']] + text_params + [position['value'], position['id']])
+    # The sort columns are nullable. MySQL and SQLite both order NULL below every value, so
+    # NULLs come first ascending and last descending, and a comparison with NULL matches
+    # nothing: the NULL rows are paged by id alone and are picked up explicitly.
+    value, event_id = position['value'], position['id']
+    if direction == 'ASC':
+        if value is None:
+            return f" AND ({order} IS NOT NULL OR e.id > %s)", [event_id]
+        return f" AND ({order} > %s OR ({order} = %s AND e.id > %s))", [value, value, event_id]
+    if value is None:
+        return f" AND {order} IS NULL AND e.id < %s", [event_id]
+    return f" AND ({order} < %s OR ({order} = %s AND e.id < %s) OR {order} IS NULL)", [value, value, event_id]
 
-    if min_price is not None:
-        count_query += " AND e.price >= %s"
-        count_params.append(min_price)
+def page_statement(search_query=None, start_date=None, end_date=None, min_price=None, max_price=None,
+                   categories=None, tags=None, content_provider=None, sort_by='start_time', sort_order='ASC',
+                   per_page=10, position=None, search_mode=None):
+    # The (query, params) of the results page advanced_search and keyset_search read for these
+    # filters, for checking its plan. position: a cursor's {'value', 'id'} to page after.
+    conditions, text_params, relevance = _search_conditions(
+        search_query, start_date, end_date, min_price, max_price, categories, tags, content_provider, search_mode
+    )
+    order, direction, _ = _search_order(sort_by, sort_order, relevance)
+    after = _after_condition(order, direction, relevance, text_params, position) if position else None
+    return _page_statement(conditions, text_params, relevance, order, direction, per_page, after=after)
 
-    if max_price is not None:
-        count_query += " AND e.price <= %s"
-        count_params.append(max_price)
+def _search_page(conditions, text_params, relevance, order, direction, limit, offset=0, after=None,
+                 facets=False):
+    # Reads a page of results together with the exact total (and facet counts) in one round
+    # trip. Returns (rows or None, total, facet counts or None).
+    query, params = _page_statement(conditions, text_params, relevance, order, direction, limit, offset, after)
+    facet_query, facet_params = _facet_statement(conditions, facets)
+    results = execute_multi([(query, params), (facet_query, tuple(facet_params))])
+    if results is None:
+        return None, 0, None
+    total_count, counts = _read_facets(results[1], facets)
+    return results[0], total_count, counts
+
+def invalidate_search_results(message=None):
+    # message: the analytics.event_update body when called by the subscription
+    global _generation
+    with _generation_lock:
+        _generation += 1
+    _search_results.clear()
+    SEARCH_CACHE_INVALIDATIONS.inc()
+
+def apply_event_update(message):
+    # Applies an analytics.event_update message to this process's search cache and indexes.
+    # The process making a change calls it directly, so its own searches do not wait on the
+    # message coming back over NATS (or miss it while NATS is unreachable).
+    invalidate_search_results(message)
+    for module in (event_index, fuzzy_search, autocomplete):
+        try:
+            module.apply_event_update(message)
+        except Exception as e:
+            logger.error(f"Failed to apply event update to {module.__name__}: {e}")
+
+def _start_generation_updates():
+    global _generation_updates_started
+    with _generation_lock:
+        if _generation_updates_started:
+            return
+        _generation_updates_started = True
+    subscribe("analytics.event_update", invalidate_search_results)
+
+def _round_time(value):
+    # To the minute, so a filter built from datetime.now() stays the same between reruns
+    if isinstance(value, datetime):
+        return value.replace(second=0, microsecond=0)
+    return value
+
+def _canonical_filters(search_query, start_date, end_date, min_price, max_price, categories, tags,
+                       content_provider):
+    # The filter arguments in one form per distinct search; both the cache key and the
+    # search itself use it
+    return (
+        " ".join(search_query.lower().split()) or None if search_query else None,
+        _round_time(start_date),
+        _round_time(end_date),
+        None if min_price is None else float(min_price),
+        None if max_price is None else float(max_price),
+        tuple(sorted(set(categories))) if categories else None,
+        tuple(sorted(set(tags))) if tags else None,
+        content_provider.strip() or None if content_provider else None,
+    )
 
-    count_result = execute_query(count_query, tuple(count_params))
-    total_count = count_result[0]['total'] if count_result else 0
+def _cached_search(key, search):
+    # search() through the result cache. Failed searches (results None) are not cached, and
+    # one that raced an invalidation is stored under the old generation, so never read.
+    _start_generation_updates()
+    key = (_generation,) + key
+    result = _search_results.get(key)
+    if result is None:
+        result = search()
+        if result[0] is not None:
+            _search_results.set(key, result)
+    return result
 
+def advanced_search(
+    search_query=None,
+    start_date=None,
+    end_date=None,
+    min_price=None,
+    max_price=None,
+    categories=None,
+    tags=None,
+    content_provider=None,
+    sort_by='start_time',
+    sort_order='ASC',
+    page=1,
+    per_page=10,
+    search_mode=None,
+    fuzzy=False
+):
+    filters = _canonical_filters(search_query, start_date, end_date, min_price, max_price, categories, tags,
+                                 content_provider)
+    search_mode = search_mode or SEARCH_MODE
+    key = ('page', filters, sort_by, sort_order, page, per_page, search_mode, bool(fuzzy))
+    return _cached_search(key, lambda: _advanced_search(*filters, sort_by, sort_order, page, per_page,
+                                                        search_mode, fuzzy))
+
+def _advanced_search(search_query, start_date, end_date, min_price, max_price, categories, tags,
+                     content_provider, sort_by, sort_order, page, per_page, search_mode, fuzzy):
+    offset = (page - 1) * per_page
+    if search_mode == 'index':
+        results, total_count, _ = _index_search(search_query, start_date, end_date, min_price, max_price,
+                                                categories, tags, content_provider, sort_by, sort_order,
+                                                offset, per_page)
+        return results, total_count
+
+    conditions, text_params, relevance = _search_conditions(
+        search_query, start_date, end_date, min_price, max_price, categories, tags, content_provider, search_mode,
+        fuzzy
+    )
+    order, direction, _ = _search_order(sort_by, sort_order, relevance)
+    results, total_count, _ = _search_page(conditions, text_params, relevance, order, direction, per_page, offset)
     return results, total_count
 
-def get_categories():
-    query = "SELECT * FROM categories"
-    result = execute_query(query)
-    return result if result else []  # Return an empty list if no categories found
+def encode_cursor(sort_key, value, event_id):
+    if isinstance(value, datetime):
+        value = {'datetime': value.isoformat()}
+    elif isinstance(value, Decimal):
+        value = {'decimal': str(value)}
+    payload = json.dumps({'sort': sort_key, 'value': value, 'id': event_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
 
-def get_tags():
-    query = "SELECT * FROM tags"
-    result = execute_query(query)
-    return result if result else []  # Return an empty list if no tags found
+def decode_cursor(cursor, sort_key):
+    # The cursor's payload, or None for no cursor or one issued for a different sort, which
+    # starts again from the first page
+    if not cursor:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get('sort') != list(sort_key):
+        return None
+    value = data.get('value')
+    if isinstance(value, dict) and 'datetime' in value:
+        data['value'] = datetime.fromisoformat(value['datetime'])
+    elif isinstance(value, dict) and 'decimal' in value:
+        data['value'] = Decimal(value['decimal'])
+    return data
 
-def get_content_providers():
+def keyset_search(
+    search_query=None,
+    start_date=None,
+    end_date=None,
+    min_price=None,
+    max_price=None,
+    categories=None,
+    tags=None,
+    content_provider=None,
+    sort_by='start_time',
+    sort_order='ASC',
+    cursor=None,
+    per_page=10,
+    search_mode=None,
+    facets=False,
+    fuzzy=False
+):
+    # Like advanced_search, but pages with an opaque cursor instead of an offset: the next
+    # page starts after the (sort value, e.id) of the last row, so it costs the same however
+    # deep it is and does not shift when events are published in between. Returns
+    # (results, total_count, next_cursor, facet counts); next_cursor is None on the last page
+    # and the facet counts (see _read_facets) are None unless facets is set. fuzzy applies to
+    # the SQL search modes only.
+    filters = _canonical_filters(search_query, start_date, end_date, min_price, max_price, categories, tags,
+                                 content_provider)
+    search_mode = search_mode or SEARCH_MODE
+    key = ('cursor', filters, sort_by, sort_order, cursor, per_page, search_mode, bool(facets), bool(fuzzy))
+    return _cached_search(key, lambda: _keyset_search(*filters, sort_by, sort_order, cursor, per_page,
+                                                      search_mode, facets, fuzzy))
+
+def _keyset_search(search_query, start_date, end_date, min_price, max_price, categories, tags,
+                   content_provider, sort_by, sort_order, cursor, per_page, search_mode, facets, fuzzy):
+    if search_mode == 'index':
+        # The index ranks in memory, where an offset is cheap
+        sort_key = ['index', sort_by, sort_order]
+        position = decode_cursor(cursor, sort_key)
+        offset = position['offset'] if position else 0
+        results, total_count, counts = _index_search(search_query, start_date, end_date, min_price, max_price,
+                                                     categories, tags, content_provider, sort_by, sort_order,
+                                                     offset, per_page, facets)
+        next_offset = offset + per_page
+        next_cursor = None
+        if next_offset < total_count:
+            next_cursor = base64.urlsafe_b64encode(
+                json.dumps({'sort': sort_key, 'offset': next_offset}).encode()
+            ).decode()
+        return results, total_count, next_cursor, counts
+
+    conditions, text_params, relevance = _search_conditions(
+        search_query, start_date, end_date, min_price, max_price, categories, tags, content_provider, search_mode,
+        fuzzy
+    )
+    order, direction, field = _search_order(sort_by, sort_order, relevance)
+    sort_key = [field, direction]
+    position = decode_cursor(cursor, sort_key)
+    after = _after_condition(order, direction, relevance, text_params, position) if position else None
+
+    # One extra row tells whether there is a next page
+    results, total_count, counts = _search_page(conditions, text_params, relevance, order, direction,
+                                                per_page + 1, after=after, facets=facets)
+    if results is None:
+        return None, total_count, None, counts
+
+    next_cursor = None
+    if len(results) > per_page:
+        results = results[:per_page]
+        last = results[-1]
+        next_cursor = encode_cursor(sort_key, last[field], last['id'])
+    return results, total_count, next_cursor, counts
+
+def _index_search(search_query, start_date, end_date, min_price, max_price, categories, tags,
+                  content_provider, sort_by, sort_order, offset, limit, facets=False):
+    # The index picks and orders the page and counts the facets; only the page's rows are
+    # read from the database. Returns (results, total_count, facet counts or None).
+    event_ids, total_count, scores, counts = get_event_index().search(
+        search_query, start_time=start_date, end_time=end_date, min_price=min_price, max_price=max_price,
+        categories=categories, tags=tags, content_provider=content_provider, sort_by=sort_by,
+        sort_order=sort_order, offset=offset, limit=limit, facets=facets
+    )
+    if not event_ids:
+        return [], total_count, counts
     query = """
+    SELECT e.*, u.username as content_provider_name,
+           e.average_rating as avg_rating,
+           e.total_ratings as rating_count
+    FROM events e
+    JOIN users u ON e.content_provider_id = u.id
+    WHERE e.id IN %s
+    """
+    rows = execute_query(query, (tuple(event_ids),))
+    if rows is None:
+        return None, total_count, counts
+    rows_by_id = {row['id']: row for row in rows}
+    results = []
+    for event_id, score in zip(event_ids, scores):
+        if event_id in rows_by_id:
+            results.append(dict(rows_by_id[event_id], relevance=score))
+    return results, total_count, counts
+
+# Filter option lists for the event browser. They change rarely, so each is cached for
+# REFERENCE_DATA_CACHE_TTL seconds; add_category and add_tag invalidate their list at once.
+REFERENCE_DATA_CACHE_TTL = int(os.getenv('REFERENCE_DATA_CACHE_TTL', 300))
+REFERENCE_QUERIES = {
+    'categories': "SELECT * FROM categories",
+    'tags': "SELECT * FROM tags",
+    'providers': """
     SELECT DISTINCT u.username
     FROM users u
     JOIN events e ON u.id = e.content_provider_id
     WHERE e.is_published = TRUE
-    """
-    return execute_query(query)
+    """,
+}
+_reference_data = TTLCache(len(REFERENCE_QUERIES), REFERENCE_DATA_CACHE_TTL, name="reference_data")
+
+def _load_reference_data(name):
+    return execute_query(REFERENCE_QUERIES[name])
+
+def invalidate_reference_data(name):
+    _reference_data.invalidate(name)
+
+def get_categories():
+    # Return an empty list if no categories found
+    return _reference_data.get_or_load('categories', _load_reference_data) or []
+
+def get_tags():
+    # Return an empty list if no tags found
+    return _reference_data.get_or_load('tags', _load_reference_data) or []
+
+def get_content_providers():
+    return _reference_data.get_or_load('providers', _load_reference_data) or []
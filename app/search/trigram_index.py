@@ -0,0 +1,144 @@
+import math
+import threading
+import numpy as np
+from app.search.inverted_index import _Postings
+
+# Trigram index for typo-tolerant matching of short texts (event titles, usernames). Each
+# word is padded the way PostgreSQL's pg_trgm pads it ("  ja", "jaz", ..., "zz "), every
+# trigram maps to a sorted int32 array of item slots, and a query counts the trigrams it
+# shares with each item by concatenating its posting arrays and taking one bincount.
+#
+# similarity is pg_trgm's similarity(): shared / (query + item - shared) trigrams. With
+# word_match, it is the share of the query's trigrams found in the item instead, so a
+# short query can match one word of a long title, as pg_trgm's word_similarity() does.
+
+# Removed slots are dropped once they make up this fraction of all slots
+COMPACT_DEAD_RATIO = 0.2
+COMPACT_PENDING_MIN = 10000
+
+def trigrams(text):
+    grams = set()
+    for word in text.lower().split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class TrigramIndex:
+    def __init__(self, word_match=False):
+        self.word_match = word_match
+        self._lock = threading.RLock()
+        self._size = 0
+        self._alive_count = 0
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._counts = np.zeros(0, dtype=np.uint16)
+        self._alive = np.zeros(0, dtype=np.bool_)
+        self._slots = {}
+        self._postings = _Postings(with_freqs=False)
+
+    @classmethod
+    def build(cls, items, **kwargs):
+        # items: (id, text) pairs
+        index = cls(**kwargs)
+        for item_id, text in items:
+            index.add(item_id, text, compact=False)
+        index.compact()
+        return index
+
+    def __len__(self):
+        return self._alive_count
+
+    def __contains__(self, item_id):
+        return item_id in self._slots
+
+    def add(self, item_id, text, compact=True):
+        # Adds or replaces an item
+        with self._lock:
+            self._remove(item_id)
+            if self._size == len(self._ids):
+                capacity = max(1024, 2 * self._size)
+                for name in ('_ids', '_counts', '_alive'):
+                    column = getattr(self, name)
+                    grown = np.zeros(capacity, dtype=column.dtype)
+                    grown[:self._size] = column[:self._size]
+                    setattr(self, name, grown)
+            slot = self._size
+            self._size += 1
+            grams = trigrams(text or "")
+            self._ids[slot] = item_id
+            self._counts[slot] = min(len(grams), 65535)
+            self._alive[slot] = True
+            self._postings.add(((gram, 1) for gram in grams), slot)
+            self._slots[item_id] = slot
+            self._alive_count += 1
+            if compact:
+                self._maybe_compact()
+
+    def remove(self, item_id):
+        with self._lock:
+            removed = self._remove(item_id)
+            if removed:
+                self._maybe_compact()
+            return removed
+
+    def _remove(self, item_id):
+        slot = self._slots.pop(item_id, None)
+        if slot is None:
+            return False
+        self._alive[slot] = False
+        self._alive_count -= 1
+        return True
+
+    def _maybe_compact(self):
+        if self._size and (self._size - self._alive_count) / self._size > COMPACT_DEAD_RATIO:
+            self.compact()
+        elif self._postings.pending_count > max(COMPACT_PENDING_MIN, self._postings.count // 10):
+            self._postings.compact()
+
+    def compact(self):
+        # Merges pending postings and drops removed slots, renumbering the rest
+        with self._lock:
+            keep = np.flatnonzero(self._alive[:self._size])
+            remap = np.full(self._size, -1, dtype=np.int32)
+            remap[keep] = np.arange(len(keep), dtype=np.int32)
+            self._ids = self._ids[keep]
+            self._counts = self._counts[keep]
+            self._alive = self._alive[keep]
+            self._size = len(keep)
+            self._slots = {item_id: slot for slot, item_id in enumerate(self._ids.tolist())}
+            self._postings.compact(remap)
+
+    def nbytes(self):
+        # Size of the posting arrays and per-item columns
+        with self._lock:
+            postings = sum(docs.nbytes for docs in self._postings.docs.values())
+            return postings + self._ids.nbytes + self._counts.nbytes + self._alive.nbytes
+
+    def search(self, text, threshold, limit=None):
+        # [(id, similarity)] of the items at or above threshold, most similar first
+        grams = trigrams(text or "")
+        with self._lock:
+            lists = []
+            for gram in grams:
+                docs, _ = self._postings.get(gram)
+                if docs is not None:
+                    lists.append(docs)
+            if not lists:
+                return []
+            shared = np.bincount(np.concatenate(lists), minlength=self._size)
+            # Both measures are at most shared / query trigrams, which rules out most items
+            # before any are scored
+            needed = max(1, math.ceil(threshold * len(grams) - 1e-6))
+            slots = np.flatnonzero(shared >= needed)
+            slots = slots[self._alive[slots]]
+            hits = shared[slots].astype(np.float32)
+            if self.word_match:
+                scores = hits / len(grams)
+            else:
+                scores = hits / (len(grams) + self._counts[slots].astype(np.float32) - hits)
+            keep = scores >= threshold
+            slots, scores = slots[keep], scores[keep]
+            if limit is not None and len(slots) > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+                slots, scores = slots[top], scores[top]
+            order = np.lexsort((self._ids[slots], -scores))
+            return list(zip(self._ids[slots][order].tolist(), scores[order].tolist()))
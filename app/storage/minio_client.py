@@ -2,8 +2,9 @@ from minio import Minio
 from minio.error import S3Error
 import os
 from dotenv import load_dotenv
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 import io
+from app.utils.cache import TTLCache
 
 load_dotenv()
 
@@ -38,12 +39,39 @@ def upload_file(file_data, file_name, bucket_name="videos"):
         print(f"Error uploading file to MinIO: {e}")
         return None
 
+# Presigned URLs are signed as of the start of a fixed time bucket, so every request for
+# the same object within a bucket gets the same URL and browsers/nginx can cache the content
+PRESIGNED_URL_BUCKET_SECONDS = int(os.getenv('PRESIGNED_URL_BUCKET_SECONDS', 900))
+PRESIGNED_URL_CACHE_SIZE = int(os.getenv('PRESIGNED_URL_CACHE_SIZE', 10000))
+# S3 rejects presigned URLs valid for longer than 7 days
+MAX_PRESIGNED_EXPIRY = timedelta(days=7)
+
+_presigned_urls = TTLCache(PRESIGNED_URL_CACHE_SIZE, PRESIGNED_URL_BUCKET_SECONDS, name="presigned_urls")
+
+def _signing_window(now=None):
+    now = now or datetime.now(timezone.utc)
+    window = int(now.timestamp()) // PRESIGNED_URL_BUCKET_SECONDS * PRESIGNED_URL_BUCKET_SECONDS
+    return datetime.fromtimestamp(window, timezone.utc)
+
 def get_secure_file_url(file_path, bucket_name="videos", expires=timedelta(minutes=30)):
+    request_date = _signing_window()
+    key = (bucket_name, file_path, expires, request_date)
+    url = _presigned_urls.get(key)
+    if url:
+        return url
     try:
-        return minio_client.presigned_get_object(bucket_name, file_path, expires=expires)
+        # Signed at the window start, so the URL's lifetime is stretched by one window to
+        # stay valid for at least `expires` whenever in the window it is handed out
+        url = minio_client.presigned_get_object(
+            bucket_name, file_path,
+            expires=min(expires + timedelta(seconds=PRESIGNED_URL_BUCKET_SECONDS), MAX_PRESIGNED_EXPIRY),
+            request_date=request_date
+        )
     except S3Error as e:
         print(f"Error getting presigned URL: {e}")
         return None
+    _presigned_urls.set(key, url)
+    return url
 
 def get_file_url(file_path, bucket_name="videos", expires=3600):
     return get_secure_file_url(file_path, bucket_name, expires=timedelta(seconds=expires))
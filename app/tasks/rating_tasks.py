@@ -0,0 +1,15 @@
+from app.events.event_management import reconcile_rating_aggregates
+import schedule
+import os
+
+RATING_RECONCILE_INTERVAL_MINUTES = int(os.getenv('RATING_RECONCILE_INTERVAL_MINUTES', 60))
+
+_scheduled = False
+
+def schedule_rating_reconciliation():
+    # Runs on the notification scheduler's thread. main.py is re-run by Streamlit on every
+    # interaction, so the job is only registered once per process.
+    global _scheduled
+    if not _scheduled:
+        schedule.every(RATING_RECONCILE_INTERVAL_MINUTES).minutes.do(reconcile_rating_aggregates)
+        _scheduled = True
@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+from app.utils.metrics import CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS
+
+class TTLCache:
+    # Thread-safe in-process cache bounded by entry count (least recently used entries are
+    # evicted first) and by age (entries older than ttl seconds are treated as missing).
+    # Streamlit serves every session from one process, so a module-level instance is shared.
+    def __init__(self, maxsize, ttl, name):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so a load that raced one is not stored
+        self._version = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] <= self.ttl:
+                self._entries.move_to_end(key)
+                CACHE_HITS.labels(cache=self.name).inc()
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+        CACHE_MISSES.labels(cache=self.name).inc()
+        return default
+
+    def set(self, key, value, version=None):
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS.labels(cache=self.name).inc()
+
+    def get_or_load(self, key, load):
+        # Read-through: load(key) fills a miss. None results are not cached.
+        value = self.get(key)
+        if value is None:
+            version = self._version
+            value = load(key)
+            if value is not None:
+                self.set(key, value, version=version)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._version += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,57 @@
+from prometheus_client import Counter, Histogram, CollectorRegistry, start_http_server
+import os
+import threading
+
+# Shared Prometheus registry, rendered by the "metrics" query param in main.py
+REGISTRY = CollectorRegistry()
+
+# Request metrics
+REQUEST_COUNT = Counter('request_count', 'App Request Count', ['method', 'endpoint'], registry=REGISTRY)
+REQUEST_LATENCY = Histogram('request_latency_seconds', 'Request latency in seconds', ['method', 'endpoint'], registry=REGISTRY)
+
+# Database connection pool metrics
+DB_POOL_WAIT_TIME = Histogram(
+    'db_pool_wait_seconds', 'Time spent waiting to check out a pooled database connection', ['pool'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30), registry=REGISTRY
+)
+DB_POOL_CHECKOUTS = Counter('db_pool_checkouts', 'Pooled database connection checkouts', ['pool'], registry=REGISTRY)
+DB_POOL_EXHAUSTED = Counter('db_pool_exhausted', 'Checkouts that found the database connection pool exhausted', ['pool'], registry=REGISTRY)
+
+# Per-query latency, keyed by normalised SQL fingerprint id and calling function
+DB_QUERY_LATENCY = Histogram(
+    'db_query_duration_seconds', 'Database query latency in seconds', ['fingerprint', 'caller'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10), registry=REGISTRY
+)
+
+# In-process caches (app.utils.cache.TTLCache), labelled by cache name
+CACHE_HITS = Counter('cache_hits', 'In-process cache hits', ['cache'], registry=REGISTRY)
+CACHE_MISSES = Counter('cache_misses', 'In-process cache misses', ['cache'], registry=REGISTRY)
+CACHE_EVICTIONS = Counter('cache_evictions', 'In-process cache entries evicted to stay within size', ['cache'], registry=REGISTRY)
+# Search result cache generations (app.search.search_engine); its hit rate is
+# cache_hits / (cache_hits + cache_misses) with cache="search_results"
+SEARCH_CACHE_INVALIDATIONS = Counter('search_cache_invalidations', 'Search result cache generations started by event changes', registry=REGISTRY)
+
+# Buffered event view ingestion (app.analytics.view_buffer)
+EVENT_VIEWS_BUFFERED = Counter('event_views_buffered', 'Event views accepted into the ingestion buffer', registry=REGISTRY)
+EVENT_VIEWS_WRITTEN = Counter('event_views_written', 'Event views written to the database', registry=REGISTRY)
+EVENT_VIEWS_DROPPED = Counter('event_views_dropped', 'Event views dropped before reaching the database', ['reason'], registry=REGISTRY)
+EVENT_VIEW_FLUSH_ROWS = Histogram(
+    'event_view_flush_rows', 'Rows written per event view flush',
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500), registry=REGISTRY
+)
+
+_metrics_server_started = False
+_metrics_server_lock = threading.Lock()
+
+def start_metrics_server():
+    # Serves REGISTRY on METRICS_PORT/metrics from inside the app process so Prometheus can
+    # scrape each replica directly. Streamlit re-runs main.py on every interaction, so only
+    # the first call starts the server.
+    global _metrics_server_started
+    port = os.getenv('METRICS_PORT')
+    if not port:
+        return
+    with _metrics_server_lock:
+        if not _metrics_server_started:
+            start_http_server(int(port), registry=REGISTRY)
+            _metrics_server_started = True
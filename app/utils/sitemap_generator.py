@@ -1,4 +1,4 @@
-from app.database.db import execute_query
+from app.database.db import stream_query
 from app.utils.seo_utils import generate_seo_friendly_url
 import xml.etree.ElementTree as ET
 from datetime import datetime
@@ -19,7 +19,7 @@ def generate_sitemap():
         lastmod.text = datetime.now().strftime("%Y-%m-%d")
 
     # Add event pages
-    events = execute_query("SELECT id, title, updated_at FROM events WHERE is_published = TRUE")
+    events = stream_query("SELECT id, title, updated_at FROM events WHERE is_published = TRUE")
     for event in events:
         url = ET.SubElement(root, "url")
         loc = ET.SubElement(url, "loc")
@@ -29,7 +29,7 @@ def generate_sitemap():
         lastmod.text = event['updated_at'].strftime("%Y-%m-%d")
 
     # Add blog post pages
-    blog_posts = execute_query("SELECT id, title, updated_at FROM blog_posts WHERE is_published = TRUE")
+    blog_posts = stream_query("SELECT id, title, updated_at FROM blog_posts WHERE is_published = TRUE")
     for post in blog_posts:
         url = ET.SubElement(root, "url")
         loc = ET.SubElement(url, "loc")
@@ -0,0 +1,71 @@
+import argparse
+import json
+import random
+import time
+from app.search.autocomplete import CompletionIndex, load_completion_entries, _add_weight
+from benchmarks.catalog import synthetic_documents
+from benchmarks.search_index import percentile
+
+# Autocomplete index: build time and completion latency for prefixes of 1 to 8 characters.
+#
+#   python -m benchmarks.autocomplete --events 1000000              # synthetic, no database
+#   python -m benchmarks.autocomplete --from-database               # published events in DB_*
+
+def synthetic_entries(num_events, seed):
+    # Popularity is heavy-tailed, as access counts are: most events have few grants
+    rng = random.Random(seed)
+    entries = {}
+    for doc in synthetic_documents(num_events):
+        weight = int(rng.paretovariate(1.2)) - 1
+        entries[('event', doc['id'])] = (doc['title'], weight)
+        for kind, labels in (('category', doc['categories']), ('tag', doc['tags'])):
+            for label_id, name in labels.items():
+                _add_weight(entries, kind, label_id, name, weight)
+        _add_weight(entries, 'provider', doc['content_provider_id'], doc['content_provider_name'], weight)
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description="Autocomplete benchmark")
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--from-database', action='store_true', help="complete the published events in the database")
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    entries = load_completion_entries() if args.from_database else synthetic_entries(args.events, args.seed)
+    started = time.perf_counter()
+    index = CompletionIndex(entries)
+    build_s = time.perf_counter() - started
+    print(f"Indexed {len(index)} entries in {build_s:.1f} s")
+
+    rng = random.Random(args.seed)
+    texts = [text for text, _ in entries.values()]
+    latencies = {}
+    for _ in range(args.queries):
+        length = rng.randint(1, 8)
+        prefix = rng.choice(texts)[:length]
+        started = time.perf_counter()
+        index.complete(prefix, args.limit)
+        latencies.setdefault(length, []).append((time.perf_counter() - started) * 1_000_000)
+    results = [
+        {
+            "prefix_length": length,
+            "queries": len(samples),
+            "p50_us": round(percentile(samples, 50), 1),
+            "p95_us": round(percentile(samples, 95), 1),
+            "p99_us": round(percentile(samples, 99), 1),
+        }
+        for length, samples in sorted(latencies.items())
+    ]
+    for result in results:
+        print(f"prefix of {result['prefix_length']}: p50 {result['p50_us']} us, p95 {result['p95_us']} us")
+    print(json.dumps({
+        "benchmark": "autocomplete",
+        "entries": len(index),
+        "build_s": round(build_s, 2),
+        "results": results,
+    }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+from app.database.db import execute_query, execute_many
+
+# Synthetic catalog for benchmarks: providers, published events with word-salad titles and
+# descriptions drawn from VOCABULARY (so text searches have realistic selectivity), and
+# category/tag links. Everything is seeded, so the same arguments produce the same catalog.
+#
+# Distributions follow real catalogs rather than uniform ones: category, tag and provider
+# popularity falls off with rank (Zipf), most events have no ratings while a few have
+# hundreds, ratings lean positive, and a fifth of events are free.
+
+VOCABULARY = [
+    "jazz", "rock", "festival", "concert", "live", "acoustic", "orchestra", "symphony", "opera", "choir",
+    "python", "javascript", "cloud", "kubernetes", "security", "data", "machine", "learning", "startup", "product",
+    "marketing", "finance", "leadership", "strategy", "sales", "founder", "investor", "pitch", "growth", "design",
+    "football", "tennis", "marathon", "cycling", "yoga", "fitness", "boxing", "climbing", "swimming", "chess",
+    "painting", "sculpture", "gallery", "photography", "film", "theatre", "dance", "poetry", "comedy", "improv",
+    "cooking", "wine", "coffee", "baking", "vegan", "street", "food", "tasting", "brewery", "cocktail",
+    "meditation", "nutrition", "wellness", "mindfulness", "therapy", "sleep", "running", "health", "recovery", "breath",
+    "history", "science", "physics", "astronomy", "biology", "climate", "ocean", "robotics", "space", "energy",
+    "workshop", "masterclass", "webinar", "summit", "meetup", "bootcamp", "keynote", "panel", "hackathon", "retreat",
+    "charity", "community", "family", "kids", "student", "career", "networking", "virtual", "weekend", "evening",
+]
+CATEGORY_NAMES = [
+    "Music", "Technology", "Business", "Sports", "Arts",
+    "Food & Drink", "Health & Wellness", "Education", "Entertainment", "Networking",
+]
+TAG_NAMES = [
+    "Virtual", "In-Person", "Webinar", "Conference", "Workshop", "Networking", "Tech", "Business",
+    "Creative", "Health", "Education", "Entertainment", "Charity", "Sports", "Music",
+]
+
+def _words(rng, count):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(count))
+
+def _zipf_cum_weights(count, exponent=1.0):
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+CATEGORY_CUM_WEIGHTS = _zipf_cum_weights(len(CATEGORY_NAMES))
+TAG_CUM_WEIGHTS = _zipf_cum_weights(len(TAG_NAMES))
+
+def _pick(rng, cum_weights, k):
+    # k distinct indexes, drawn by popularity
+    picked = set()
+    while len(picked) < k:
+        picked.add(rng.choices(range(len(cum_weights)), cum_weights=cum_weights)[0])
+    return sorted(picked)
+
+def _synthetic_event(rng, now):
+    # Fields of one event; categories and tags are indexes into CATEGORY_NAMES and TAG_NAMES
+    start_time = now + timedelta(minutes=rng.randint(-30 * 24 * 60, 365 * 24 * 60))
+    rating_count = min(int(rng.paretovariate(1.2)) - 1, 1000)
+    quality = 1 + 4 * rng.betavariate(5, 2)
+    rating_sum = sum(min(5, max(1, round(rng.gauss(quality, 1)))) for _ in range(rating_count))
+    return {
+        'title': _words(rng, rng.randint(3, 7)).title(),
+        'description': _words(rng, rng.randint(20, 60)),
+        'start_time': start_time,
+        'end_time': start_time + timedelta(hours=rng.randint(1, 8)),
+        'price': 0 if rng.random() < 0.2 else round(min(rng.lognormvariate(3.4, 0.9), 1000), 2),
+        'is_published': rng.random() < 0.9,
+        'average_rating': round(rating_sum / rating_count, 2) if rating_count else 0,
+        'rating_sum': rating_sum,
+        'total_ratings': rating_count,
+        'categories': _pick(rng, CATEGORY_CUM_WEIGHTS, 1 if rng.random() < 0.7 else 2),
+        'tags': _pick(rng, TAG_CUM_WEIGHTS, rng.randint(1, 3)),
+    }
+
+def _ids_by_name(table, names):
+    execute_many(f"INSERT INTO {table} (name) VALUES (%s) ON DUPLICATE KEY UPDATE name = VALUES(name)",
+                 [(name,) for name in names])
+    rows = execute_query(f"SELECT id, name FROM {table} WHERE name IN %s", (tuple(names),))
+    return [row['id'] for row in rows]
+
+def generate_catalog(num_events, num_providers=1000, seed=42, batch_size=5000, log=print):
+    # Returns the number of events inserted. Safe to run against a database that already
+    # holds a catalog: providers are reused by username.
+    rng = random.Random(seed)
+    execute_many(
+        """
+        INSERT INTO users (username, email, password_hash, role_id, is_content_provider)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE email = VALUES(email)
+        """,
+        [(f"bench_provider_{i}", f"bench_provider_{i}@example.com", "x", 2, True) for i in range(num_providers)]
+    )
+    providers = execute_query("SELECT id FROM users WHERE username LIKE %s", ("bench_provider_%",))
+    provider_ids = [row['id'] for row in providers]
+    category_ids = _ids_by_name("categories", CATEGORY_NAMES)
+    tag_ids = _ids_by_name("tags", TAG_NAMES)
+
+    provider_cum_weights = _zipf_cum_weights(len(provider_ids), 0.8)
+
+    now = datetime.now().replace(microsecond=0)
+    inserted = 0
+    while inserted < num_events:
+        count = min(batch_size, num_events - inserted)
+        events = []
+        for _ in range(count):
+            event = _synthetic_event(rng, now)
+            event['content_provider_id'] = rng.choices(provider_ids, cum_weights=provider_cum_weights)[0]
+            events.append(event)
+        first_id = _insert_events([
+            (event['content_provider_id'], event['title'], event['description'], event['start_time'],
+             event['end_time'], event['price'], event['is_published'], event['average_rating'],
+             event['rating_sum'], event['total_ratings'])
+            for event in events
+        ])
+        execute_many(
+            "INSERT INTO event_categories (event_id, category_id) VALUES (%s, %s)",
+            [(first_id + i, category_ids[index]) for i, event in enumerate(events) for index in event['categories']]
+        )
+        execute_many(
+            "INSERT INTO event_tags (event_id, tag_id) VALUES (%s, %s)",
+            [(first_id + i, tag_ids[index]) for i, event in enumerate(events) for index in event['tags']]
+        )
+        inserted += count
+        log(f"  {inserted}/{num_events} events")
+    return inserted
+
+def synthetic_documents(num_events, num_providers=1000, seed=42):
+    # The same kind of events as generate_catalog, as search index documents and without a
+    # database, for benchmarking the in-process index on its own
+    rng = random.Random(seed)
+    provider_cum_weights = _zipf_cum_weights(num_providers, 0.8)
+    now = datetime.now().replace(microsecond=0)
+    for event_id in range(1, num_events + 1):
+        event = _synthetic_event(rng, now)
+        provider_id = rng.choices(range(num_providers), cum_weights=provider_cum_weights)[0]
+        del event['is_published'], event['rating_sum']
+        event.update(
+            id=event_id,
+            content_provider_id=provider_id,
+            content_provider_name=f"bench_provider_{provider_id}",
+            categories={i + 1: CATEGORY_NAMES[i] for i in event['categories']},
+            tags={i + 1: TAG_NAMES[i] for i in event['tags']},
+        )
+        yield event
+
+def _insert_events(rows):
+    # Bulk insert; returns the id of the first row (ids of one multi-row INSERT are consecutive)
+    execute_many(
+        """
+        INSERT INTO events (content_provider_id, title, description, start_time, end_time, price,
+                            is_published, average_rating, rating_sum, total_ratings)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """,
+        rows, batch_size=len(rows)
+    )
+    return execute_query("SELECT MAX(id) AS last_id FROM events")[0]['last_id'] - len(rows) + 1
@@ -0,0 +1,63 @@
+import argparse
+import json
+import random
+import statistics
+import time
+from app.database.db import execute_query
+from app.database.migrations import run_migrations
+from app.search import search_engine
+from benchmarks.catalog import generate_catalog, VOCABULARY
+
+# FULLTEXT (natural-language and boolean) vs LIKE search over a generated catalog.
+#
+#   python -m benchmarks.fulltext_search --events 1000000
+#
+# Needs a MySQL database (DB_* settings); load the catalog once and reuse it with --skip-load.
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def time_mode(mode, queries, per_page):
+    latencies = []
+    for search_query in queries:
+        # Time the search, not the result cache
+        search_engine.invalidate_search_results()
+        started = time.perf_counter()
+        search_engine.advanced_search(search_query=search_query, search_mode=mode, per_page=per_page,
+                                      sort_by='relevance' if mode != 'like' else 'start_time')
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "mode": mode,
+        "queries": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "mean_ms": round(statistics.mean(latencies), 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="FULLTEXT vs LIKE event search benchmark")
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--per-page', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--skip-load', action='store_true', help="reuse the catalog already in the database")
+    args = parser.parse_args()
+
+    run_migrations()
+    if not args.skip_load:
+        print(f"Generating {args.events} events...")
+        generate_catalog(args.events)
+    total = execute_query("SELECT COUNT(*) AS total FROM events")[0]['total']
+    if not search_engine.fulltext_available():
+        print("FULLTEXT index missing: natural/boolean modes will fall back to LIKE")
+
+    rng = random.Random(args.seed)
+    queries = [" ".join(rng.sample(VOCABULARY, rng.randint(1, 2))) for _ in range(args.queries)]
+    results = [time_mode(mode, queries, args.per_page) for mode in ('like', 'natural', 'boolean')]
+    for result in results:
+        print(f"{result['mode']:>8}: p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms")
+    print(json.dumps({"benchmark": "fulltext_search", "events": total, "results": results}))
+
+if __name__ == "__main__":
+    main()
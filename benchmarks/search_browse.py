@@ -0,0 +1,175 @@
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from app.database import db
+from app.database.db import execute_query, pooled_connection
+from app.database.migrations import run_migrations
+from app.events.event_browser import get_all_events
+from app.events import event_management
+from app.events.event_management import get_event_details
+from app.search import search_engine
+from benchmarks.catalog import generate_catalog, VOCABULARY
+from benchmarks.search_index import percentile
+
+# Latency of the event browser's searches and the event landing page at production scale: a
+# seeded mix of query shapes run against a generated catalog. Reports p50/p95/p99 per shape
+# and, on MySQL, the rows the server examined per query (its Handler_read_* counters), and
+# writes the results as JSON so runs can be compared.
+#
+#   python -m benchmarks.search_browse --events 100000 --output before.json
+#   python -m benchmarks.search_browse --skip-load --baseline before.json
+#
+# Runs against the configured database; DB_BACKEND=sqlite works too but reports no rows
+# examined. Leave DB_REPLICA_HOSTS unset so every query reaches the server whose counters are
+# read, and use a database nothing else is querying.
+
+# Shapes whose call is made once untimed first, so the timed call is served from a cache
+WARM_SHAPES = {'event_details_cached'}
+
+def _text(rng):
+    return " ".join(rng.sample(VOCABULARY, rng.randint(1, 2)))
+
+def _price_range(rng):
+    low = rng.choice([0, 10, 25, 50, 100])
+    return {'min_price': low, 'max_price': low * 4 or 25}
+
+def query_shapes(today, category_ids, tag_ids, event_ids):
+    # name -> function(rng) returning the call to time. The browser's default date filter is
+    # the next 30 days.
+    window = {'start_date': today, 'end_date': today + timedelta(days=30)}
+    advanced_search = search_engine.advanced_search
+    return {
+        'search_browse': lambda rng: partial(advanced_search, **window),
+        'search_text_like': lambda rng: partial(advanced_search, search_query=_text(rng), search_mode='like'),
+        'search_text_fulltext': lambda rng: partial(advanced_search, search_query=_text(rng),
+                                                    search_mode='natural', sort_by='relevance'),
+        'search_filtered': lambda rng: partial(advanced_search, categories=rng.sample(category_ids, 2),
+                                               tags=[rng.choice(tag_ids)], **_price_range(rng), **window),
+        'search_top_rated': lambda rng: partial(advanced_search, sort_by='avg_rating', sort_order='DESC'),
+        'search_deep_page': lambda rng: partial(advanced_search, page=rng.randint(50, 100), **window),
+        'browser_keyset_facets': lambda rng: partial(search_engine.keyset_search, facets=True,
+                                                     categories=[rng.choice(category_ids)], **window),
+        'get_all_events': lambda rng: partial(get_all_events, categories=[rng.choice(category_ids)], **window),
+        'event_details_cold': lambda rng: partial(get_event_details, rng.choice(event_ids)),
+        'event_details_cached': lambda rng: partial(get_event_details, rng.choice(event_ids)),
+    }
+
+def rows_examined():
+    # Rows the MySQL server has read so far, or None on SQLite, which keeps no such count
+    if db.DB_BACKEND != 'mysql':
+        return None
+    with pooled_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW GLOBAL STATUS LIKE 'Handler_read%'")
+            return sum(int(value) for _, value in cursor.fetchall())
+
+def reset_caches():
+    search_engine.invalidate_search_results()
+    event_management._event_cache.clear()
+
+def time_mix(mix):
+    # mix: [(shape, call)]. Returns {shape: ([latency ms], [rows examined])}.
+    first = rows_examined()
+    # Reads made by one rows_examined() call, taken off every measurement
+    overhead = rows_examined() - first if first is not None else 0
+    samples = {}
+    for shape, call in mix:
+        reset_caches()
+        if shape in WARM_SHAPES:
+            call()
+        before = rows_examined()
+        started = time.perf_counter()
+        call()
+        latency = (time.perf_counter() - started) * 1000
+        after = rows_examined()
+        latencies, examined = samples.setdefault(shape, ([], []))
+        latencies.append(latency)
+        if before is not None:
+            examined.append(max(0, after - before - overhead))
+    return samples
+
+def summarize(samples):
+    return [
+        {
+            "shape": shape,
+            "queries": len(latencies),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "mean_ms": round(statistics.mean(latencies), 2),
+            "rows_examined": round(statistics.mean(examined)) if examined else None,
+        }
+        for shape, (latencies, examined) in sorted(samples.items())
+    ]
+
+def compare(results, baseline):
+    # Prints each shape's change from a previous run's JSON output
+    previous = {result['shape']: result for result in baseline['results']}
+    for result in results:
+        old = previous.get(result['shape'])
+        if not old:
+            continue
+        changes = [f"{key[:-3]} {(result[key] - old[key]) / old[key]:+.0%}"
+                   for key in ('p50_ms', 'p95_ms', 'p99_ms') if old[key]]
+        if result['rows_examined'] is not None and old.get('rows_examined'):
+            changes.append(f"rows {(result['rows_examined'] - old['rows_examined']) / old['rows_examined']:+.0%}")
+        print(f"{result['shape']:>22}: {', '.join(changes)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Event search, browse and landing page benchmark")
+    parser.add_argument('--events', type=int, default=100_000, help="catalog size, 10k to 1M")
+    parser.add_argument('--providers', type=int, default=1000)
+    parser.add_argument('--queries', type=int, default=100, help="timed queries per shape")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--skip-load', action='store_true', help="reuse the catalog already in the database")
+    parser.add_argument('--output', help="also write the JSON results to this file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    run_migrations()
+    if not args.skip_load:
+        print(f"Generating {args.events} events...")
+        generate_catalog(args.events, args.providers)
+    total = execute_query("SELECT COUNT(*) AS total FROM events")[0]['total']
+    bounds = execute_query("SELECT MIN(id) AS first_id, MAX(id) AS last_id FROM events")[0]
+    category_ids = [row['id'] for row in execute_query("SELECT id FROM categories")]
+    tag_ids = [row['id'] for row in execute_query("SELECT id FROM tags")]
+    fulltext = search_engine.fulltext_available()
+    if not fulltext:
+        print("FULLTEXT index missing: search_text_fulltext falls back to LIKE")
+
+    rng = random.Random(args.seed)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    shapes = query_shapes(today, category_ids, tag_ids, range(bounds['first_id'], bounds['last_id'] + 1))
+    mix = [(shape, make_call(rng)) for shape, make_call in shapes.items() for _ in range(args.queries)]
+    rng.shuffle(mix)
+    # One untimed call per shape fills the connection pool and the filter list caches
+    time_mix([(shape, make_call(rng)) for shape, make_call in shapes.items()])
+
+    results = summarize(time_mix(mix))
+    for result in results:
+        rows = f", {result['rows_examined']} rows examined" if result['rows_examined'] is not None else ""
+        print(f"{result['shape']:>22}: p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+              f"p99 {result['p99_ms']} ms{rows}")
+    output = {
+        "benchmark": "search_browse",
+        "backend": db.DB_BACKEND,
+        "events": total,
+        "fulltext": fulltext,
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+    print(json.dumps(output))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from app.search.inverted_index import SearchIndex
+from app.search.event_index import load_event_documents
+from benchmarks.catalog import synthetic_documents, VOCABULARY
+
+# In-process BM25 index: build, snapshot save/load, and query latency for a mix of text,
+# filtered and browse queries.
+#
+#   python -m benchmarks.search_index --events 1000000              # synthetic, no database
+#   python -m benchmarks.search_index --from-database               # published events in DB_*
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def query_mix(rng, count):
+    queries = []
+    for _ in range(count):
+        kind = rng.choice(['text', 'text_filtered', 'browse'])
+        kwargs = {'sort_by': 'start_time'}
+        if kind != 'browse':
+            kwargs = {'text': " ".join(rng.sample(VOCABULARY, rng.randint(1, 2))), 'sort_by': 'relevance'}
+        if kind != 'text':
+            low = rng.randint(0, 400)
+            kwargs.update(min_price=low, max_price=low + 100, categories=[rng.randint(1, 10)])
+        queries.append((kind, kwargs))
+    return queries
+
+def time_queries(index, queries, per_page, facets=False):
+    latencies = {}
+    for kind, kwargs in queries:
+        started = time.perf_counter()
+        index.search(limit=per_page, facets=facets, **kwargs)
+        latencies.setdefault(kind, []).append((time.perf_counter() - started) * 1000)
+    return [
+        {
+            "query": kind,
+            "queries": len(samples),
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "mean_ms": round(statistics.mean(samples), 2),
+        }
+        for kind, samples in sorted(latencies.items())
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process search index benchmark")
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--from-database', action='store_true', help="index the published events in the database")
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--per-page', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--facets', action='store_true', help="also count the event browser's filter facets")
+    args = parser.parse_args()
+
+    docs = load_event_documents() if args.from_database else synthetic_documents(args.events)
+    started = time.perf_counter()
+    index = SearchIndex.build(docs)
+    build_s = time.perf_counter() - started
+    print(f"Indexed {len(index)} events in {build_s:.1f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "search_index.npz")
+        started = time.perf_counter()
+        index.save(path)
+        save_s = time.perf_counter() - started
+        snapshot_mb = os.path.getsize(path) / 1024 / 1024
+        started = time.perf_counter()
+        index = SearchIndex.load(path)
+        load_s = time.perf_counter() - started
+    print(f"Snapshot {snapshot_mb:.0f} MB: saved in {save_s:.2f} s, loaded in {load_s:.2f} s")
+
+    results = time_queries(index, query_mix(random.Random(args.seed), args.queries), args.per_page,
+                           args.facets)
+    for result in results:
+        print(f"{result['query']:>14}: p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms")
+    print(json.dumps({
+        "benchmark": "search_index",
+        "events": len(index),
+        "facets": args.facets,
+        "build_s": round(build_s, 2),
+        "snapshot_mb": round(snapshot_mb, 1),
+        "snapshot_save_s": round(save_s, 2),
+        "snapshot_load_s": round(load_s, 2),
+        "results": results,
+    }))
+
+if __name__ == "__main__":
+    main()
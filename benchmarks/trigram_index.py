@@ -0,0 +1,88 @@
+import argparse
+import json
+import random
+import time
+from app.search.fuzzy_search import TITLE_SIMILARITY, PROVIDER_SIMILARITY, FUZZY_MAX_EVENTS, FUZZY_MAX_PROVIDERS
+from app.search.trigram_index import TrigramIndex
+from benchmarks.catalog import synthetic_documents, VOCABULARY
+from benchmarks.search_index import percentile
+
+# Trigram indexes for fuzzy search: build time, size, and latency and recall of misspelled
+# title and username lookups. Recall is the share of lookups whose intended item is among
+# the matches.
+#
+#   python -m benchmarks.trigram_index --events 1000000 --providers 100000
+
+def misspell(rng, text):
+    # One typo: a dropped, doubled, swapped or replaced letter
+    i = rng.randrange(len(text) - 1)
+    kind = rng.choice(['drop', 'double', 'swap', 'replace'])
+    if kind == 'drop':
+        return text[:i] + text[i + 1:]
+    if kind == 'double':
+        return text[:i] + text[i] + text[i:]
+    if kind == 'swap':
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    return text[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + text[i + 1:]
+
+def usernames(rng, count):
+    return [f"{rng.choice(VOCABULARY)}_{rng.choice(VOCABULARY)}{rng.randint(1, 999)}" for _ in range(count)]
+
+def time_lookups(index, targets, threshold, limit, rng):
+    latencies, found = [], 0
+    for item_id, text in targets:
+        query = misspell(rng, text)
+        started = time.perf_counter()
+        matches = index.search(query, threshold, limit)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found += any(match_id == item_id for match_id, _ in matches)
+    return {
+        "lookups": len(targets),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "recall": round(found / len(targets), 3),
+    }
+
+def build(items, **kwargs):
+    started = time.perf_counter()
+    index = TrigramIndex.build(items, **kwargs)
+    return index, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Trigram index benchmark")
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--providers', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    titles = [(doc['id'], doc['title']) for doc in synthetic_documents(args.events, args.providers, args.seed)]
+    providers = list(enumerate(usernames(rng, args.providers), start=1))
+    title_index, title_build_s = build(titles, word_match=True)
+    provider_index, provider_build_s = build(providers)
+    print(f"Indexed {len(title_index)} titles in {title_build_s:.1f} s ({title_index.nbytes() / 2**20:.0f} MB), "
+          f"{len(provider_index)} usernames in {provider_build_s:.1f} s ({provider_index.nbytes() / 2**20:.0f} MB)")
+
+    results = {
+        "titles": time_lookups(title_index, rng.sample(titles, args.queries), TITLE_SIMILARITY, FUZZY_MAX_EVENTS,
+                               rng),
+        "providers": time_lookups(provider_index, rng.sample(providers, args.queries), PROVIDER_SIMILARITY,
+                                  FUZZY_MAX_PROVIDERS, rng),
+    }
+    for name, result in results.items():
+        print(f"{name:>9}: p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, recall {result['recall']}")
+    print(json.dumps({
+        "benchmark": "trigram_index",
+        "events": len(title_index),
+        "providers": len(provider_index),
+        "title_build_s": round(title_build_s, 2),
+        "provider_build_s": round(provider_build_s, 2),
+        "title_index_mb": round(title_index.nbytes() / 2**20, 1),
+        "provider_index_mb": round(provider_index.nbytes() / 2**20, 1),
+        "results": results,
+    }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+-- Composite indexes for the hottest access paths.
+-- Each index is registered in app/database/query_plans.py with the query it serves.
+
+-- advanced_search / event_browser: published events filtered and ordered by start_time
+CREATE INDEX idx_events_published_start ON events (is_published, start_time);
+
+-- get_events_by_provider: a provider's events newest first
+CREATE INDEX idx_events_provider_start ON events (content_provider_id, start_time);
+
+-- get_user_notifications: a user's notifications newest first
+CREATE INDEX idx_notifications_user_created ON notifications (user_id, created_at);
+
+-- get_event_views and analytics: views of an event within a time range
+CREATE INDEX idx_event_views_event_timestamp ON event_views (event_id, timestamp);
+
+-- get_comments: an event's comments newest first
+CREATE INDEX idx_comments_event_created ON comments (event_id, created_at);
+
+-- get_page_blocks: an event's blocks in display order
+CREATE INDEX idx_page_blocks_event_order ON page_blocks (event_id, order_index);
+
+-- Rating aggregates per event, answered from the index alone
+CREATE INDEX idx_ratings_event_rating ON ratings (event_id, rating);
+
+-- Category filter in search and recommendations: events in a category
+CREATE INDEX idx_event_categories_category_event ON event_categories (category_id, event_id);
+
+-- Tag filter in search: events with a tag
+CREATE INDEX idx_event_tags_tag_event ON event_tags (tag_id, event_id);
+
+-- Popularity and revenue queries: access grants per event over time
+CREATE INDEX idx_event_access_event_granted ON event_access (event_id, access_granted_at);
@@ -0,0 +1,8 @@
+-- Running sum of ratings per event, so add_rating can keep average_rating and
+-- total_ratings up to date with deltas instead of re-aggregating the ratings table
+ALTER TABLE events ADD COLUMN rating_sum INT NOT NULL DEFAULT 0;
+
+UPDATE events
+SET rating_sum = COALESCE((SELECT SUM(rating) FROM ratings WHERE event_id = events.id), 0),
+    total_ratings = (SELECT COUNT(*) FROM ratings WHERE event_id = events.id),
+    average_rating = COALESCE((SELECT AVG(rating) FROM ratings WHERE event_id = events.id), 0);
@@ -0,0 +1,3 @@
+-- advanced_search: MATCH(e.title, e.description) AGAINST (...) in natural-language and
+-- boolean mode. The column list must stay identical to the MATCH() in search_engine.py.
+CREATE FULLTEXT INDEX ft_events_title_description ON events (title, description);
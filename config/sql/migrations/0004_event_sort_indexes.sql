@@ -0,0 +1,9 @@
+-- keyset_search pages on (sort column, id) for every sort the event browser offers.
+-- idx_events_published_start (0001) already serves start_time; InnoDB secondary indexes end
+-- with the primary key, so each of these is ordered by (column, id) within published events.
+
+CREATE INDEX idx_events_published_price ON events (is_published, price);
+
+CREATE INDEX idx_events_published_rating ON events (is_published, average_rating);
+
+CREATE INDEX idx_events_published_rating_count ON events (is_published, total_ratings);
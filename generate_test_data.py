@@ -3,12 +3,14 @@ import random
 from datetime import datetime, timedelta
 import requests
 from faker import Faker
-from app.database.db import execute_query
+from app.database.db import execute_query, execute_many
 from app.storage.minio_client import upload_file
 from dotenv import load_dotenv
 import bcrypt
 import json
 from app.feedback.feedback_management import create_event_feedback, create_platform_feedback
+from app.notifications.notification_system import create_notifications
+from app.database.migrations import run_migrations
 
 load_dotenv()
 
@@ -78,9 +80,8 @@ def create_sample_categories():
         "Music", "Technology", "Business", "Sports", "Arts",
         "Food & Drink", "Health & Wellness", "Education", "Entertainment", "Networking"
     ]
-    for category in categories:
-        query = "INSERT INTO categories (name) VALUES (%s) ON DUPLICATE KEY UPDATE name = VALUES(name)"
-        execute_query(query, (category,))
+    query = "INSERT INTO categories (name) VALUES (%s) ON DUPLICATE KEY UPDATE name = VALUES(name)"
+    execute_many(query, [(category,) for category in categories])
 
 def create_sample_tags():
     sample_tags = [
@@ -88,12 +89,13 @@ def create_sample_tags():
         "Networking", "Tech", "Business", "Creative", "Health",
         "Education", "Entertainment", "Charity", "Sports", "Music"
     ]
-    for tag in sample_tags:
-        query = "INSERT INTO tags (name) VALUES (%s) ON DUPLICATE KEY UPDATE name = VALUES(name)"
-        execute_query(query, (tag,))
+    query = "INSERT INTO tags (name) VALUES (%s) ON DUPLICATE KEY UPDATE name = VALUES(name)"
+    execute_many(query, [(tag,) for tag in sample_tags])
 
 def create_events(content_providers):
     events = []
+    event_categories = []
+    event_tags = []
     categories = execute_query("SELECT id FROM categories")
     tags = execute_query("SELECT id FROM tags")
     for user_id, _ in content_providers:
@@ -118,18 +120,16 @@ def create_events(content_providers):
                 
                 # Assign random categories to the event
                 num_categories = random.randint(1, 5)
-                event_categories = random.sample(categories, num_categories)
-                for category in event_categories:
-                    query = "INSERT INTO event_categories (event_id, category_id) VALUES (%s, %s)"
-                    execute_query(query, (event_id, category['id']))
+                for category in random.sample(categories, num_categories):
+                    event_categories.append((event_id, category['id']))
                 
                 # Assign random tags to the event
                 num_tags = random.randint(1, 5)
-                event_tags = random.sample(tags, num_tags)
-                for tag in event_tags:
-                    query = "INSERT INTO event_tags (event_id, tag_id) VALUES (%s, %s)"
-                    execute_query(query, (event_id, tag['id']))
+                for tag in random.sample(tags, num_tags):
+                    event_tags.append((event_id, tag['id']))
     
+    execute_many("INSERT INTO event_categories (event_id, category_id) VALUES (%s, %s)", event_categories)
+    execute_many("INSERT INTO event_tags (event_id, tag_id) VALUES (%s, %s)", event_tags)
     return events
 
 def download_and_upload_file(url, bucket_name):
@@ -142,6 +142,7 @@ def download_and_upload_file(url, bucket_name):
     return None
 
 def create_videos(events):
+    rows = []
     for event_id in events:
         for _ in range(NUM_VIDEOS_PER_EVENT):
             title = fake.sentence()
@@ -165,14 +166,16 @@ def create_videos(events):
                     "es": f"{file_path}_es.vtt",
                 }
 
-                query = """
-                INSERT INTO videos (event_id, title, description, file_path, duration, qualities, subtitles)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """
-                params = (event_id, title, description, file_path, duration, json.dumps(qualities), json.dumps(subtitles))
-                execute_query(query, params)
+                rows.append((event_id, title, description, file_path, duration, json.dumps(qualities), json.dumps(subtitles)))
+
+    query = """
+    INSERT INTO videos (event_id, title, description, file_path, duration, qualities, subtitles)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+    execute_many(query, rows)
 
 def create_merchandise(events):
+    rows = []
     for event_id in events:
         for _ in range(NUM_MERCHANDISE_PER_EVENT):
             name = fake.word()  # Use word() instead of product_name()
@@ -183,14 +186,16 @@ def create_merchandise(events):
             image_path = download_and_upload_file(image_url, "merchandise")
 
             if image_path:
-                query = """
-                INSERT INTO merchandise (event_id, name, description, price, stock_quantity, image_path)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """
-                params = (event_id, name, description, price, stock_quantity, image_path)
-                execute_query(query, params)
+                rows.append((event_id, name, description, price, stock_quantity, image_path))
+
+    query = """
+    INSERT INTO merchandise (event_id, name, description, price, stock_quantity, image_path)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    """
+    execute_many(query, rows)
 
 def create_page_blocks(events):
+    rows = []
     for event_id in events:
         blocks = [
             ("Header", fake.catch_phrase(), {"font": "Arial", "font_size": 36, "color": "#000000"}),
@@ -200,70 +205,76 @@ def create_page_blocks(events):
             ("Button", json.dumps({"text": "Buy Now", "url": f"/event/{event_id}"}), {"background_color": "#4CAF50", "text_color": "#FFFFFF", "border_radius": 4})
         ]
         for index, (block_type, content, styles) in enumerate(blocks):
-            query = """
-            INSERT INTO page_blocks (event_id, block_type, content, order_index, styles)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            params = (event_id, block_type, content, index, json.dumps(styles))
-            execute_query(query, params)
+            rows.append((event_id, block_type, content, index, json.dumps(styles)))
+
+    query = """
+    INSERT INTO page_blocks (event_id, block_type, content, order_index, styles)
+    VALUES (%s, %s, %s, %s, %s)
+    """
+    execute_many(query, rows)
 
 def create_sample_comments_and_ratings(events, users):
+    comments = []
+    ratings = []
     for event_id in events:
         for _ in range(random.randint(0, 5)):  # 0 to 5 comments per event
             user_id = random.choice(users)[0]
             content = fake.paragraph()
-            query = """
-            INSERT INTO comments (user_id, event_id, content)
-            VALUES (%s, %s, %s)
-            """
-            execute_query(query, (user_id, event_id, content))
+            comments.append((user_id, event_id, content))
         
         for _ in range(random.randint(0, 10)):  # 0 to 10 ratings per event
             user_id = random.choice(users)[0]
             rating = random.randint(1, 5)
-            query = """
-            INSERT INTO ratings (user_id, event_id, rating)
-            VALUES (%s, %s, %s)
-            ON DUPLICATE KEY UPDATE rating = VALUES(rating)
-            """
-            execute_query(query, (user_id, event_id, rating))
-        
-        # Update average rating and total ratings for the event
+            ratings.append((user_id, event_id, rating))
+
+    query = """
+    INSERT INTO comments (user_id, event_id, content)
+    VALUES (%s, %s, %s)
+    """
+    execute_many(query, comments)
+
+    query = """
+    INSERT INTO ratings (user_id, event_id, rating)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE rating = VALUES(rating)
+    """
+    execute_many(query, ratings)
+
+    # Update average rating and total ratings for the events
+    if events:
         query = """
         UPDATE events e
-        SET average_rating = (SELECT AVG(rating) FROM ratings WHERE event_id = e.id),
+        SET average_rating = COALESCE((SELECT AVG(rating) FROM ratings WHERE event_id = e.id), 0),
+            rating_sum = COALESCE((SELECT SUM(rating) FROM ratings WHERE event_id = e.id), 0),
             total_ratings = (SELECT COUNT(*) FROM ratings WHERE event_id = e.id)
-        WHERE e.id = %s
+        WHERE e.id IN %s
         """
-        execute_query(query, (event_id,))
+        execute_query(query, (tuple(events),))
 
 def generate_sample_analytics_data(events, users):
+    views = []
     for event in events:
         # Generate sample views
         for _ in range(random.randint(50, 200)):
             user_id = random.choice(users)[0]
             timestamp = fake.date_time_between(start_date='-30d', end_date='now')
-            query = """
-            INSERT INTO event_views (event_id, user_id, timestamp)
-            VALUES (%s, %s, %s)
-            """
-            execute_query(query, (event, user_id, timestamp))
+            views.append((event, user_id, timestamp))
 
-def create_notification(user_id, message, notification_type, related_id=None):
     query = """
-    INSERT INTO notifications (user_id, message, notification_type, related_id, created_at, is_read)
-    VALUES (%s, %s, %s, %s, %s, %s)
+    INSERT INTO event_views (event_id, user_id, timestamp)
+    VALUES (%s, %s, %s)
     """
-    params = (user_id, message, notification_type, related_id, datetime.now(), False)
-    return execute_query(query, params)
+    execute_many(query, views)
 
 def create_sample_notifications(users, events):
+    rows = []
     for user in users:
         user_id = user[0]
         for _ in range(random.randint(1, 5)):
             event = random.choice(events)
             message = f"New event '{fake.catch_phrase()}' has been added!"
-            create_notification(user_id, message, 'new_event', event)
+            rows.append((user_id, message, 'new_event', event))
+    create_notifications(rows)
 
 def create_blog_post(author_id, title, content, is_published=False):
     query = """
@@ -302,6 +313,9 @@ def main():
     print("Creating tables...")
     create_tables()
 
+    print("Applying migrations...")
+    run_migrations()
+
     print("Creating sample categories...")
     create_sample_categories()
 
@@ -0,0 +1,16 @@
+import unittest
+from app.database.migrations import run_migrations
+from app.database.query_plans import HOT_QUERIES, check_query_plans
+
+class TestQueryPlans(unittest.TestCase):
+    # Runs against the database seeded by generate_test_data.py
+    def setUp(self):
+        run_migrations()
+
+    def test_hot_queries_use_indexes(self):
+        self.assertTrue(HOT_QUERIES)
+        regressions = check_query_plans()
+        self.assertEqual(regressions, {}, f"Hot queries regressed to full scans: {regressions}")
+
+if __name__ == '__main__':
+    unittest.main()
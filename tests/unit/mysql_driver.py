@@ -0,0 +1,51 @@
+from mysql.connector.connection import MySQLConnection
+from mysql.connector.constants import FieldType
+from mysql.connector.conversion import MySQLConverter
+from mysql.connector.cursor import MySQLCursor, MySQLCursorDict
+
+class OfflineMySQLConnection:
+    # A real mysql-connector connection that never reaches a server. Statements go through
+    # the driver's own parameter conversion, which rejects a tuple bound to "IN %s" as it
+    # does in production, and are recorded in `statements` instead of being sent. A SELECT
+    # or EXPLAIN returns the next list of row dicts queued in `results`, or no rows.
+    def __init__(self, results=None):
+        self._connection = MySQLConnection()
+        self._connection.set_converter_class(MySQLConverter)
+        self._connection._sql_mode = ''
+        self._connection.cmd_query = self._cmd_query
+        self._connection.cmd_query_iter = self._cmd_query_iter
+        self._connection.get_rows = self._get_rows
+        self.results = list(results or [])
+        self.statements = []
+        self._rows = []
+
+    def _cmd_query(self, query, *args, **kwargs):
+        statement = query.decode()
+        self.statements.append(statement)
+        if statement.lstrip().upper().startswith(("SELECT", "EXPLAIN")) and self.results:
+            rows = self.results.pop(0)
+            columns = list(rows[0]) if rows else ['result']
+            self._rows = [tuple(row[column] for column in columns) for row in rows]
+            return {'columns': [(column, FieldType.VAR_STRING, None, None, None, None, 1, 0, 33)
+                                for column in columns], 'eof': {}}
+        return {'affected_rows': 0, 'insert_id': 0, 'warning_count': 0, 'server_status': 0}
+
+    def _cmd_query_iter(self, statements):
+        for statement in bytes(statements).split(b';'):
+            yield self._cmd_query(statement.strip())
+
+    def _get_rows(self, *args, **kwargs):
+        rows, self._rows = self._rows, []
+        return rows, {'status_flag': 0, 'warning_count': 0}
+
+    def cursor(self, dictionary=False):
+        return (MySQLCursorDict if dictionary else MySQLCursor)(self._connection)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,105 @@
+import random
+import unittest
+from unittest.mock import patch
+from app.search import autocomplete
+from app.search.autocomplete import CompletionIndex, load_completion_entries
+
+def texts(completions):
+    return [completion['text'] for completion in completions]
+
+class TestCompletionIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = CompletionIndex({
+            ('event', 1): ("Jazz Night", 5),
+            ('event', 2): ("Jazz  Brunch", 9),
+            ('event', 3): ("Java Workshop", 1),
+            ('category', 1): ("Music", 14),
+            ('tag', 4): ("Jazz", 20),
+            ('provider', 7): ("jazzman", 3),
+        })
+
+    def test_completes_by_popularity(self):
+        self.assertEqual(texts(self.index.complete("JAZ")), ["Jazz", "Jazz  Brunch", "Jazz Night", "jazzman"])
+        self.assertEqual(texts(self.index.complete("ja", limit=2)), ["Jazz", "Jazz  Brunch"])
+        self.assertEqual(texts(self.index.complete("jazz   b")), ["Jazz  Brunch"])
+        self.assertEqual(self.index.complete("mu")[0], {'kind': 'category', 'id': 1, 'text': "Music", 'weight': 14.0})
+        self.assertEqual(self.index.complete(""), [])
+        self.assertEqual(self.index.complete("rock"), [])
+
+    def test_upsert_and_remove(self):
+        self.index.upsert('event', 1, "Jazz Night Live", 50)
+        self.index.upsert('event', 4, "Jam Session", 0)
+        self.index.remove('event', 2)
+        self.assertEqual(texts(self.index.complete("ja")), ["Jazz Night Live", "Jazz", "jazzman", "Java Workshop",
+                                                              "Jam Session"])
+        self.assertEqual(self.index.get('event', 1), ("Jazz Night Live", 50))
+        self.assertIsNone(self.index.get('event', 2))
+        self.index.rebuild()
+        self.assertEqual(texts(self.index.complete("jaz")), ["Jazz Night Live", "Jazz", "jazzman"])
+        self.assertEqual(len(self.index), 6)
+
+    def test_same_text_listed_once(self):
+        self.index.upsert('event', 5, "jazz night", 2)
+        self.assertEqual(texts(self.index.complete("jazz n")), ["Jazz Night"])
+
+    @patch('app.search.autocomplete.REBUILD_PENDING', 2)
+    def test_rebuilds_after_enough_changes(self):
+        self.index.upsert('event', 4, "Jam Session", 0)
+        self.assertEqual(len(self.index._pending), 1)
+        self.index.remove('event', 3)
+        self.assertEqual((self.index._pending, self.index._removed), ({}, set()))
+        self.assertEqual(texts(self.index.complete("jam")), ["Jam Session"])
+
+    @patch('app.search.autocomplete.CACHED_COMPLETIONS', 3)
+    @patch('app.search.autocomplete.HEAVY_RANGE', 4)
+    def test_cached_ranges_match_full_ranking(self):
+        rng = random.Random(3)
+        entries = {('event', i): ("".join(rng.choice("abc") for _ in range(rng.randint(1, 5))), rng.randint(0, 9))
+                   for i in range(300)}
+        index = CompletionIndex(entries)
+        self.assertIn("a", index._segment.cached)
+        for event_id in range(0, 300, 7):
+            index.remove('event', event_id)
+        for prefix in ("a", "ab", "abc", "b", "cab", "ccc"):
+            expected = sorted(((-weight, text.lower(), event_id) for (_, event_id), (text, weight) in entries.items()
+                               if text.startswith(prefix) and event_id % 7), key=lambda item: item[:2])
+            distinct = []
+            for weight, text, _ in expected:
+                if text not in distinct:
+                    distinct.append(text)
+            self.assertEqual(texts(index.complete(prefix, limit=5)), distinct[:5])
+
+class TestAutocompleteService(unittest.TestCase):
+    @patch('app.search.autocomplete.load_event_documents')
+    @patch('app.search.autocomplete.stream_query')
+    def test_load_completion_entries(self, mock_stream_query, mock_load):
+        mock_stream_query.return_value = iter([{"event_id": 1, "accesses": 4}, {"event_id": 2, "accesses": 1}])
+        mock_load.return_value = [
+            {"id": 1, "title": "Jazz", "categories": {3: "Music"}, "tags": {}, "content_provider_id": 9,
+             "content_provider_name": "alice"},
+            {"id": 2, "title": "Rock", "categories": {3: "Music"}, "tags": {5: "Live"}, "content_provider_id": 9,
+             "content_provider_name": "alice"},
+        ]
+        entries = load_completion_entries()
+        self.assertEqual(entries[('event', 1)], ("Jazz", 4))
+        self.assertEqual(entries[('category', 3)], ("Music", 5))
+        self.assertEqual(entries[('tag', 5)], ("Live", 1))
+        self.assertEqual(entries[('provider', 9)], ("alice", 5))
+
+    @patch('app.search.autocomplete.execute_query', return_value=[{"accesses": 2}])
+    @patch('app.search.autocomplete.load_event_documents')
+    def test_apply_event_update(self, mock_load, mock_execute_query):
+        index = CompletionIndex({('event', 1): ("Jazz", 3), ('category', 3): ("Music", 3)})
+        mock_load.return_value = [{"id": 2, "title": "Jazz Brunch", "categories": {3: "Music"}, "tags": {5: "Live"},
+                                   "content_provider_id": 9, "content_provider_name": "alice"}]
+        with patch('app.search.autocomplete._index', index):
+            autocomplete.apply_event_update('{"event_id": 2, "action": "update", "is_published": true}')
+            autocomplete.apply_event_update('{"event_id": 1, "action": "delete", "is_published": false}')
+        self.assertEqual(index.get('event', 2), ("Jazz Brunch", 2))
+        self.assertIsNone(index.get('event', 1))
+        self.assertEqual(index.get('category', 3), ("Music", 3.0))
+        self.assertEqual(texts(index.complete("l")), ["Live"])
+        mock_load.assert_called_once_with([2])
+
+if __name__ == '__main__':
+    unittest.main()
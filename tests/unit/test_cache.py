@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import patch, Mock
+from app.utils.cache import TTLCache
+
+class TestTTLCache(unittest.TestCase):
+    def test_least_recently_used_entry_evicted(self):
+        cache = TTLCache(2, 60, name="test")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    @patch('app.utils.cache.time.monotonic')
+    def test_entries_expire_after_ttl(self, mock_monotonic):
+        cache = TTLCache(10, 60, name="test")
+        mock_monotonic.return_value = 100
+        cache.set("a", 1)
+        mock_monotonic.return_value = 160
+        self.assertEqual(cache.get("a"), 1)
+        mock_monotonic.return_value = 161
+        self.assertIsNone(cache.get("a"))
+
+    def test_get_or_load(self):
+        cache = TTLCache(10, 60, name="test")
+        load = Mock(return_value={"id": 1})
+        cache.get_or_load(1, load)
+        cache.get_or_load(1, load)
+        load.assert_called_once_with(1)
+
+    def test_load_racing_an_invalidation_is_not_stored(self):
+        cache = TTLCache(10, 60, name="test")
+
+        def load(key):
+            cache.invalidate(key)
+            return "stale"
+
+        self.assertEqual(cache.get_or_load(1, load), "stale")
+        self.assertIsNone(cache.get(1))
+
+if __name__ == '__main__':
+    unittest.main()
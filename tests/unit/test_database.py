@@ -0,0 +1,251 @@
+import itertools
+import unittest
+from unittest.mock import MagicMock, patch
+from mysql.connector import Error
+import app.database.db as db
+from app.database.db import (
+    ConnectionPool, DatabaseError, execute_query, execute_many, execute_multi, stream_query, query_dataframe,
+    transaction, expand_params
+)
+from mysql_driver import OfflineMySQLConnection
+
+class TestConnectionPool(unittest.TestCase):
+    def test_reuses_released_connection(self):
+        connect = MagicMock(side_effect=lambda: MagicMock())
+        pool = ConnectionPool(connect, pool_size=2, max_overflow=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(connect.call_count, 1)
+
+    def test_overflow_connections_are_closed_on_release(self):
+        pool = ConnectionPool(lambda: MagicMock(), pool_size=1, max_overflow=1)
+        first = pool.acquire()
+        second = pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        second.close.assert_called_once()
+        first.close.assert_not_called()
+
+    def test_exhausted_pool_times_out(self):
+        pool = ConnectionPool(lambda: MagicMock(), pool_size=1, max_overflow=0, timeout=0.01)
+        pool.acquire()
+        self.assertIsNone(pool.acquire())
+
+    def test_unhealthy_connection_is_replaced(self):
+        stale = MagicMock()
+        stale.ping.side_effect = Error("gone away")
+        fresh = MagicMock()
+        pool = ConnectionPool(MagicMock(side_effect=[stale, fresh]), pool_size=1, max_overflow=0)
+        pool.release(pool.acquire())
+        self.assertIs(pool.acquire(), fresh)
+        stale.close.assert_called_once()
+
+    def test_closed_connection_is_discarded_on_release(self):
+        # A stream abandoned mid-way closes its connection, so the rollback on release fails
+        closed = MagicMock()
+        closed.rollback.side_effect = Error("MySQL Connection not available")
+        fresh = MagicMock()
+        pool = ConnectionPool(MagicMock(side_effect=[closed, fresh]), pool_size=1, max_overflow=0)
+        pool.release(pool.acquire())
+        self.assertEqual(pool.in_use, 0)
+        self.assertIs(pool.acquire(), fresh)
+
+    def test_idle_connection_is_recycled(self):
+        old = MagicMock()
+        new = MagicMock()
+        pool = ConnectionPool(MagicMock(side_effect=[old, new]), pool_size=1, max_overflow=0, recycle=-1)
+        pool.release(pool.acquire())
+        self.assertIs(pool.acquire(), new)
+        old.close.assert_called_once()
+
+class TestExecuteQuery(unittest.TestCase):
+    @patch('app.database.db.get_pool')
+    def test_select_returns_rows_and_releases_connection(self, mock_get_pool):
+        connection = MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [{"id": 1}]
+        mock_get_pool.return_value.acquire.return_value = connection
+
+        result = execute_query("SELECT * FROM events WHERE id = %s", (1,))
+        self.assertEqual(result, [{"id": 1}])
+        mock_get_pool.return_value.release.assert_called_once_with(connection)
+        connection.close.assert_not_called()
+
+class TestExpandParams(unittest.TestCase):
+    def test_sequences_become_one_placeholder_per_value(self):
+        query, params = expand_params("SELECT * FROM events WHERE id IN %s AND price >= %s AND tag IN %s",
+                                      ((1, 2, 3), 10, [4]))
+        self.assertEqual(query, "SELECT * FROM events WHERE id IN (%s, %s, %s) AND price >= %s AND tag IN (%s)")
+        self.assertEqual(params, (1, 2, 3, 10, 4))
+
+    def test_empty_sequence_matches_nothing(self):
+        self.assertEqual(expand_params("WHERE id IN %s", ((),)), ("WHERE id IN (NULL)", ()))
+
+    def test_scalar_params_and_escapes_are_untouched(self):
+        self.assertEqual(expand_params("WHERE id = %s", (1,)), ("WHERE id = %s", (1,)))
+        self.assertEqual(expand_params("WHERE title LIKE '100%%' AND id IN %s", ((1, 2),)),
+                         ("WHERE title LIKE '100%%' AND id IN (%s, %s)", (1, 2)))
+
+class TestMySQLParameters(unittest.TestCase):
+    # Through mysql-connector's real parameter handling rather than the SQLite shim
+    def setUp(self):
+        self.connection = OfflineMySQLConnection()
+        get_pool = patch('app.database.db.get_pool')
+        get_pool.start().return_value.acquire.return_value = self.connection
+        self.addCleanup(get_pool.stop)
+
+    def test_driver_rejects_unexpanded_tuple(self):
+        from mysql.connector import ProgrammingError
+        with self.assertRaises(ProgrammingError):
+            self.connection.cursor().execute("SELECT * FROM events WHERE id IN %s", ((1, 2),))
+
+    def test_in_lists_reach_mysql_expanded(self):
+        execute_query("SELECT * FROM events WHERE id IN %s AND title = %s", ((1, 2), "Jazz"))
+        execute_multi([("SELECT * FROM tags WHERE id IN %s", ((3, 4),)), ("SELECT COUNT(*) FROM tags", None)])
+        with transaction() as tx:
+            tx.execute("DELETE FROM event_tags WHERE event_id = %s AND tag_id IN %s", (1, (5, 6)))
+        self.assertEqual(self.connection.statements, [
+            "SELECT * FROM events WHERE id IN (1, 2) AND title = 'Jazz'",
+            "SELECT * FROM tags WHERE id IN (3, 4)",
+            "SELECT COUNT(*) FROM tags",
+            "DELETE FROM event_tags WHERE event_id = 1 AND tag_id IN (5, 6)",
+        ])
+
+class TestExecuteMany(unittest.TestCase):
+    @patch('app.database.db.get_pool')
+    def test_batches_rows_in_one_transaction(self, mock_get_pool):
+        connection = MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.rowcount = 2
+        mock_get_pool.return_value.acquire.return_value = connection
+
+        rows = [(1, 1), (1, 2), (1, 3), (1, 4), (1, 5)]
+        result = execute_many("INSERT INTO event_tags (event_id, tag_id) VALUES (%s, %s)", rows, batch_size=2)
+        self.assertEqual(cursor.executemany.call_count, 3)
+        self.assertEqual(cursor.executemany.call_args_list[-1][0][1], [(1, 5)])
+        connection.commit.assert_called_once()
+        self.assertEqual(result, 6)
+
+    @patch('app.database.db.get_pool')
+    def test_empty_rows_skip_the_database(self, mock_get_pool):
+        self.assertEqual(execute_many("INSERT INTO tags (name) VALUES (%s)", []), 0)
+        mock_get_pool.assert_not_called()
+
+class TestStreamQuery(unittest.TestCase):
+    def _mock_pool(self, mock_get_pool, chunks, column_names=()):
+        connection = MagicMock()
+        cursor = connection.cursor.return_value
+        cursor.fetchmany.side_effect = chunks + [[]]
+        cursor.column_names = column_names
+        mock_get_pool.return_value.acquire.return_value = connection
+        return connection, cursor
+
+    @patch('app.database.db.get_pool')
+    def test_yields_rows_chunk_by_chunk(self, mock_get_pool):
+        connection, cursor = self._mock_pool(mock_get_pool, [[{"id": 1}, {"id": 2}], [{"id": 3}]])
+        rows = list(stream_query("SELECT id FROM event_views", chunk_size=2))
+        self.assertEqual(rows, [{"id": 1}, {"id": 2}, {"id": 3}])
+        cursor.fetchmany.assert_called_with(2)
+        cursor.close.assert_called_once()
+        mock_get_pool.return_value.release.assert_called_once_with(connection)
+
+    @patch('app.database.db.get_pool')
+    def test_abandoned_stream_closes_connection(self, mock_get_pool):
+        connection, cursor = self._mock_pool(mock_get_pool, [[{"id": 1}, {"id": 2}], [{"id": 3}]])
+        stream = stream_query("SELECT id FROM event_views", chunk_size=2)
+        self.assertEqual(next(stream), {"id": 1})
+        stream.close()
+        connection.close.assert_called_once()
+        mock_get_pool.return_value.release.assert_called_once_with(connection)
+
+    @patch('app.database.db.get_pool')
+    def test_yields_whole_chunks(self, mock_get_pool):
+        self._mock_pool(mock_get_pool, [[{"id": 1}, {"id": 2}], [{"id": 3}]])
+        chunks = list(stream_query("SELECT id FROM event_views", chunk_size=2, chunks=True))
+        self.assertEqual(len(chunks), 2)
+
+    @patch('app.database.db.get_pool')
+    def test_query_dataframe_concatenates_chunks(self, mock_get_pool):
+        self._mock_pool(mock_get_pool, [[(1, 10), (2, 20)], [(3, 30)]], column_names=("date", "views"))
+        df = query_dataframe("SELECT date, views FROM event_views", chunk_size=2)
+        self.assertEqual(list(df.columns), ["date", "views"])
+        self.assertEqual(df['views'].sum(), 60)
+
+    @patch('app.database.db.get_pool')
+    def test_query_dataframe_empty_result(self, mock_get_pool):
+        self._mock_pool(mock_get_pool, [])
+        self.assertTrue(query_dataframe("SELECT date, views FROM event_views").empty)
+
+class TestTransaction(unittest.TestCase):
+    @patch('app.database.db.get_pool')
+    def test_commits_once_on_one_connection(self, mock_get_pool):
+        connection = MagicMock()
+        mock_get_pool.return_value.acquire.return_value = connection
+
+        with transaction() as tx:
+            tx.execute("UPDATE events SET title = %s WHERE id = %s", ("New", 1))
+            tx.execute("DELETE FROM event_tags WHERE event_id = %s", (1,))
+            tx.execute_many("INSERT INTO event_tags (event_id, tag_id) VALUES (%s, %s)", [(1, 2), (1, 3)])
+
+        connection.cursor.assert_called_once()
+        connection.commit.assert_called_once()
+        mock_get_pool.return_value.release.assert_called_once_with(connection)
+
+    @patch('app.database.db.get_pool')
+    def test_error_skips_commit_and_raises(self, mock_get_pool):
+        connection = MagicMock()
+        connection.cursor.return_value.execute.side_effect = [None, Error("lock wait timeout")]
+        mock_get_pool.return_value.acquire.return_value = connection
+
+        with self.assertRaises(DatabaseError):
+            with transaction() as tx:
+                tx.execute("UPDATE events SET title = %s WHERE id = %s", ("New", 1))
+                tx.execute("DELETE FROM event_tags WHERE event_id = %s", (1,))
+
+        connection.commit.assert_not_called()
+        mock_get_pool.return_value.release.assert_called_once_with(connection)
+
+class TestReplicaRouting(unittest.TestCase):
+    def setUp(self):
+        self.primary = ConnectionPool(lambda: MagicMock(), name="primary")
+        self.replicas = [ConnectionPool(lambda: MagicMock(), name=f"replica{i}") for i in range(2)]
+        patches = [
+            patch.object(db, 'DB_REPLICA_HOSTS', ['replica0', 'replica1']),
+            patch.object(db, '_pool', self.primary),
+            patch.object(db, '_replica_pools', self.replicas),
+            patch.object(db, '_replica_cycle', itertools.cycle(self.replicas)),
+            patch.object(db, '_last_write_at', {}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_reads_round_robin_across_replicas(self):
+        self.assertEqual([db.get_read_pool().name for _ in range(3)], ["replica0", "replica1", "replica0"])
+        self.assertIs(db.get_pool(), self.primary)
+
+    @patch.object(db, 'DB_REPLICA_ROUTING', 'least_loaded')
+    def test_least_loaded_picks_idlest_replica(self):
+        self.replicas[0].acquire()
+        self.assertIs(db.get_read_pool(), self.replicas[1])
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        db.mark_write()
+        self.assertIs(db.get_read_pool(), self.primary)
+
+    @patch.object(db, 'DB_READ_YOUR_WRITES_SECONDS', -1)
+    def test_read_your_writes_window_expires(self):
+        db.mark_write()
+        self.assertIsNot(db.get_read_pool(), self.primary)
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        for replica in self.replicas:
+            replica.acquire = MagicMock(return_value=None)
+        with db.pooled_connection(read=True) as connection:
+            self.assertIsNotNone(connection)
+        self.assertEqual(self.primary.in_use, 0)
+        self.assertEqual(self.primary._open, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from unittest.mock import patch
+from app.payments.entitlements import has_event_access, grant_event_access, get_owned_event_ids, _entitlements
+
+class TestEntitlements(unittest.TestCase):
+    def setUp(self):
+        _entitlements.clear()
+
+    @patch('app.payments.entitlements.execute_query')
+    def test_owned_events_loaded_once_per_user(self, mock_execute_query):
+        mock_execute_query.return_value = [{"event_id": 1}, {"event_id": 2}]
+        self.assertTrue(has_event_access(7, 1))
+        self.assertTrue(has_event_access(7, 2))
+        self.assertFalse(has_event_access(7, 3))
+        mock_execute_query.assert_called_once_with("SELECT event_id FROM event_access WHERE user_id = %s", (7,))
+
+    @patch('app.payments.entitlements.execute_query')
+    def test_anonymous_user_has_no_access(self, mock_execute_query):
+        self.assertFalse(has_event_access(None, 1))
+        mock_execute_query.assert_not_called()
+
+    @patch('app.payments.entitlements.execute_query')
+    def test_grant_invalidates_cached_set(self, mock_execute_query):
+        mock_execute_query.return_value = []
+        self.assertFalse(has_event_access(7, 1))
+        mock_execute_query.return_value = 1
+        self.assertTrue(grant_event_access(7, 1))
+        mock_execute_query.return_value = [{"event_id": 1}]
+        self.assertTrue(has_event_access(7, 1))
+
+    @patch('app.payments.entitlements.execute_query')
+    def test_failed_lookup_not_cached(self, mock_execute_query):
+        mock_execute_query.return_value = None
+        self.assertEqual(get_owned_event_ids(7), frozenset())
+        mock_execute_query.return_value = [{"event_id": 1}]
+        self.assertEqual(get_owned_event_ids(7), frozenset({1}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,27 @@
 import unittest
 from unittest.mock import patch
-from app.events.event_management import create_event, get_events_by_provider, update_event, delete_event
+from app.database.db import DatabaseError
+from datetime import datetime
+from app.events.event_management import create_event, get_events_by_provider, update_event, delete_event, get_event_details, add_comment, _event_cache
+from app.events.event_management import add_rating, reconcile_rating_aggregates, get_categories_and_tags_by_event
+from mysql_driver import OfflineMySQLConnection
 
 class TestEventManagement(unittest.TestCase):
-    @patch('app.events.event_management.execute_query')
-    def test_create_event(self, mock_execute_query):
-        mock_execute_query.return_value = 1
-        result = create_event(1, "Test Event", "Description", "2023-01-01 12:00:00", "2023-01-01 14:00:00", 10.0, [1], [1])
+    def setUp(self):
+        _event_cache.clear()
+
+    @patch('app.events.event_management.create_event_notification')
+    @patch('app.events.event_management.transaction')
+    def test_create_event(self, mock_transaction, mock_notification):
+        tx = mock_transaction.return_value.__enter__.return_value
+        tx.execute.return_value = 1
+        result = create_event(1, "Test Event", "Description", "2023-01-01 12:00:00", "2023-01-01 14:00:00", 10.0, [1, 2], [3])
         self.assertTrue(result)
+        tx.execute_many.assert_any_call(
+            "INSERT INTO event_categories (event_id, category_id) VALUES (%s, %s)", [(1, 1), (1, 2)]
+        )
+        tx.execute_many.assert_any_call("INSERT INTO event_tags (event_id, tag_id) VALUES (%s, %s)", [(1, 3)])
+        mock_notification.assert_called_once_with(1)
 
     @patch('app.events.event_management.execute_query')
     def test_get_events_by_provider(self, mock_execute_query):
@@ -19,11 +33,44 @@ class TestEventManagement(unittest.TestCase):
         self.assertEqual(len(events), 2)
         self.assertEqual(events[0]["title"], "Event 1")
 
-    @patch('app.events.event_management.execute_query')
-    def test_update_event(self, mock_execute_query):
-        mock_execute_query.return_value = True
-        result = update_event(1, "Updated Event", "New Description", "2023-01-01 12:00:00", "2023-01-01 14:00:00", 15.0, True, [1], [1])
+    @patch('app.events.event_management.apply_event_update')
+    @patch('app.events.event_management.publish_message')
+    @patch('app.events.event_management.transaction')
+    def test_update_event(self, mock_transaction, mock_publish_message, mock_apply_event_update):
+        tx = mock_transaction.return_value.__enter__.return_value
+        current_links = {
+            "SELECT category_id FROM event_categories WHERE event_id = %s FOR UPDATE": [{"category_id": 1}, {"category_id": 2}],
+            "SELECT tag_id FROM event_tags WHERE event_id = %s FOR UPDATE": [{"tag_id": 1}],
+        }
+        tx.execute.side_effect = lambda query, params=None: current_links.get(query, 1)
+        result = update_event(1, "Updated Event", "New Description", "2023-01-01 12:00:00", "2023-01-01 14:00:00", 15.0, True, [1, 3], [1])
+        self.assertTrue(result)
+        # Only the difference is written: category 2 removed, category 3 added, tags untouched
+        tx.execute.assert_any_call("DELETE FROM event_categories WHERE event_id = %s AND category_id IN %s", (1, (2,)))
+        tx.execute_many.assert_called_once_with("INSERT INTO event_categories (event_id, category_id) VALUES (%s, %s)", [(1, 3)])
+        self.assertNotIn("DELETE FROM event_tags", " ".join(call.args[0] for call in tx.execute.call_args_list))
+        # This process's indexes are updated directly, not only through its own NATS message
+        message = '{"event_id": 1, "action": "update", "is_published": true}'
+        mock_apply_event_update.assert_called_once_with(message)
+        mock_publish_message.assert_called_once_with("analytics.event_update", message)
+
+    @patch('app.events.event_management.publish_message')
+    @patch('app.database.db.get_pool')
+    def test_update_event_link_diff_through_mysql_driver(self, mock_get_pool, mock_publish_message):
+        connection = OfflineMySQLConnection(results=[[{"category_id": 1}, {"category_id": 2}], [{"tag_id": 1}]])
+        mock_get_pool.return_value.acquire.return_value = connection
+        result = update_event(1, "Updated Event", "New Description", "2023-01-01 12:00:00", "2023-01-01 14:00:00", 15.0, True, [1, 3], [1])
         self.assertTrue(result)
+        self.assertIn("DELETE FROM event_categories WHERE event_id = 1 AND category_id IN (2)", connection.statements)
+        self.assertIn("INSERT INTO event_categories (event_id, category_id) VALUES (1, 3)", connection.statements)
+
+    @patch('app.events.event_management.publish_message')
+    @patch('app.events.event_management.transaction')
+    def test_update_event_rolled_back(self, mock_transaction, mock_publish_message):
+        mock_transaction.return_value.__enter__.return_value.execute.side_effect = DatabaseError("deadlock")
+        result = update_event(1, "Updated Event", "New Description", "2023-01-01 12:00:00", "2023-01-01 14:00:00", 15.0, True, [1], [1])
+        self.assertFalse(result)
+        mock_publish_message.assert_not_called()
 
     @patch('app.events.event_management.execute_query')
     def test_delete_event(self, mock_execute_query):
@@ -31,5 +78,120 @@ class TestEventManagement(unittest.TestCase):
         result = delete_event(1)
         self.assertTrue(result)
 
+    def _public_event(self):
+        return [
+            [{"id": 1, "title": "Event", "start_time": datetime(2030, 1, 1), "end_time": datetime(2030, 1, 2)}],
+            [{"id": 1, "file_path": "a.mp4", "qualities": None, "subtitles": None},
+             {"id": 2, "file_path": "b.mp4", "qualities": None, "subtitles": None}],
+            [{"id": 1, "image_path": "shirt.png"}],
+            [],
+            [],
+            [{"kind": "category", "id": 1, "name": "Music"}, {"kind": "tag", "id": 2, "name": "Live"}],
+        ]
+
+    @patch('app.events.event_management.record_event_view')
+    @patch('app.events.event_management.get_secure_file_url', return_value="https://signed")
+    @patch('app.events.event_management.get_file_url', return_value="https://image")
+    @patch('app.events.event_management.get_user_rating', return_value=4)
+    @patch('app.events.event_management.has_event_access', side_effect=lambda user_id, event_id: user_id == 5)
+    @patch('app.events.event_management.execute_multi')
+    def test_get_event_details_cached_with_viewer_layer(self, mock_execute_multi, mock_has_access, mock_user_rating,
+                                                        mock_file_url, mock_secure_url, mock_record_view):
+        mock_execute_multi.return_value = self._public_event()
+        event = get_event_details(1, user_id=5)
+        self.assertEqual([video['url'] for video in event['videos']], ["https://signed", "https://signed"])
+        self.assertEqual(event['merchandise'][0]['image_url'], "https://image")
+        self.assertEqual(event['categories'], [{"id": 1, "name": "Music"}])
+        self.assertEqual(event['tags'], [{"id": 2, "name": "Live"}])
+        self.assertEqual(event['user_rating'], 4)
+        mock_record_view.assert_called_once_with(1, 5)
+
+        # A second viewer is served from the cache and never sees the first viewer's URLs or rating
+        anonymous = get_event_details(1)
+        mock_execute_multi.assert_called_once()
+        self.assertEqual([video['url'] for video in anonymous['videos']], [None, None])
+        self.assertNotIn('user_rating', anonymous)
+
+    @patch('app.events.event_management.get_file_url', return_value="https://image")
+    @patch('app.events.event_management.has_event_access', return_value=False)
+    @patch('app.events.event_management.execute_query')
+    @patch('app.events.event_management.execute_multi')
+    def test_add_comment_invalidates_event_cache(self, mock_execute_multi, mock_execute_query, mock_has_access,
+                                                 mock_file_url):
+        mock_execute_multi.side_effect = lambda statements: self._public_event()
+        get_event_details(1)
+        add_comment(5, 1, "Great show")
+        get_event_details(1)
+        self.assertEqual(mock_execute_multi.call_count, 2)
+
+    @patch('app.events.event_management.execute_multi')
+    def test_get_event_details_not_found(self, mock_execute_multi):
+        mock_execute_multi.return_value = [[], [], [], [], [], []]
+        self.assertIsNone(get_event_details(1))
+
+    @patch('app.events.event_management.transaction')
+    def test_add_rating_first_vote_adds_to_sum_and_count(self, mock_transaction):
+        tx = mock_transaction.return_value.__enter__.return_value
+        tx.execute.side_effect = [[], 1, 0]
+        self.assertTrue(add_rating(5, 1, 4))
+        self.assertEqual(tx.execute.call_args.args[1], (4, 1, 4, 1, 1))
+
+    @patch('app.events.event_management.apply_event_update')
+    @patch('app.events.event_management.publish_message')
+    @patch('app.events.event_management.transaction')
+    def test_add_rating_publishes_event_update(self, mock_transaction, mock_publish_message, mock_apply_event_update):
+        tx = mock_transaction.return_value.__enter__.return_value
+        tx.execute.side_effect = [[], 1, 0]
+        self.assertTrue(add_rating(5, 1, 4))
+        message = '{"event_id": 1, "action": "rating", "is_published": null}'
+        mock_apply_event_update.assert_called_once_with(message)
+        mock_publish_message.assert_called_once_with("analytics.event_update", message)
+
+    @patch('app.events.event_management.transaction')
+    def test_add_rating_changed_vote_applies_delta_only(self, mock_transaction):
+        tx = mock_transaction.return_value.__enter__.return_value
+        tx.execute.side_effect = [[{"rating": 5}], 1, 0]
+        self.assertTrue(add_rating(5, 1, 2))
+        self.assertEqual(tx.execute.call_args.args[1], (-3, 0, -3, 0, 1))
+
+    @patch('app.events.event_management.execute_query')
+    def test_reconcile_rating_aggregates(self, mock_execute_query):
+        mock_execute_query.side_effect = [[{"id": 3}, {"id": 8}], 2]
+        self.assertEqual(reconcile_rating_aggregates(), [3, 8])
+        self.assertEqual(mock_execute_query.call_args.args[1], ((3, 8),))
+
+    @patch('app.database.db.get_pool')
+    def test_reconcile_rating_aggregates_through_mysql_driver(self, mock_get_pool):
+        connection = OfflineMySQLConnection(results=[[{"id": 3}, {"id": 8}]])
+        mock_get_pool.return_value.acquire.return_value = connection
+        self.assertEqual(reconcile_rating_aggregates(), [3, 8])
+        self.assertTrue(connection.statements[1].rstrip().endswith("WHERE id IN (3, 8)"))
+
+    @patch('app.events.event_management.execute_query')
+    def test_get_categories_and_tags_by_event(self, mock_execute_query):
+        mock_execute_query.return_value = [
+            {"kind": "categories", "event_id": 1, "id": 3, "name": "Music"},
+            {"kind": "tags", "event_id": 2, "id": 4, "name": "Live"},
+        ]
+        labels = get_categories_and_tags_by_event([1, 2, 5])
+        mock_execute_query.assert_called_once()
+        self.assertEqual(mock_execute_query.call_args.args[1], ((1, 2, 5), (1, 2, 5)))
+        self.assertEqual(labels[1], {"categories": [{"id": 3, "name": "Music"}], "tags": []})
+        self.assertEqual(labels[2]["tags"], [{"id": 4, "name": "Live"}])
+        self.assertEqual(labels[5], {"categories": [], "tags": []})
+
+    @patch('app.database.db.get_pool')
+    def test_get_categories_and_tags_by_event_through_mysql_driver(self, mock_get_pool):
+        connection = OfflineMySQLConnection(results=[[
+            {"kind": "categories", "event_id": 1, "id": 3, "name": "Music"},
+            {"kind": "tags", "event_id": 2, "id": 4, "name": "Live"},
+        ]])
+        mock_get_pool.return_value.acquire.return_value = connection
+        labels = get_categories_and_tags_by_event([1, 2])
+        self.assertIn("WHERE ec.event_id IN (1, 2)", connection.statements[0])
+        self.assertIn("WHERE et.event_id IN (1, 2)", connection.statements[0])
+        self.assertEqual(labels[1]["categories"], [{"id": 3, "name": "Music"}])
+        self.assertEqual(labels[2]["tags"], [{"id": 4, "name": "Live"}])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,17 @@
+import unittest
+from unittest.mock import patch
+from generate_test_data import create_sample_comments_and_ratings
+from mysql_driver import OfflineMySQLConnection
+
+class TestGenerateTestData(unittest.TestCase):
+    @patch('app.database.db.get_pool')
+    def test_rating_backfill_runs_on_mysql_driver(self, mock_get_pool):
+        connection = OfflineMySQLConnection()
+        mock_get_pool.return_value.acquire.return_value = connection
+        create_sample_comments_and_ratings([1, 2], [(7,), (8,)])
+        backfill = connection.statements[-1]
+        self.assertIn("UPDATE events e", backfill)
+        self.assertIn("WHERE e.id IN (1, 2)", backfill)
+
+if __name__ == '__main__':
+    unittest.main()
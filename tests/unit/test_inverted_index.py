@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from app.search.inverted_index import SearchIndex, tokenize
+from app.search import event_index
+
+def make_doc(event_id, title, description="", price=10, start_time=datetime(2030, 1, 1), categories=None,
+             tags=None, provider_id=1, provider_name="alice", rating=0):
+    return {
+        "id": event_id, "title": title, "description": description, "price": price,
+        "start_time": start_time, "end_time": start_time, "average_rating": rating, "total_ratings": 1,
+        "content_provider_id": provider_id, "content_provider_name": provider_name,
+        "categories": categories or {}, "tags": tags or {},
+    }
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex.build([
+            make_doc(1, "Jazz Night", "live jazz and blues", price=20, categories={1: "Music"}),
+            make_doc(2, "Python Workshop", "learn python", price=50, categories={2: "Technology"}, tags={7: "Tech"},
+                     provider_id=2, provider_name="bob", start_time=datetime(2030, 2, 1)),
+            make_doc(3, "Blues Festival", "a weekend of jazz", price=80, categories={1: "Music"},
+                     start_time=datetime(2030, 3, 1), rating=4.5),
+        ])
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Jazz & Blues, LIVE!"), ["jazz", "blues", "live"])
+
+    def test_bm25_ranks_title_and_frequency(self):
+        event_ids, total, scores, _ = self.index.search("jazz", sort_by='relevance')
+        self.assertEqual(total, 2)
+        self.assertEqual(event_ids, [1, 3])
+        self.assertGreater(scores[0], scores[1])
+
+    def test_matches_labels_and_provider_name(self):
+        self.assertEqual(self.index.search("technology")[0], [2])
+        self.assertEqual(self.index.search("bob")[0], [2])
+
+    def test_filters(self):
+        self.assertEqual(self.index.search(categories=[1])[0], [1, 3])
+        self.assertEqual(self.index.search(tags=[7])[0], [2])
+        self.assertEqual(self.index.search(min_price=30, max_price=60)[0], [2])
+        self.assertEqual(self.index.search(start_time=datetime(2030, 2, 1))[0], [2, 3])
+        self.assertEqual(self.index.search(content_provider="ob")[0], [2])
+        self.assertEqual(self.index.search("jazz", categories=[2]), ([], 0, [], None))
+
+    def test_sorting_and_paging(self):
+        self.assertEqual(self.index.search(sort_by='price', sort_order='DESC')[0], [3, 2, 1])
+        self.assertEqual(self.index.search(sort_by='avg_rating', sort_order='DESC', limit=1)[0], [3])
+        self.assertEqual(self.index.search(offset=1, limit=1), ([2], 3, [0.0], None))
+
+    def test_facet_counts(self):
+        _, total, _, facets = self.index.search("jazz", categories=[2], facets=True)
+        self.assertEqual(total, 0)
+        # Each facet ignores its own filter: the category counts are those of "jazz" alone
+        self.assertEqual(facets["categories"], {1: 2})
+        self.assertEqual(facets["providers"], {})
+        _, _, _, facets = self.index.search(min_price=30, facets=True)
+        self.assertEqual(facets["price"], {0: 1, 2: 2})
+        self.assertEqual(facets["providers"], {"alice": 1, "bob": 1})
+        self.assertEqual(facets["tags"], {7: 1})
+
+    def test_upsert_and_remove(self):
+        self.index.upsert(make_doc(2, "Jazz Piano", categories={1: "Music"}))
+        self.index.remove(1)
+        self.assertEqual(self.index.search("jazz", sort_by='relevance')[0], [2, 3])
+        self.assertEqual(self.index.search("python")[1], 0)
+        self.index.compact()
+        self.assertEqual(self.index.search(categories=[1])[0], [2, 3])
+        self.assertEqual(len(self.index), 2)
+
+    def test_snapshot_round_trip(self):
+        self.index.upsert(make_doc(4, "Jazz Brunch", price=5))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index.npz")
+            self.index.save(path)
+            loaded = SearchIndex.load(path)
+        for kwargs in ({"text": "jazz", "sort_by": "relevance"}, {"categories": [1]}, {"sort_by": "price"}):
+            self.assertEqual(loaded.search(**kwargs), self.index.search(**kwargs))
+        self.assertIsNotNone(loaded.snapshot_at)
+
+class TestEventIndex(unittest.TestCase):
+    @patch('app.search.event_index.stream_query')
+    def test_load_event_documents_merges_labels(self, mock_stream_query):
+        mock_stream_query.side_effect = [
+            iter([{"event_id": 1, "kind": "categories", "id": 5, "name": "Music"},
+                  {"event_id": 2, "kind": "tags", "id": 9, "name": "Live"},
+                  {"event_id": 3, "kind": "tags", "id": 9, "name": "Live"}]),
+            iter([{"id": 1, "title": "A"}, {"id": 3, "title": "C"}]),
+        ]
+        docs = list(event_index.load_event_documents())
+        self.assertEqual(docs[0]["categories"], {5: "Music"})
+        self.assertEqual(docs[1]["tags"], {9: "Live"})
+
+    @patch('app.search.event_index.load_event_documents')
+    def test_apply_event_update(self, mock_load):
+        index = SearchIndex.build([make_doc(1, "Jazz"), make_doc(2, "Rock")])
+        mock_load.return_value = [make_doc(1, "Jazz Night")]
+        with patch('app.search.event_index._index', index):
+            event_index.apply_event_update('{"event_id": 1, "action": "update", "is_published": true}')
+            event_index.apply_event_update('{"event_id": 2, "action": "delete", "is_published": false}')
+            mock_load.return_value = []
+            event_index.apply_event_update('{"event_id": 1, "action": "update", "is_published": false}')
+        self.assertEqual(len(index), 0)
+        mock_load.assert_called_with([1])
+
+    @patch('app.search.event_index.load_event_documents')
+    def test_update_before_first_use_does_not_build_index(self, mock_load):
+        with patch('app.search.event_index._index', None):
+            event_index.apply_event_update('{"event_id": 1, "action": "update", "is_published": true}')
+        mock_load.assert_not_called()
+
+    @patch('app.search.event_index.catch_up')
+    def test_periodic_catch_up_covers_time_since_last_run(self, mock_catch_up):
+        index = SearchIndex.build([make_doc(1, "Jazz")])
+        last_run = datetime(2020, 1, 1)
+        with patch('app.search.event_index._index', index), patch('app.search.event_index._caught_up_at', last_run):
+            event_index._catch_up_periodically()
+            mock_catch_up.assert_called_once_with(index, last_run)
+            self.assertGreater(event_index._caught_up_at, last_run)
+
+if __name__ == '__main__':
+    unittest.main()
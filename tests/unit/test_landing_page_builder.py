@@ -0,0 +1,29 @@
+import unittest
+from unittest.mock import patch
+from app.landing_page.builder import update_page_block
+
+class TestLandingPageBuilder(unittest.TestCase):
+    @patch('app.landing_page.builder.invalidate_event_cache')
+    @patch('app.landing_page.builder.transaction')
+    def test_move_block_updates_only_shifted_blocks(self, mock_transaction, mock_invalidate):
+        tx = mock_transaction.return_value.__enter__.return_value
+        blocks = [{"id": block_id, "event_id": 7, "order_index": index} for index, block_id in enumerate([10, 11, 12, 13])]
+        tx.execute.side_effect = [blocks, 1]
+
+        self.assertTrue(update_page_block(12, "content", 1, {}))
+        tx.execute_many.assert_called_once_with(
+            "UPDATE page_blocks SET order_index = %s WHERE id = %s", [(1, 12), (2, 11)]
+        )
+        mock_invalidate.assert_called_once_with(7)
+
+    @patch('app.landing_page.builder.invalidate_event_cache')
+    @patch('app.landing_page.builder.transaction')
+    def test_unmoved_block_writes_no_order(self, mock_transaction, mock_invalidate):
+        tx = mock_transaction.return_value.__enter__.return_value
+        tx.execute.side_effect = [[{"id": 10, "event_id": 7, "order_index": 0}, {"id": 11, "event_id": 7, "order_index": 1}], 1]
+
+        self.assertTrue(update_page_block(11, "content", 1, {}))
+        tx.execute_many.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+import sqlite3
+from unittest.mock import patch
+from app.database.migrations import get_migrations, split_statements, run_migrations
+from app.database.query_plans import HOT_QUERIES, find_full_scans, check_query_plans
+from mysql_driver import OfflineMySQLConnection
+
+class TestMigrations(unittest.TestCase):
+    def test_split_statements_skips_comments(self):
+        script = "-- add index\nCREATE INDEX a ON t (x);\n\n-- another\nCREATE INDEX b ON t (y);\n"
+        self.assertEqual(split_statements(script), ["CREATE INDEX a ON t (x)", "CREATE INDEX b ON t (y)"])
+
+    def test_migrations_are_ordered_by_version(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ["0010_later.sql", "0002_earlier.sql", "notes.txt"]:
+                open(os.path.join(tmp, name), 'w').close()
+            self.assertEqual([m[1] for m in get_migrations(tmp)], ["0002_earlier.sql", "0010_later.sql"])
+
+    @patch('app.database.migrations.transaction')
+    @patch('app.database.migrations.execute_query')
+    def test_only_pending_migrations_are_applied(self, mock_execute_query, mock_transaction):
+        mock_execute_query.side_effect = [None, [{"version": "0001"}]]
+        tx = mock_transaction.return_value.__enter__.return_value
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "0001_done.sql"), 'w') as f:
+                f.write("CREATE INDEX a ON t (x);")
+            with open(os.path.join(tmp, "0002_new.sql"), 'w') as f:
+                f.write("CREATE INDEX b ON t (y);")
+            self.assertEqual(run_migrations(tmp), ["0002_new.sql"])
+        tx.execute.assert_any_call("CREATE INDEX b ON t (y)")
+        tx.execute.assert_any_call("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", ("0002", "0002_new.sql"))
+
+    def test_find_full_scans(self):
+        plan = [{"table": "e", "type": "ref"}, {"table": "r", "type": "ALL"}]
+        self.assertEqual(find_full_scans(plan), ["r"])
+
+    @patch('app.database.db.get_pool')
+    def test_hot_query_in_list_is_explained_through_mysql_driver(self, mock_get_pool):
+        plan = [{"table": "ec", "type": "range"}, {"table": "e", "type": "eq_ref"}]
+        connection = OfflineMySQLConnection(results=[plan])
+        mock_get_pool.return_value.acquire.return_value = connection
+        queries = {"similar": HOT_QUERIES["recommendations.similar_events"]}
+        self.assertEqual(check_query_plans(queries), {})
+        self.assertTrue(connection.statements[0].startswith("EXPLAIN"))
+        self.assertIn("ec.category_id IN (1, 2)", connection.statements[0])
+
+    @patch('app.database.query_plans.explain')
+    def test_failed_explain_is_reported_as_regression(self, mock_explain):
+        mock_explain.side_effect = [sqlite3.OperationalError("no such table: events"),
+                                    [{"table": "page_blocks", "type": "ALL"}]]
+        queries = {"broken": lambda: ("SELECT * FROM events", ()),
+                   "scan": lambda: ("SELECT * FROM page_blocks", ())}
+        self.assertEqual(check_query_plans(queries), {
+            "broken": ["EXPLAIN failed: no such table: events"],
+            "scan": ["page_blocks"],
+        })
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+import app.storage.minio_client as minio_client
+
+class TestPresignedUrlCache(unittest.TestCase):
+    def setUp(self):
+        minio_client._presigned_urls.clear()
+
+    @patch('app.storage.minio_client._signing_window')
+    @patch.object(minio_client.minio_client, 'presigned_get_object')
+    def test_same_url_within_window(self, mock_presign, mock_window):
+        window = datetime(2030, 1, 1, 12, 0, tzinfo=timezone.utc)
+        mock_window.return_value = window
+        mock_presign.side_effect = lambda bucket, path, expires, request_date: f"{path}@{request_date.isoformat()}"
+
+        first = minio_client.get_secure_file_url("a.mp4", expires=timedelta(hours=1))
+        second = minio_client.get_secure_file_url("a.mp4", expires=timedelta(hours=1))
+        self.assertEqual(first, second)
+        mock_presign.assert_called_once_with(
+            "videos", "a.mp4",
+            expires=timedelta(hours=1, seconds=minio_client.PRESIGNED_URL_BUCKET_SECONDS),
+            request_date=window
+        )
+
+        mock_window.return_value = window + timedelta(seconds=minio_client.PRESIGNED_URL_BUCKET_SECONDS)
+        self.assertNotEqual(minio_client.get_secure_file_url("a.mp4", expires=timedelta(hours=1)), first)
+
+    def test_signing_window_aligned(self):
+        now = datetime(2030, 1, 1, 12, 7, 31, tzinfo=timezone.utc)
+        window = minio_client._signing_window(now)
+        self.assertLessEqual(window, now)
+        self.assertEqual(int(window.timestamp()) % minio_client.PRESIGNED_URL_BUCKET_SECONDS, 0)
+
+if __name__ == '__main__':
+    unittest.main()
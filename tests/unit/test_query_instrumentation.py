@@ -0,0 +1,33 @@
+import json
+import unittest
+from unittest.mock import patch
+from app.database.instrumentation import fingerprint, params_shape, record_query
+
+class TestQueryInstrumentation(unittest.TestCase):
+    def test_fingerprint_collapses_literals_and_in_lists(self):
+        a = fingerprint("SELECT * FROM events WHERE id IN (1, 2, 3) AND title = 'Foo'")
+        b = fingerprint("select *   from events\n WHERE id IN (7) AND title = 'Bar'")
+        self.assertEqual(a, b)
+        self.assertEqual(a, "select * from events where id in (?+) and title = ?")
+
+    def test_fingerprint_treats_placeholders_as_literals(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM events WHERE category_id IN %s AND price >= %s"),
+            "select * from events where category_id in (?+) and price >= ?"
+        )
+
+    def test_params_shape_hides_values(self):
+        self.assertEqual(params_shape((1, "secret", (1, 2, 3))), ["int", "str", "tuple[3]"])
+        self.assertIsNone(params_shape(None))
+
+    @patch('app.database.instrumentation.DB_SLOW_QUERY_MS', 10)
+    def test_slow_query_is_logged_with_caller(self):
+        with self.assertLogs('app.database.slow_query', level='WARNING') as logs:
+            record_query("SELECT * FROM events WHERE id = %s", (1,), 0.5)
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry["fingerprint"], "select * from events where id = ?")
+        self.assertEqual(entry["params_shape"], ["int"])
+        self.assertTrue(entry["caller"].endswith("test_slow_query_is_logged_with_caller"))
+
+if __name__ == '__main__':
+    unittest.main()
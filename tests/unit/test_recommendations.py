@@ -6,8 +6,11 @@ class TestRecommendations(unittest.TestCase):
     @patch('app.recommendations.recommendation_engine.execute_query')
     def test_get_recommended_events(self, mock_execute_query):
         mock_execute_query.side_effect = [
-            [{"id": 1, "title": "Event 1"}],  # viewed events
-            [{"id": 1, "name": "Category 1"}],  # categories
+            [  # category and provider affinity
+                {"kind": "category", "affinity_id": 1, "weight": 3},
+                {"kind": "category", "affinity_id": 2, "weight": 1},
+                {"kind": "provider", "affinity_id": 7, "weight": 4},
+            ],
             [{"id": 1, "title": "Recommended Event 1"}],  # recommended events
             [{"id": 2, "title": "Popular Event 1"}]  # popular events
         ]
@@ -16,6 +19,15 @@ class TestRecommendations(unittest.TestCase):
         self.assertEqual(len(recommendations), 2)
         self.assertEqual(recommendations[0]["title"], "Recommended Event 1")
         self.assertEqual(recommendations[1]["title"], "Popular Event 1")
+        query, params = mock_execute_query.call_args_list[1].args
+        self.assertNotIn("NOT IN", query)
+        self.assertEqual(params, ((1, 2), (7,), 1, 5))
+
+    @patch('app.recommendations.recommendation_engine.execute_query')
+    def test_no_history_returns_popular_events(self, mock_execute_query):
+        mock_execute_query.side_effect = [[], [{"id": 2, "title": "Popular Event 1"}]]
+        self.assertEqual(get_recommended_events(1), [{"id": 2, "title": "Popular Event 1"}])
+        self.assertEqual(mock_execute_query.call_count, 2)
 
 if __name__ == '__main__':
     unittest.main()
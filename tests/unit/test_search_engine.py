@@ -0,0 +1,245 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime
+from decimal import Decimal
+from app.search.search_engine import (
+    get_categories, get_tags, _reference_data, advanced_search, to_boolean_query, keyset_search, encode_cursor,
+    decode_cursor, price_bucket_label, _search_results, invalidate_search_results, apply_event_update
+)
+from app.events.event_management import add_category
+
+class TestSearchEngine(unittest.TestCase):
+    def setUp(self):
+        _reference_data.clear()
+        _search_results.clear()
+        subscribe = patch('app.search.search_engine.subscribe')
+        subscribe.start()
+        self.addCleanup(subscribe.stop)
+
+    @patch('app.search.search_engine.execute_query')
+    def test_reference_lists_cached(self, mock_execute_query):
+        mock_execute_query.return_value = [{"id": 1, "name": "Music"}]
+        self.assertEqual(get_categories(), [{"id": 1, "name": "Music"}])
+        self.assertEqual(get_categories(), [{"id": 1, "name": "Music"}])
+        mock_execute_query.assert_called_once()
+
+    @patch('app.events.event_management.execute_query', return_value=2)
+    @patch('app.search.search_engine.execute_query')
+    def test_add_category_invalidates_list(self, mock_execute_query, mock_add_query):
+        mock_execute_query.return_value = [{"id": 1, "name": "Music"}]
+        get_categories()
+        get_tags()
+        add_category("Tech")
+        mock_execute_query.return_value = [{"id": 1, "name": "Music"}, {"id": 2, "name": "Tech"}]
+        self.assertEqual(len(get_categories()), 2)
+        get_tags()
+        self.assertEqual(mock_execute_query.call_count, 3)
+
+    @patch('app.search.search_engine.execute_query', return_value=None)
+    def test_failed_load_returns_empty_list(self, mock_execute_query):
+        self.assertEqual(get_tags(), [])
+
+    def test_to_boolean_query(self):
+        self.assertEqual(to_boolean_query("jazz  fest!"), "+jazz* +fest*")
+
+    @patch('app.search.search_engine.fulltext_available', return_value=True)
+    @patch('app.search.search_engine.execute_multi')
+    def test_fulltext_search_sorted_by_relevance(self, mock_execute_multi, mock_fulltext):
+        mock_execute_multi.return_value = [[], [{"facet": "total", "facet_value": None, "facet_count": 0}]]
+        advanced_search(search_query="jazz", sort_by='relevance', search_mode='natural')
+        (query, params), (count_query, count_params) = mock_execute_multi.call_args.args[0]
+        self.assertIn("MATCH(e.title, e.description) AGAINST (%s IN NATURAL LANGUAGE MODE) as relevance", query)
+        self.assertIn("ORDER BY relevance DESC", query)
+        self.assertNotIn("LIKE", query)
+        self.assertEqual(params[:2], ("jazz", "jazz"))
+        self.assertIn("AGAINST (%s IN NATURAL LANGUAGE MODE)", count_query)
+        self.assertNotIn("UNION ALL", count_query)
+
+    @patch('app.search.search_engine.fulltext_available', return_value=False)
+    @patch('app.search.search_engine.execute_multi')
+    def test_falls_back_to_like_without_index(self, mock_execute_multi, mock_fulltext):
+        mock_execute_multi.return_value = [[], []]
+        advanced_search(search_query="jazz", sort_by='relevance', search_mode='boolean')
+        query, params = mock_execute_multi.call_args.args[0][0]
+        self.assertIn("e.title LIKE %s", query)
+        self.assertIn("ORDER BY e.start_time ASC", query)
+        self.assertEqual(params[:2], ("%jazz%", "%jazz%"))
+
+    @patch('app.search.search_engine.fulltext_available', return_value=True)
+    @patch('app.search.search_engine.execute_multi')
+    def test_short_words_use_like(self, mock_execute_multi, mock_fulltext):
+        mock_execute_multi.return_value = [[], []]
+        advanced_search(search_query="ai", search_mode='natural')
+        self.assertIn("LIKE", mock_execute_multi.call_args.args[0][0][0])
+
+    @patch('app.search.search_engine.fulltext_available', return_value=True)
+    @patch('app.search.search_engine.execute_multi')
+    def test_default_mode_is_substring_match(self, mock_execute_multi, mock_fulltext):
+        # FULLTEXT matches whole words only, so it is opt-in through SEARCH_MODE
+        mock_execute_multi.return_value = [[], []]
+        advanced_search(search_query="jazz", sort_by='relevance')
+        query, params = mock_execute_multi.call_args.args[0][0]
+        self.assertIn("e.title LIKE %s", query)
+        self.assertNotIn("MATCH", query)
+        self.assertEqual(params[:2], ("%jazz%", "%jazz%"))
+
+    @patch('app.search.search_engine.execute_multi')
+    def test_total_and_facets_apply_every_filter(self, mock_execute_multi):
+        mock_execute_multi.return_value = [[{"id": 1}], [
+            {"facet": "total", "facet_value": None, "facet_count": 7},
+            {"facet": "categories", "facet_value": "2", "facet_count": 5},
+            {"facet": "providers", "facet_value": "alice", "facet_count": 7},
+            {"facet": "price", "facet_value": 1, "facet_count": 3},
+        ]]
+        results, total, _, facets = keyset_search(categories=[2], tags=[4], content_provider="ali", min_price=5,
+                                                  search_mode='like', facets=True)
+        (query, params), (facet_query, facet_params) = mock_execute_multi.call_args.args[0]
+        self.assertNotIn("DISTINCT", query)
+        self.assertIn("ec.category_id IN %s", query)
+        self.assertEqual(total, 7)
+        self.assertEqual(facets, {"categories": {2: 5}, "tags": {}, "providers": {"alice": 7}, "price": {1: 3}})
+        # The total applies every filter; each facet leaves out its own
+        total_part, category_part, tag_part, provider_part, price_part = facet_query.split(" UNION ALL ")
+        for part in (total_part, tag_part, provider_part, price_part):
+            self.assertIn("ec.category_id IN %s", part)
+        self.assertNotIn("ec.category_id IN %s", category_part)
+        self.assertNotIn("et.tag_id IN %s", tag_part)
+        self.assertNotIn("u.username LIKE %s", provider_part)
+        self.assertNotIn("e.price >= %s", price_part)
+        self.assertEqual(len(facet_params), facet_query.count("%s"))
+
+    @patch('app.search.search_engine.fuzzy_provider_ids', return_value=[])
+    @patch('app.search.search_engine.fuzzy_event_ids', return_value=[4, 2])
+    @patch('app.search.search_engine.execute_multi')
+    def test_fuzzy_filters_use_trigram_matches(self, mock_execute_multi, mock_event_ids, mock_provider_ids):
+        mock_execute_multi.return_value = [[], []]
+        advanced_search(search_query="jaz nite", content_provider="alce", search_mode='like', fuzzy=True)
+        query, params = mock_execute_multi.call_args.args[0][0]
+        self.assertIn("AND e.id IN %s AND FALSE", query)
+        self.assertNotIn("LIKE", query)
+        self.assertEqual(params[0], (4, 2))
+        mock_provider_ids.assert_called_once_with("alce")
+
+    @patch('app.search.search_engine.fuzzy_event_ids', return_value=None)
+    @patch('app.search.search_engine.execute_multi')
+    def test_fuzzy_falls_back_until_index_ready(self, mock_execute_multi, mock_event_ids):
+        mock_execute_multi.return_value = [[], []]
+        advanced_search(search_query="jazz", search_mode='like', fuzzy=True)
+        self.assertIn("e.title LIKE %s", mock_execute_multi.call_args.args[0][0][0])
+
+    @patch('app.search.search_engine.execute_multi')
+    def test_equivalent_searches_share_cached_result(self, mock_execute_multi):
+        mock_execute_multi.return_value = [[{"id": 1}], [{"facet": "total", "facet_value": None, "facet_count": 1}]]
+        first = advanced_search(search_query="Jazz  fest", categories=[3, 1], min_price=5,
+                                start_date=datetime(2024, 5, 1, 20, 0, 12), search_mode='like')
+        second = advanced_search(search_query="jazz fest", categories=[1, 3, 1], min_price=Decimal("5.00"),
+                                 start_date=datetime(2024, 5, 1, 20, 0, 48), search_mode='like')
+        self.assertEqual(first, ([{"id": 1}], 1))
+        self.assertEqual(second, first)
+        mock_execute_multi.assert_called_once()
+        advanced_search(search_query="jazz fest", categories=[1, 3], min_price=5, page=2, search_mode='like')
+        self.assertEqual(mock_execute_multi.call_count, 2)
+
+    @patch('app.search.search_engine.execute_multi')
+    def test_event_changes_invalidate_cached_results(self, mock_execute_multi):
+        mock_execute_multi.return_value = None
+        self.assertEqual(advanced_search(search_query="jazz", search_mode='like'), (None, 0))
+        mock_execute_multi.return_value = [[], [{"facet": "total", "facet_value": None, "facet_count": 0}]]
+        keyset_search(search_query="jazz", search_mode='like')
+        keyset_search(search_query="jazz", search_mode='like')
+        self.assertEqual(mock_execute_multi.call_count, 2)
+        invalidate_search_results('{"event_id": 1, "action": "update", "is_published": true}')
+        keyset_search(search_query="jazz", search_mode='like')
+        self.assertEqual(mock_execute_multi.call_count, 3)
+
+    @patch('app.search.autocomplete.apply_event_update')
+    @patch('app.search.fuzzy_search.apply_event_update', side_effect=RuntimeError("index busy"))
+    @patch('app.search.event_index.apply_event_update')
+    def test_apply_event_update_reaches_every_index(self, mock_event_index, mock_fuzzy, mock_autocomplete):
+        message = '{"event_id": 1, "action": "update", "is_published": true}'
+        _search_results.set(('page',), "stale")
+        apply_event_update(message)
+        self.assertIsNone(_search_results.get(('page',)))
+        # A failing index does not keep the others from updating
+        for mock_apply in (mock_event_index, mock_fuzzy, mock_autocomplete):
+            mock_apply.assert_called_once_with(message)
+
+    def test_price_bucket_label(self):
+        self.assertEqual(price_bucket_label(0), "$0-25")
+        self.assertEqual(price_bucket_label(5), "$500+")
+
+    @patch('app.search.search_engine.get_event_index')
+    @patch('app.search.search_engine.execute_query')
+    def test_index_mode_keeps_index_order(self, mock_execute_query, mock_get_index):
+        mock_get_index.return_value.search.return_value = ([3, 1], 12, [2.5, 1.0], None)
+        mock_execute_query.return_value = [{"id": 1, "title": "B"}, {"id": 3, "title": "A"}]
+        results, total = advanced_search(search_query="jazz", sort_by='relevance', page=2, per_page=2,
+                                         search_mode='index')
+        self.assertEqual(total, 12)
+        self.assertEqual([(row["id"], row["relevance"]) for row in results], [(3, 2.5), (1, 1.0)])
+        self.assertEqual(mock_get_index.return_value.search.call_args.kwargs["offset"], 2)
+        self.assertEqual(mock_execute_query.call_args.args[1], ((3, 1),))
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor(['start_time', 'ASC'], datetime(2030, 1, 1, 12), 7)
+        self.assertEqual(decode_cursor(cursor, ['start_time', 'ASC'])['value'], datetime(2030, 1, 1, 12))
+        cursor = encode_cursor(['price', 'DESC'], Decimal("19.99"), 7)
+        self.assertEqual(decode_cursor(cursor, ['price', 'DESC'])['value'], Decimal("19.99"))
+        self.assertIsNone(decode_cursor(cursor, ['price', 'ASC']))
+        self.assertIsNone(decode_cursor("not a cursor", ['price', 'DESC']))
+
+    @patch('app.search.search_engine.execute_multi')
+    def test_keyset_search_pages_after_cursor(self, mock_execute_multi):
+        rows = [{"id": i, "price": Decimal(i)} for i in (4, 5, 6)]
+        mock_execute_multi.return_value = [rows, [{"facet": "total", "facet_value": None, "facet_count": 30}]]
+        cursor = encode_cursor(['price', 'DESC'], Decimal("3"), 9)
+        results, total, next_cursor, facets = keyset_search(sort_by='price', sort_order='DESC', cursor=cursor,
+                                                            per_page=2, search_mode='like')
+        (query, params), (count_query, _) = mock_execute_multi.call_args.args[0]
+        self.assertIn("AND (e.price < %s OR (e.price = %s AND e.id < %s) OR e.price IS NULL)", query)
+        self.assertIn("ORDER BY e.price DESC, e.id DESC LIMIT %s", query)
+        self.assertNotIn("OFFSET", query)
+        self.assertEqual(params, (Decimal("3"), Decimal("3"), 9, 3))
+        self.assertEqual([row["id"] for row in results], [4, 5])
+        self.assertEqual(total, 30)
+        self.assertIsNone(facets)
+        self.assertNotIn("e.id < %s", count_query)
+        self.assertEqual(decode_cursor(next_cursor, ['price', 'DESC'])['id'], 5)
+
+    @patch('app.search.search_engine.execute_multi')
+    def test_keyset_search_pages_past_null_sort_values(self, mock_execute_multi):
+        mock_execute_multi.return_value = [[{"id": 4, "start_time": None}, {"id": 6, "start_time": None}],
+                                           [{"facet": "total", "facet_value": None, "facet_count": 5}]]
+        # NULLs sort first ascending: after a NULL, the rest of the NULLs by id, then every value
+        cursor = encode_cursor(['start_time', 'ASC'], None, 3)
+        _, _, next_cursor, _ = keyset_search(cursor=cursor, per_page=1, search_mode='like')
+        query, params = mock_execute_multi.call_args.args[0][0]
+        self.assertIn("AND (e.start_time IS NOT NULL OR e.id > %s)", query)
+        self.assertEqual(params, (3, 2))
+        self.assertIsNone(decode_cursor(next_cursor, ['start_time', 'ASC'])['value'])
+
+        # ...and last descending: after a NULL, only the NULLs with a lower id remain
+        cursor = encode_cursor(['start_time', 'DESC'], None, 3)
+        keyset_search(sort_order='DESC', cursor=cursor, per_page=1, search_mode='like')
+        query, params = mock_execute_multi.call_args.args[0][0]
+        self.assertIn("AND e.start_time IS NULL AND e.id < %s", query)
+        self.assertEqual(params, (3, 2))
+
+    @patch('app.search.search_engine.execute_multi')
+    def test_keyset_search_last_page(self, mock_execute_multi):
+        mock_execute_multi.return_value = [[{"id": 1, "start_time": datetime(2030, 1, 1)}],
+                                           [{"facet": "total", "facet_value": None, "facet_count": 1}]]
+        results, total, next_cursor, _ = keyset_search(per_page=10, search_mode='like')
+        self.assertNotIn("e.id >", mock_execute_multi.call_args.args[0][0][0])
+        self.assertIsNone(next_cursor)
+
+    @patch('app.search.search_engine.get_event_index')
+    @patch('app.search.search_engine.execute_query', return_value=[])
+    def test_keyset_search_index_mode(self, mock_execute_query, mock_get_index):
+        mock_get_index.return_value.search.return_value = ([], 25, [], None)
+        _, _, next_cursor, _ = keyset_search(per_page=10, search_mode='index')
+        keyset_search(cursor=next_cursor, per_page=10, search_mode='index')
+        self.assertEqual(mock_get_index.return_value.search.call_args.kwargs["offset"], 10)
+
+if __name__ == '__main__':
+    unittest.main()
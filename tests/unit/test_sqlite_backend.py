@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+import app.database.db as db
+from app.database.sqlite_backend import translate_query, translate_ddl
+from app.events.event_management import add_rating
+from app.search.search_engine import keyset_search, invalidate_search_results
+
+class TestDialectTranslation(unittest.TestCase):
+    def test_placeholders(self):
+        sql, params = translate_query("SELECT * FROM events WHERE id IN (%s, %s) AND price >= %s", (1, 2, 10))
+        self.assertEqual(sql, "SELECT * FROM events WHERE id IN (?, ?) AND price >= ?")
+        self.assertEqual(params, [1, 2, 10])
+
+    def test_rejects_sequence_params_like_mysql(self):
+        # IN lists are expanded by app.database.db for every backend, never by the shim
+        with self.assertRaises(sqlite3.ProgrammingError):
+            translate_query("SELECT * FROM events WHERE id IN %s", ((1, 2, 3),))
+
+    def test_date_add(self):
+        sql, _ = translate_query("WHERE e.start_time BETWEEN NOW() AND DATE_ADD(NOW(), INTERVAL 1 DAY)")
+        self.assertEqual(sql, "WHERE e.start_time BETWEEN NOW() AND datetime(NOW(), '+1 days')")
+
+    def test_on_duplicate_key_update(self):
+        sql, _ = translate_query(
+            "INSERT INTO ratings (user_id, event_id, rating) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE rating = VALUES(rating)",
+            (1, 1, 5)
+        )
+        self.assertTrue(sql.endswith("ON CONFLICT DO UPDATE SET rating = excluded.rating"))
+
+    def test_ddl(self):
+        ddl = translate_ddl("CREATE TABLE t (id INT AUTO_INCREMENT PRIMARY KEY, a INT, b INT, "
+                            "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, UNIQUE KEY (a, b))")
+        self.assertIn("id INTEGER PRIMARY KEY AUTOINCREMENT", ddl)
+        self.assertIn("UNIQUE (a, b)", ddl)
+        self.assertNotIn("ON UPDATE", ddl)
+        self.assertIsNone(translate_ddl("CREATE FULLTEXT INDEX ft ON events (title)"))
+
+class TestSQLiteBackend(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patches = [
+            patch.object(db, 'DB_BACKEND', 'sqlite'),
+            patch.object(db, 'DB_SQLITE_PATH', os.path.join(tmp.name, 'mediahost.db')),
+            patch.object(db, '_pool', None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_round_trip_through_execute_query(self):
+        user_id = db.execute_query(
+            "INSERT INTO users (username, email, password_hash, role_id) VALUES (%s, %s, %s, %s)",
+            ("provider", "provider@example.com", "hash", 2)
+        )
+        start = datetime(2030, 1, 1, 12, 0)
+        with db.transaction() as tx:
+            event_id = tx.execute(
+                "INSERT INTO events (content_provider_id, title, start_time, end_time, price, is_published) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                (user_id, "Launch", start, start, 10.0, True)
+            )
+            tx.execute_many("INSERT INTO categories (name) VALUES (%s)", [("Music",), ("Tech",)])
+
+        events = db.execute_query("SELECT * FROM events WHERE id IN %s", ((event_id,),))
+        self.assertEqual(events[0]['title'], "Launch")
+        self.assertEqual(events[0]['start_time'], start)
+        self.assertEqual(len(list(db.stream_query("SELECT * FROM categories"))), 2)
+        self.assertEqual(db.query_dataframe("SELECT name FROM categories")['name'].tolist(), ["Music", "Tech"])
+
+    def test_execute_multi(self):
+        db.execute_query("INSERT INTO categories (name) VALUES (%s)", ("Music",))
+        results = db.execute_multi([
+            ("SELECT name FROM categories WHERE name = %s", ("Music",)),
+            ("SELECT COUNT(*) AS total FROM tags", None),
+        ])
+        self.assertEqual(results, [[{'name': 'Music'}], [{'total': 0}]])
+
+    def test_add_rating_with_drifted_zero_count(self):
+        user_id = db.execute_query(
+            "INSERT INTO users (username, email, password_hash, role_id) VALUES (%s, %s, %s, %s)",
+            ("viewer", "viewer@example.com", "hash", 1)
+        )
+        event_id = db.execute_query(
+            "INSERT INTO events (content_provider_id, title, start_time, end_time, price, is_published) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            (user_id, "Launch", datetime(2030, 1, 1), datetime(2030, 1, 1), 10.0, True)
+        )
+        db.execute_query("INSERT INTO ratings (user_id, event_id, rating) VALUES (%s, %s, %s)", (user_id, event_id, 5))
+        # The stored count has drifted from the ratings table, which still holds the vote
+        self.assertTrue(add_rating(user_id, event_id, 3))
+        event = db.execute_query("SELECT average_rating, total_ratings FROM events WHERE id = %s", (event_id,))[0]
+        self.assertEqual((event['average_rating'], event['total_ratings']), (0, 0))
+
+    @patch('app.search.search_engine.subscribe')
+    def test_keyset_search_reaches_events_without_start_time(self, mock_subscribe):
+        invalidate_search_results()
+        user_id = db.execute_query(
+            "INSERT INTO users (username, email, password_hash, role_id) VALUES (%s, %s, %s, %s)",
+            ("provider", "provider@example.com", "hash", 2)
+        )
+        start_times = [datetime(2030, 1, 1), datetime(2030, 1, 2), None, None, None]
+        db.execute_many(
+            "INSERT INTO events (content_provider_id, title, start_time, end_time, price, is_published) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            [(user_id, f"ev{i}", start, None, 10.0, True) for i, start in enumerate(start_times)]
+        )
+        for sort_order in ('ASC', 'DESC'):
+            titles, cursor = [], None
+            while True:
+                results, total, cursor, _ = keyset_search(sort_order=sort_order, cursor=cursor, per_page=2,
+                                                          search_mode='like')
+                titles += [row['title'] for row in results]
+                if not cursor:
+                    break
+            self.assertEqual(total, 5)
+            self.assertEqual(sorted(titles), [f"ev{i}" for i in range(5)])
+            self.assertEqual(len(titles), 5)
+
+    def test_schema_includes_migrations(self):
+        versions = db.execute_query("SELECT version FROM schema_migrations")
+        self.assertIn("0001", [row['version'] for row in versions])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import patch
+from app.search import fuzzy_search
+from app.search.trigram_index import TrigramIndex, trigrams
+
+class TestTrigramIndex(unittest.TestCase):
+    def setUp(self):
+        self.providers = TrigramIndex.build([(1, "alice"), (2, "alicia"), (3, "bob"), (4, "robert")])
+        self.titles = TrigramIndex.build([(10, "Summer Jazz Night"), (11, "Python Workshop"), (12, "Jazz Brunch")],
+                                         word_match=True)
+
+    def test_trigrams(self):
+        self.assertEqual(trigrams("Bob"), {"  b", " bo", "bob", "ob "})
+        self.assertEqual(trigrams(""), set())
+
+    def test_similarity(self):
+        # alce shares "  a", " al" and "ce " of alice's six trigrams: 3 / (5 + 6 - 3)
+        matches = self.providers.search("alce", 0.3)
+        self.assertEqual([provider_id for provider_id, _ in matches], [1])
+        self.assertAlmostEqual(matches[0][1], 3 / 8)
+        self.assertEqual(self.providers.search("alice", 0.3)[0], (1, 1.0))
+        self.assertEqual(self.providers.search("zzz", 0.3), [])
+
+    def test_word_match(self):
+        self.assertEqual([event_id for event_id, _ in self.titles.search("jaz", 0.6)], [10, 12])
+        self.assertEqual([event_id for event_id, _ in self.titles.search("pyhton workshop", 0.6)], [11])
+        self.assertEqual(len(self.titles.search("jazz", 0.6, limit=1)), 1)
+
+    def test_add_and_remove(self):
+        self.providers.add(3, "bobby")
+        self.providers.remove(2)
+        self.providers.add(5, "alicja")
+        self.assertEqual([provider_id for provider_id, _ in self.providers.search("alicia", 0.3)], [1, 5])
+        self.providers.compact()
+        self.assertEqual(self.providers.search("bobby", 0.9), [(3, 1.0)])
+        self.assertEqual(len(self.providers), 4)
+
+class TestFuzzySearch(unittest.TestCase):
+    @patch('app.search.fuzzy_search.execute_query')
+    def test_apply_event_update(self, mock_execute_query):
+        titles = TrigramIndex.build([(1, "Jazz Night")], word_match=True)
+        providers = TrigramIndex.build([(7, "alice")])
+        mock_execute_query.return_value = [{"id": 2, "title": "Rock Night", "provider_id": 8, "username": "bob"}]
+        with patch('app.search.fuzzy_search._titles', titles), patch('app.search.fuzzy_search._providers', providers):
+            fuzzy_search.apply_event_update('{"event_id": 2, "action": "update", "is_published": true}')
+            fuzzy_search.apply_event_update('{"event_id": 1, "action": "delete", "is_published": false}')
+            self.assertEqual(fuzzy_search.fuzzy_event_ids("nite"), [])
+            self.assertEqual(fuzzy_search.fuzzy_event_ids("rock nihgt"), [2])
+            self.assertEqual(fuzzy_search.fuzzy_provider_ids("bobb"), [8])
+        mock_execute_query.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import threading
+import unittest
+from unittest.mock import patch
+from app.analytics.view_buffer import ViewBuffer, INSERT_VIEWS
+
+class TestViewBuffer(unittest.TestCase):
+    @patch('app.analytics.view_buffer.execute_many')
+    def test_flush_writes_multi_row_batches(self, mock_execute_many):
+        mock_execute_many.side_effect = lambda query, rows: len(rows)
+        buffer = ViewBuffer(max_size=100, flush_size=2, flush_interval=60)
+        buffer._ensure_started = lambda: None
+        for event_id in (1, 2, 3):
+            buffer.record(event_id, 9)
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual([len(call.args[1]) for call in mock_execute_many.call_args_list], [2, 1])
+        self.assertEqual(mock_execute_many.call_args.args[0], INSERT_VIEWS)
+        self.assertEqual(buffer.pending(), 0)
+
+    @patch('app.analytics.view_buffer.execute_many')
+    def test_full_buffer_drops_instead_of_blocking(self, mock_execute_many):
+        buffer = ViewBuffer(max_size=2, flush_size=10, flush_interval=60)
+        buffer._ensure_started = lambda: None
+        self.assertTrue(buffer.record(1, 9))
+        self.assertTrue(buffer.record(2, 9))
+        self.assertFalse(buffer.record(3, 9))
+        self.assertEqual(buffer.pending(), 2)
+
+    @patch('app.analytics.view_buffer.execute_many', return_value=None)
+    def test_failed_write_is_dropped(self, mock_execute_many):
+        buffer = ViewBuffer(max_size=10, flush_size=10, flush_interval=60)
+        buffer._ensure_started = lambda: None
+        buffer.record(1, 9)
+        self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.pending(), 0)
+
+    @patch('app.analytics.view_buffer.atexit')
+    @patch('app.analytics.view_buffer.execute_many')
+    def test_size_threshold_triggers_background_flush(self, mock_execute_many, mock_atexit):
+        written = threading.Event()
+        mock_execute_many.side_effect = lambda query, rows: written.set() or len(rows)
+        buffer = ViewBuffer(max_size=10, flush_size=2, flush_interval=60)
+        buffer.record(1, 9)
+        buffer.record(2, 9)
+        self.assertTrue(written.wait(5))
+        buffer.record(3, 9)
+        buffer.shutdown()
+        self.assertEqual(buffer.pending(), 0)
+        self.assertEqual(sum(len(call.args[1]) for call in mock_execute_many.call_args_list), 3)
+
+if __name__ == '__main__':
+    unittest.main()